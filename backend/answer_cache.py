@@ -0,0 +1,143 @@
+# backend/answer_cache.py
+# rag_llm_tr yanıtları için LRU + TTL önbellek (isteğe bağlı SQLite kalıcılığı)
+
+import os, json, time, hashlib, sqlite3, threading
+from collections import OrderedDict
+from typing import Optional, Tuple, List
+
+from ml_intent import normalize
+
+
+def make_key(message: str, mode: str, department: Optional[str],
+             hits: List[Tuple[str, str]], variant: str = "") -> str:
+    """
+    Anahtar: normalize(mesaj) + RAG modu + branş + getirilen chunk id'leri.
+    Chunk metninin kısa hash'i de eklenir; bilgi tabanı değişince anahtar da değişir.
+    """
+    parts = [
+        normalize(message),
+        mode,
+        department or "",
+        variant,
+        [[cid, hashlib.sha1(doc.encode("utf-8")).hexdigest()[:12]] for cid, doc in hits],
+    ]
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    Bellek içi LRU (OrderedDict) + TTL. db_path verilirse kayıtlar SQLite'a da yazılır
+    ve bellekte yoksa oradan okunur (yeniden başlatmada kaybolmaz).
+    """
+
+    def __init__(self, max_items: int = 512, ttl: float = 3600.0, db_path: Optional[str] = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.db_path = db_path
+        self._mem: "OrderedDict[str, tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            con = self._conn()
+            con.execute("""
+              CREATE TABLE IF NOT EXISTS answer_cache(
+                key TEXT PRIMARY KEY,
+                tr TEXT NOT NULL,
+                en TEXT NOT NULL,
+                created REAL NOT NULL
+              )
+            """)
+            con.commit(); con.close()
+
+    def _conn(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        con = self._conn()
+        try:
+            row = con.execute("SELECT created, tr, en FROM answer_cache WHERE key=?", (key,)).fetchone()
+        finally:
+            con.close()
+        return row
+
+    def _disk_put(self, key: str, created: float, tr: str, en: str):
+        con = self._conn()
+        try:
+            con.execute("INSERT OR REPLACE INTO answer_cache(key, tr, en, created) VALUES(?,?,?,?)",
+                        (key, tr, en, created))
+            # süresi dolanları temizle
+            con.execute("DELETE FROM answer_cache WHERE created < ?", (created - self.ttl,))
+            con.commit()
+        finally:
+            con.close()
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """(tr, en) ya da None."""
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                created, tr, en = item
+                if now - created <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return tr, en
+                del self._mem[key]
+
+        if self.db_path:
+            try:
+                row = self._disk_get(key)
+            except sqlite3.Error:
+                row = None
+            if row and now - row[0] <= self.ttl:
+                with self._lock:
+                    self._store(key, (row[0], row[1], row[2]))
+                    self.hits += 1
+                    self.disk_hits += 1
+                return row[1], row[2]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, item: tuple):
+        self._mem[key] = item
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def put(self, key: str, tr: str, en: str):
+        created = time.time()
+        with self._lock:
+            self._store(key, (created, tr, en))
+        if self.db_path:
+            try:
+                self._disk_put(key, created, tr, en)
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        if self.db_path:
+            con = self._conn()
+            con.execute("DELETE FROM answer_cache")
+            con.commit(); con.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._mem),
+                "max_items": self.max_items,
+                "ttl": self.ttl,
+                "persistent": bool(self.db_path),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -1,34 +1,63 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import os, json, datetime, re
+import os, json, datetime, re, queue, threading, time, contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, wait
 
-from ml_intent import predict_intent, predict_department
-from db_sqlite import init_db, availability, book_appointment
+from ml_intent import classify, classify_batch
+from db_sqlite import (init_db, availability, availability_many, book_appointment, ping_db,
+                       availability_cache_stats, SlotScheduler,
+                       hold_slot, confirm_hold, release_hold, book_many, book_item_error, BOOK_BATCH_MAX)
 
 # LLM (EN üretim + TR çeviri)
-from llm_client import llm_reply_en, translate_to_tr
+from llm_client import client as llm_client, breaker as llm_breaker, async_client_stats, LLMBusyError, EMPTY_REPLY as EMPTY_LLM_REPLY, GENERATION_MODE, llm_reply_en, llm_reply_tr, translate_to_tr, llm_reply_en_stream, llm_reply_tr_stream, translate_sentence_to_tr, iter_sentences
 
-# RAG
-from rag.rag_store import build_or_load_collection, retrieve
+# RAG (chromadb/torch ağır; rag.rag_store warmup'ta tembel import edilir)
+from rag.indexer import KnowledgeWatcher
+from rag.embedder import get_embedder
+
+# Asenkron olay günlüğü
+from event_log import AsyncLogWriter
+
+# Aşama süreleri + /metrics
+from metrics import REGISTRY, Gauge, RequestTimings, request_timings, current_timings, span, observe_request
+
+# /chat aşamalarının bağımlılık grafiği (paylaşılan executor)
+from stage_graph import StageGraph, StageCancelled, raise_if_cancelled
+
+# aynı anda gelen aynı sorular tek LLM hattını paylaşır
+from singleflight import SingleFlight
+
+# istek başına gecikme bütçesi (LLM zaman aşımları kalan süreye kırpılır)
+from deadline import DeadlineExceeded, budget, clamp, remaining
+
+# Yanıt önbelleği + cümle çeviri belleği
+from answer_cache import AnswerCache, make_key
+from translation_memory import (TranslationMemory, TM_DB_PATH, TM_MAX_ITEMS,
+                                translate_with_memory, translate_sentence_with_memory)
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}})
 APP_VERSION = "0.6.0"
 
 # ---- Logger ----
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.dirname(__file__), "logs"))
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "chat.log")
 
+# stdout + JSONL yazımı arka plan thread'inde (toplu flush, döndürme); istek yolu = kuyruğa koyma
+event_log = AsyncLogWriter(LOG_FILE)
+
 def log_event(kind: str, payload: dict):
-    rec = {"ts": datetime.datetime.now().isoformat(timespec="seconds"), "kind": kind, **payload}
-    print(f"[{rec['ts']}][{kind}] {payload}", flush=True)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    event_log.submit({"ts": datetime.datetime.now().isoformat(timespec="seconds"), "kind": kind, **payload})
 
-# DB init
+# DB init (+ slot takviminin eksik günleri)
 init_db()
+# slot takvimi ufkunu periyodik olarak ileri taşı + süresi dolan hold'ları süpür (ikisi de 0 = kapalı)
+slot_scheduler = SlotScheduler()
+if slot_scheduler.enabled:
+    slot_scheduler.start()
 
 # ---------------------------
 # RAG INIT
@@ -39,14 +68,113 @@ RAG_PERSIST_DIR = os.path.join(BASE_DIR, "ragdata")
 DAILY_KNOW_DIR = os.path.join(BASE_DIR, "rag", "knowledge_daily")
 LAB_KNOW_DIR   = os.path.join(BASE_DIR, "rag", "knowledge_lab")
 
+# "background": RAG yığını arka planda ısınır, /health hemen yanıt verir (varsayılan)
+# "eager"     : eski davranış, import sırasında senkron kurulur
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+
 daily_col = None
 lab_col = None
+rag_store = None   # rag.rag_store modülü; warmup'ta yüklenir
+
+# /ready için bileşen durumu
+readiness = {"lexical": False, "embedder": False, "daily": False, "lab": False}
+readiness_errors: dict = {}
+
+def _load_rag_store():
+    global rag_store
+    if rag_store is None:
+        import rag.rag_store as _rs
+        rag_store = _rs
+    return rag_store
+
+def warmup_rag():
+    """Ağır RAG importları + embedding modeli + koleksiyonlar. RAG hazır olana dek istekler LLM-only'ye düşer."""
+    global daily_col, lab_col
+    t0 = time.perf_counter()
+    try:
+        rs = _load_rag_store()
+        # BM25 indeksleri embedding gerektirmez: model yüklenirken RAG sözcüksel yoldan çalışır
+        rs.build_lexical("daily", DAILY_KNOW_DIR)
+        rs.build_lexical("lab", LAB_KNOW_DIR)
+        readiness["lexical"] = True
+        get_embedder().model()
+        readiness["embedder"] = True
+        daily_col = rs.build_or_load_collection(RAG_PERSIST_DIR, "daily", DAILY_KNOW_DIR)
+        readiness["daily"] = True
+        lab_col = rs.build_or_load_collection(RAG_PERSIST_DIR, "lab", LAB_KNOW_DIR)
+        readiness["lab"] = True
+        log_event("rag_ready", {"seconds": round(time.perf_counter() - t0, 2)})
+    except Exception as e:
+        readiness_errors["rag"] = str(e)
+        log_event("rag_init_error", {"error": str(e)})
 
-try:
-    daily_col = build_or_load_collection(RAG_PERSIST_DIR, "daily", DAILY_KNOW_DIR)
-    lab_col   = build_or_load_collection(RAG_PERSIST_DIR, "lab",   LAB_KNOW_DIR)
-except Exception as e:
-    log_event("rag_init_error", {"error": str(e)})
+if STARTUP_MODE == "eager":
+    warmup_rag()
+else:
+    threading.Thread(target=warmup_rag, daemon=True, name="rag-warmup").start()
+
+_reindex_lock = threading.Lock()
+
+def reindex_knowledge(names: list[str] | None = None) -> dict:
+    """
+    Knowledge klasörlerini koleksiyonlarla artımlı eşitler (yeniden başlatmadan).
+    Koleksiyon hiç kurulamamışsa burada yeniden kurmayı dener.
+    """
+    global daily_col, lab_col
+    out = {}
+    with _reindex_lock:
+        for name, know_dir in (("daily", DAILY_KNOW_DIR), ("lab", LAB_KNOW_DIR)):
+            if names and name not in names:
+                continue
+            try:
+                col = daily_col if name == "daily" else lab_col
+                if col is None:
+                    col = _load_rag_store().build_or_load_collection(RAG_PERSIST_DIR, name, know_dir)
+                    if name == "daily":
+                        daily_col = col
+                    else:
+                        lab_col = col
+                    readiness[name] = True
+                    out[name] = {"rebuilt": True, "count": col.count()}
+                else:
+                    out[name] = _load_rag_store().sync_knowledge(col, name, know_dir)
+            except Exception as e:
+                out[name] = {"error": str(e)}
+    log_event("rag_reindex", out)
+    return out
+
+# RAG_WATCH=1: knowledge klasörleri değişince otomatik yeniden indeksle
+if os.getenv("RAG_WATCH", "0") == "1":
+    _dir_names = {DAILY_KNOW_DIR: "daily", LAB_KNOW_DIR: "lab"}
+    KnowledgeWatcher(
+        list(_dir_names),
+        on_change=lambda d: reindex_knowledge([_dir_names[d]]),
+        interval=float(os.getenv("RAG_WATCH_INTERVAL", "5")),
+    ).start()
+
+# ---------------------------
+# Yanıt önbelleği (rag_llm_tr)
+# ---------------------------
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_PERSIST = os.getenv("ANSWER_CACHE_PERSIST", "0") == "1"
+
+answer_cache = AnswerCache(
+    max_items=ANSWER_CACHE_SIZE,
+    ttl=ANSWER_CACHE_TTL,
+    db_path=os.path.join(BASE_DIR, "data", "answer_cache.db") if ANSWER_CACHE_PERSIST else None,
+)
+
+# Eşzamanlı aynı istekler (normalize mesaj + yönlendirme bağlamı) tek üretimi bekler.
+# Takipçi en fazla CHAT_COALESCE_WAIT sn bekler; aşarsa kendi fallback zincirine geçer.
+# Liderin kendi bütçesinin bitmesi / slot bulamaması takipçiye yayılmaz; takipçi kendisi dener.
+CHAT_COALESCE = os.getenv("CHAT_COALESCE", "1") == "1"
+CHAT_COALESCE_WAIT = float(os.getenv("CHAT_COALESCE_WAIT", "120"))
+chat_flights = SingleFlight(CHAT_COALESCE_WAIT, leader_only=(StageCancelled, DeadlineExceeded, LLMBusyError), enabled=CHAT_COALESCE)
+
+# Cümle bazlı çeviri belleği (EN -> TR); kapalıysa tüm metin tek seferde çevrilir
+TRANSLATION_MEMORY = os.getenv("TRANSLATION_MEMORY", "0") == "1"
+translation_memory = TranslationMemory(max_items=TM_MAX_ITEMS, db_path=TM_DB_PATH) if TRANSLATION_MEMORY else None
 
 # ---------------------------
 # LAB tespiti (ek güvenlik)
@@ -71,38 +199,81 @@ def looks_like_lab(text: str) -> bool:
 # LLM yardımcıları (EN -> TR)
 # ---------------------------
 RETURN_EN_DEBUG = os.getenv("RETURN_EN_DEBUG", "0") == "1"
+# yanıta aşama bazlı süre dökümü ekle (her istekte; ya da istek başına X-Debug-Timings: 1)
+RETURN_TIMINGS_DEBUG = os.getenv("RETURN_TIMINGS_DEBUG", "0") == "1"
+# birincil adım (RAG+LLM) bu kadar saniyede bitmezse sıradaki yedek (LLM-only) spekülatif başlar;
+# birincil başarılı olursa yedek iptal edilir. 0 = hep birlikte başlat, negatif = kapalı
+CHAT_SPECULATE_AFTER = float(os.getenv("CHAT_SPECULATE_AFTER", "8"))
+# /chat isteğinin toplam bütçesi (sn); LLM çağrıları kalan süreden uzun beklemez (0 = sınırsız)
+CHAT_DEADLINE = float(os.getenv("CHAT_DEADLINE", "60"))
+# kalan bütçe bundan azsa yeni LLM adımı başlatılmaz, sabit yanıta geçilir
+CHAT_STEP_MIN_BUDGET = float(os.getenv("CHAT_STEP_MIN_BUDGET", "2"))
 
 def llm_en_to_tr(en_text: str) -> str:
     try:
+        if translation_memory is not None:
+            return translate_with_memory(en_text, translation_memory)
         return translate_to_tr(en_text)
+    except DeadlineExceeded:
+        raise   # bütçe bittiyse İngilizce yanıtla dönmek yerine zincir sabit yanıta geçer
     except Exception as e:
         log_event("translate_error", {"error": str(e)})
         return en_text
 
 def generate_reply_tr(user_message: str, *, context: dict | None = None) -> tuple[str, str]:
     """
-    EN üretir, TR çevirir.
+    two_pass   : EN üretir, TR çevirir.
+    single_pass: TR'yi tek çağrıda üretir; EN sadece RETURN_EN_DEBUG açıksa üretilir.
     return: (tr_text, en_text)
     """
-    en = llm_reply_en(user_message=user_message, context=context or {})
-    tr = llm_en_to_tr(en)
+    if GENERATION_MODE == "single_pass":
+        with span("llm_tr"):
+            tr = llm_reply_tr(user_message=user_message, context=context or {})
+        en = ""
+        if RETURN_EN_DEBUG:
+            raise_if_cancelled("en_debug")
+            try:
+                en = llm_reply_en(user_message=user_message, context=context or {})
+            except Exception as e:
+                log_event("llm_error", {"where": "en_debug", "error": str(e)})
+        return tr, en
+
+    with span("llm_en"):
+        en = llm_reply_en(user_message=user_message, context=context or {})
+    raise_if_cancelled("translate")   # spekülatif yedekse ve artık gerekmiyorsa çeviriye gitme
+    with span("translate"):
+        tr = llm_en_to_tr(en)
     return tr, en
 
 # ---------------------------
 # RAG + LLM (EN üretim, sonra TR)
 # ---------------------------
-def rag_llm_tr(user_message: str, *, mode: str, extra_context: dict | None = None) -> tuple[str, str, list[str]]:
+def rag_prepare(user_message: str, *, mode: str, extra_context: dict | None = None) -> tuple[str, dict, list[str], str]:
     """
-    mode: "daily" | "lab"
-    1) RAG retrieve
-    2) LLM EN üretim (context içine RAG chunk'ları koy)
-    3) TR çeviri
+    RAG retrieve + prompt/context hazırlığı.
+    return: (prompt, ctx, chunks, cache_key)
     """
-    col = lab_col if mode == "lab" else daily_col
-    if col is None:
-        raise RuntimeError("RAG collection not ready")
+    with span("retrieve"):
+        if rag_store is None:
+            raise RuntimeError("RAG collection not ready")
+        if mode == "multi":
+            # belirsiz mesaj: daily + lab tek sorgu embedding'iyle birlikte aranır, skorlar
+            # kalibre edilip token bütçesine sığdırılır
+            from rag.rag_router import retrieve_multi
+            cols = {"lab": lab_col, "daily": daily_col}
+            if all(c is None and rag_store.lexical_index(n) is None for n, c in cols.items()):
+                raise RuntimeError("RAG collection not ready")
+            hits = [(cid, doc) for _name, cid, doc, _score in retrieve_multi(cols, user_message, k=3)]
+        else:
+            col = lab_col if mode == "lab" else daily_col
+            if col is None and rag_store.lexical_index(mode) is None:
+                raise RuntimeError("RAG collection not ready")
+            # koleksiyon/model henüz hazır değilse retrieve_hits yalnız BM25 kullanır
+            hits = rag_store.retrieve_hits(col, user_message, k=3, name=mode)  # [(id, text)]
+    chunks = [d for _, d in hits]
+    dept = ((extra_context or {}).get("department") or {}).get("code")
+    cache_key = make_key(user_message, mode, dept, hits, variant=GENERATION_MODE)
 
-    chunks = retrieve(col, user_message, k=3)  # list[str]
     ctx = dict(extra_context or {})
     ctx["rag_mode"] = mode
     ctx["rag_chunks"] = chunks
@@ -113,9 +284,229 @@ def rag_llm_tr(user_message: str, *, mode: str, extra_context: dict | None = Non
         f"CONTEXT BULLETS:\n" + "\n".join([f"- {c}" for c in chunks]) + "\n\n"
         "ANSWER:"
     )
+    return prompt, ctx, chunks, cache_key
+
+def rag_llm_tr(user_message: str, *, mode: str, extra_context: dict | None = None) -> tuple[str, str, list[str], bool]:
+    """
+    mode: "daily" | "lab" | "multi" (daily + lab birlikte)
+    1) RAG retrieve
+    2) önbellekte varsa LLM'e gitmeden dön
+    3) LLM EN üretim (context içine RAG chunk'ları koy)
+    4) TR çeviri
+    return: (tr, en, chunks, cached)
+    """
+    return rag_answer(rag_prepare(user_message, mode=mode, extra_context=extra_context))
+
+def rag_answer(prepared: tuple[str, dict, list[str], str]) -> tuple[str, str, list[str], bool]:
+    """
+    rag_prepare çıktısından yanıt: önbellekte varsa LLM'e gitmeden, yoksa üretip önbelleğe yazar.
+    Aynı anahtarla süren bir üretim varsa onun sonucunu bekler (chat_flights).
+    """
+    prompt, ctx, chunks, cache_key = prepared
+
+    def produce():
+        hit = answer_cache.get(cache_key)
+        if hit is not None:
+            return hit[0], hit[1], True
+        tr, en = generate_reply_tr(prompt, context=ctx)
+        if cacheable_reply(tr, en):
+            answer_cache.put(cache_key, tr, en)
+        return tr, en, False
+
+    (tr, en, cached), _shared = chat_flights.do((cache_key, ctx.get("task")), produce,
+                                                timeout=clamp(CHAT_COALESCE_WAIT, "coalesced wait"))
+    return tr, en, chunks, cached
+
+def cacheable_reply(tr: str, en: str) -> bool:
+    """
+    Yalnız tam üretimler önbelleğe girer: boş yanıt, Ollama'nın boş yanıt yer tutucusu ya da
+    çevirisi başarısız olmuş (TR yerine EN dönmüş) yanıt TTL boyunca tekrar sunulmasın.
+    """
+    if not tr.strip() or EMPTY_LLM_REPLY in (tr, en):
+        return False
+    return not (GENERATION_MODE == "two_pass" and tr == en)
+
+def llm_flight_key(user_message: str, ctx: dict) -> tuple[str, str | None]:
+    """LLM-only adımı için birleştirme anahtarı: normalize mesaj + branş + görev (+ üretim modu)."""
+    dept = (ctx.get("department") or {}).get("code")
+    return make_key(user_message, "llm", dept, [], variant=GENERATION_MODE), ctx.get("task")
+
+def llm_answer(user_message: str, ctx: dict) -> tuple[str, str, list[str], bool]:
+    """RAG'siz adım: (tr, en, [], False); aynı anahtarla süren üretim varsa onu bekler."""
+    (tr, en), _shared = chat_flights.do(llm_flight_key(user_message, ctx),
+                                        lambda: generate_reply_tr(user_message=user_message, context=ctx),
+                                        timeout=clamp(CHAT_COALESCE_WAIT, "coalesced wait"))
+    return tr, en, [], False
 
-    tr, en = generate_reply_tr(prompt, context=ctx)
-    return tr, en, chunks
+# ---------------------------
+# Sabit (rule-based) yanıtlar
+# ---------------------------
+URGENT_REPLY = (
+    "Acil risk ifadesi tespit edildi. Lütfen acil durumdaysanız 112’yi arayın "
+    "ve en yakın sağlık kuruluşuna başvurun. (Bu sistem tıbbi teşhis koymaz.)"
+)
+ROUTE_NO_DEPT_REPLY = "Şikâyetini biraz daha detaylandırırsan uygun branşı önerebilirim."
+LAB_FALLBACK_REPLY = (
+    "Laboratuvar değerleri yaş/cinsiyet/öykü bağlamında yorumlanır. "
+    "Parametre adını, değerini, birimini ve referans aralığını ekleyip doktorla değerlendirmen iyi olur."
+)
+GENERAL_FALLBACK_REPLY = "Şu anda yanıt üretilemiyor."
+
+def route_fallback_reply(dept_name: str) -> str:
+    return f"Ön değerlendirme: {dept_name} uygun görünebilir."
+
+def fallback_path(chain: tuple, source: str) -> str:
+    """Örn. ("rag+llm", "llm", "rule-based") + "llm" -> "rag+llm>llm" (denenen adımlar)."""
+    return ">".join(chain[:chain.index(source) + 1]) if source in chain else source
+
+# ---------------------------
+# Akış (SSE) yardımcıları
+# ---------------------------
+_STREAM_END = object()
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _until_stopped(pieces, stop: threading.Event):
+    """Akış parçalarını stop set edilene dek geçirir (parçalar arasında kontrol)."""
+    for piece in pieces:
+        if stop.is_set():
+            return
+        yield piece
+
+def pipelined_reply_tr(user_message: str, *, context: dict | None = None):
+    """
+    EN akışını arka planda cümlelere böler; her cümle biter bitmez TR'ye çevrilir.
+    Böylece üretim sürerken ilk TR cümle istemciye ulaşır.
+    single_pass modunda TR akışı doğrudan cümlelenir (çeviri yok).
+    İstemci bağlantıyı bırakırsa (GeneratorExit) Ollama akışı kapatılır, LLM slotu hemen boşalır.
+    yield: (tr_sentence, en_sentence)
+    """
+    if GENERATION_MODE == "single_pass":
+        pieces = llm_reply_tr_stream(user_message, context=context or {})
+        try:
+            with span("llm_tr"):
+                for sent in iter_sentences(pieces):
+                    yield sent, ""
+        finally:
+            pieces.close()
+        return
+
+    q: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        pieces = llm_reply_en_stream(user_message, context=context or {})
+        try:
+            with span("llm_en"):
+                for sent in iter_sentences(_until_stopped(pieces, stop)):
+                    if stop.is_set():
+                        break
+                    q.put(sent)
+        except Exception as e:
+            q.put(e)
+        finally:
+            pieces.close()   # akış yanıtını kapatır, slotu bırakır
+            q.put(_STREAM_END)
+
+    # üretici thread isteğin bütçesini ve süre dökümünü (contextvar'lar) miras alsın
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            try:
+                with span("translate"):   # cümle başına bir satır
+                    if translation_memory is not None:
+                        tr = translate_sentence_with_memory(item, translation_memory)
+                    else:
+                        tr = translate_sentence_to_tr(item)
+            except Exception as e:
+                log_event("translate_error", {"where": "stream", "error": str(e)})
+                tr = item
+            yield tr, item
+    finally:
+        stop.set()   # tüketici bitti/koptu: üretici sıradaki parçada durur
+
+def chat_plan(user: str, *, graph: StageGraph | None = None) -> dict:
+    """
+    /chat dallanması, LLM çağırmadan: meta (intent/department/availability),
+    sırayla denenecek adımlar ve hepsi başarısızsa dönülecek sabit yanıt.
+    /chat, /chat/stream ve ASGI modu bu planı yürütür.
+    steps: [(source, rag_mode | None, context)]
+    graph verilirse müsaitlik sorgusu grafikte başlatılır (plan["pending"]); sonucu resolve_plan doldurur.
+    """
+    rt = current_timings()
+    with span("classify"):
+        cls = classify(user)  # tek normalize + tek tarama
+        intent = cls["intent"]
+        if rt is not None:
+            rt.intent = intent   # classify/availability span'ları da intent etiketiyle yazılsın
+    meta: dict = {"intent": intent}
+
+    if intent == "urgent":
+        return {"meta": meta, "steps": [], "fallback": URGENT_REPLY}
+
+    if intent == "route":
+        dept_code, dept_name = cls["department_code"], cls["department_name"]
+        if not dept_code:
+            return {
+                "meta": meta,
+                "steps": [("llm", None, {"task": "department_routing_missing"})],
+                "fallback": ROUTE_NO_DEPT_REPLY,
+            }
+        dept = {"code": dept_code, "name": dept_name}
+        meta["department"] = dept
+        pending = {}
+        if graph is not None:
+            pending["availability"] = graph.submit("availability", _timed_availability, dept_code)
+        else:
+            meta["availability"] = _timed_availability(dept_code)
+        return {
+            "meta": meta,
+            "pending": pending,
+            "steps": [
+                ("rag+llm", "daily", {"task": "department_routing_with_rag", "department": dept}),
+                ("llm", None, {"task": "department_routing", "department": dept}),
+            ],
+            "fallback": route_fallback_reply(dept_name),
+        }
+
+    if intent == "lab":
+        return {
+            "meta": meta,
+            "steps": [("rag+llm", "lab", {"task": "lab_rag"}), ("llm", None, {"task": "lab_help"})],
+            "fallback": LAB_FALLBACK_REPLY,
+        }
+
+    if looks_like_lab(user):
+        meta["intent"] = "lab"
+        rag_step = ("rag+llm", "multi", {"task": "general_looks_like_lab"})
+    else:
+        meta["intent"] = "general"
+        rag_step = ("rag+llm", "daily", {"task": "general_daily_rag"})
+    if rt is not None:
+        rt.intent = meta["intent"]
+    return {
+        "meta": meta,
+        "steps": [rag_step, ("llm", None, {"task": "general_health_info"})],
+        "fallback": GENERAL_FALLBACK_REPLY,
+        # RAG başarısızsa intent "general" döner
+        "fallback_intent": "general",
+    }
+
+def _timed_availability(dept_code: str) -> list:
+    with span("availability"):
+        return availability(dept_code)
+
+def resolve_plan(plan: dict) -> dict:
+    """Grafikte bekleyen meta alanlarını (müsaitlik) sonuçlarıyla doldurur; hata yeniden fırlatılır."""
+    for key, fut in plan.pop("pending", {}).items():
+        plan["meta"][key] = fut.result()
+    return plan
 
 # ---------------------------
 # Routes
@@ -128,185 +519,477 @@ def index():
 def health():
     return jsonify({"ok": True, "version": APP_VERSION})
 
+@app.get("/ready")
+def ready():
+    """
+    Bileşen bazlı hazır olma durumu. DB + iki koleksiyon hazırsa 200, değilse 503.
+    Ollama erişimi raporlanır ama hazır olmayı engellemez (kural tabanlı yanıtlar çalışır).
+    """
+    components = {
+        "db": ping_db(),
+        "lexical": readiness["lexical"],
+        "embedder": readiness["embedder"],
+        "daily": readiness["daily"],
+        "lab": readiness["lab"],
+        "ollama": llm_client.ping(),
+    }
+    ok = components["db"] and components["daily"] and components["lab"]
+    body = {"ready": ok, "components": components, "startup_mode": STARTUP_MODE}
+    if readiness_errors:
+        body["errors"] = readiness_errors
+    return jsonify(body), (200 if ok else 503)
+
 @app.post("/chat")
 def chat():
     data = request.get_json(force=True, silent=True) or {}
-    user = (data.get("message") or "").strip()
-    if not user:
-        return jsonify({"reply": "Boş mesaj aldım.", "intent": "empty", "source": "rule-based"})
+    return jsonify(chat_request(data, debug_timings=request.headers.get("X-Debug-Timings") == "1"))
 
-    intent = predict_intent(user)
+EMPTY_CHAT_REPLY = {"reply": "Boş mesaj aldım.", "intent": "empty", "source": "rule-based"}
 
-    # 1) URGENT: TR sabit (UI güvenliği)
-    if intent == "urgent":
-        resp = {
-            "reply": (
-                "Acil risk ifadesi tespit edildi. Lütfen acil durumdaysanız 112’yi arayın "
-                "ve en yakın sağlık kuruluşuna başvurun. (Bu sistem tıbbi teşhis koymaz.)"
-            ),
-            "intent": intent,
-            "source": "rule-based",
-        }
-
-    # 2) ROUTE: branşı rule-based bul, ama açıklamayı LLM+RAG ile güçlendir (A)
-    elif intent == "route":
-        dept_code, dept_name = predict_department(user)
+@contextmanager
+def chat_context():
+    """
+    /chat, ASGI /chat ve /chat/stream'in ortak istek bağlamı: span'lar bu isteğin dökümüne yazılır
+    (chat_plan, classify biter bitmez rt.intent'i koyar) ve LLM çağrıları CHAT_DEADLINE bütçesini paylaşır.
+    """
+    with request_timings() as rt, budget(CHAT_DEADLINE):
+        yield rt
 
-        if not dept_code:
+def chat_request(data: dict, *, debug_timings: bool = False) -> dict:
+    """/chat gövdesi -> yanıt JSON'u (Flask ve ASGI modu aynı sözleşmeyi kullanır)."""
+    user = (data.get("message") or "").strip()
+    if not user:
+        return dict(EMPTY_CHAT_REPLY)
+
+    with chat_context() as rt:
+        resp, chain = chat_reply(user, rt)
+        finish_chat(user, resp, chain, rt, debug_timings=debug_timings)
+    return resp
+
+def finish_chat(user: str, resp: dict, chain: tuple, rt: RequestTimings, *, debug_timings: bool = False):
+    observe_request("chat", rt, intent=resp["intent"], source=resp["source"],
+                    path=fallback_path(chain, resp["source"]))
+    if RETURN_TIMINGS_DEBUG or debug_timings:
+        resp["timings"] = rt.breakdown()
+    log_event("chat", {"req": user, **{k: v for k, v in resp.items() if k != "timings"}})
+
+def step_response(plan: dict, source: str, tr: str, en: str = "", chunks: list[str] | None = None,
+                  cached: bool = False) -> dict:
+    """Planın bir adımı (ya da sabit yedek) başarılı olunca dönen /chat yanıtı."""
+    meta = plan["meta"]
+    intent = meta["intent"] if source == "rag+llm" else plan.get("fallback_intent", meta["intent"])
+    resp = {"reply": tr, "intent": intent, "source": source}
+    if "department" in meta:
+        resp["department"] = meta["department"]
+        resp["availability"] = meta["availability"]
+    if cached:
+        resp["cached"] = True
+    if RETURN_EN_DEBUG and source != "rule-based":
+        resp["reply_en"] = en
+        if source == "rag+llm":
+            resp["rag_chunks"] = chunks or []
+    return resp
+
+def plan_chain(plan: dict) -> tuple:
+    return tuple(src for src, _mode, _ctx in plan["steps"]) + ("rule-based",)
+
+# devre açıkken adımlar denenmez; metriklerde yol "breaker>rule-based" görünür
+BREAKER_CHAIN = ("breaker", "rule-based")
+
+def step_budget_left() -> bool:
+    """Yeni bir LLM adımı için yeterli bütçe kaldı mı."""
+    left = remaining()
+    return left is None or left >= CHAT_STEP_MIN_BUDGET
+
+def log_step_skipped(ctx: dict):
+    log_event("llm_skipped", {"reason": "deadline", "where": ctx.get("task"), "remaining": round(remaining() or 0, 2)})
+
+def log_step_error(source: str, ctx: dict, e: Exception):
+    log_event("rag_error" if source == "rag+llm" else "llm_error", {"where": ctx.get("task"), "error": str(e)})
+
+def start_step(graph: StageGraph, user: str, step: tuple) -> Future:
+    """Plan adımını grafikte başlatır; Future sonucu (tr, en, chunks, cached)."""
+    _source, mode, ctx = step
+    if mode:
+        prepared = graph.submit("retrieve", rag_prepare, user, mode=mode, extra_context=ctx)
+        return graph.submit("rag_answer", rag_answer, after=[prepared])
+    return graph.submit("llm", llm_answer, user, ctx)
+
+def chat_reply(user: str, rt: RequestTimings) -> tuple[dict, tuple]:
+    """
+    chat_plan'ın adımlarını öncelik sırasıyla dener (RAG+LLM -> LLM), hepsi başarısızsa sabit yanıt.
+    Aşamalar grafikte çalışır: müsaitlik sorgusu retrieval ile örtüşür; birincil adım
+    CHAT_SPECULATE_AFTER içinde bitmezse sıradaki yedek beklemeden başlar. Yedek erken bitse de
+    birincil başarılıysa onun yanıtı döner ve gereksiz kalan aşamalar iptal edilir.
+    Ollama devresi açıksa adımlar atlanır; bütçe CHAT_STEP_MIN_BUDGET altına inince yeni adım başlamaz.
+    return: (yanıt, bu dalda denenecek kaynak zinciri)
+    """
+    graph = StageGraph()
+    try:
+        plan = chat_plan(user, graph=graph)
+        steps = plan["steps"]
+        if steps and llm_breaker.rejecting():
+            return step_response(resolve_plan(plan), "rule-based", plan["fallback"]), BREAKER_CHAIN
+        started: list[Future] = []
+        for i, (source, _mode, ctx) in enumerate(steps):
+            if len(started) == i:
+                if not step_budget_left():
+                    log_step_skipped(ctx)
+                    break
+                started.append(start_step(graph, user, steps[i]))
+            if (i + 1 < len(steps) and len(started) == i + 1 and CHAT_SPECULATE_AFTER >= 0
+                    and step_budget_left()):
+                if not wait([started[i]], timeout=CHAT_SPECULATE_AFTER).done:
+                    started.append(start_step(graph, user, steps[i + 1]))
             try:
-                tr, en = generate_reply_tr(
-                    user_message=user,
-                    context={"task": "department_routing_missing"}
-                )
-                resp = {"reply": tr, "intent": intent, "source": "llm"}
-                if RETURN_EN_DEBUG:
-                    resp["reply_en"] = en
+                tr, en, chunks, cached = started[i].result()
             except Exception as e:
-                log_event("llm_error", {"where": "route_no_dept", "error": str(e)})
-                resp = {"reply": "Şikâyetini biraz daha detaylandırırsan uygun branşı önerebilirim.", "intent": intent, "source": "rule-based"}
-
+                log_step_error(source, ctx, e)
+                continue
+            return step_response(resolve_plan(plan), source, tr, en, chunks, cached), plan_chain(plan)
+        return step_response(resolve_plan(plan), "rule-based", plan["fallback"]), plan_chain(plan)
+    finally:
+        graph.cancel()
+
+@app.post("/chat/stream")
+def chat_stream():
+    """
+    /chat'in SSE hali. Olaylar:
+      meta  -> {intent, department?, availability?}
+      delta -> {text}              (TR cümle, üretildikçe)
+      done  -> {reply, intent, source}
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    user = (data.get("message") or "").strip()
+    debug_timings = RETURN_TIMINGS_DEBUG or request.headers.get("X-Debug-Timings") == "1"
+
+    def gen():
+        # akışın tamamı (plan + üretim + cümle çevirileri) /chat ile aynı bütçeyi paylaşır; süre
+        # bitince yeni LLM/çeviri çağrısı başlamaz, eldeki yanıtla ya da sabit yanıtla bitirilir.
+        # span'lar (classify/availability/retrieve/llm_en/translate) bu isteğin dökümüne yazılır.
+        with chat_context() as rt:
+            yield from events(rt)
+
+    def events(rt: RequestTimings):
+        if not user:
+            plan = {"meta": {"intent": "empty"}, "steps": [], "fallback": "Boş mesaj aldım."}
         else:
-            slots = availability(dept_code)
-
+            plan = chat_plan(user)
+        meta = plan["meta"]
+        yield _sse("meta", meta)
+
+        tr_parts: list[str] = []
+        en_parts: list[str] = []
+        chunks: list[str] = []
+        source = "rule-based"
+        intent = meta["intent"]
+        cached = False
+        tried: list[str] = []
+        steps = plan["steps"]
+        if steps and llm_breaker.rejecting():
+            steps, tried = [], ["breaker"]   # Ollama devresi açık: doğrudan sabit yanıt
+
+        for step_source, mode, ctx in steps:
+            if not step_budget_left():
+                log_step_skipped(ctx)
+                break
+            cache_key = None
+            complete = True   # cümle çevirisi başarısız olduysa (TR yerine EN) önbelleğe yazılmaz
             try:
-                tr, en, chunks = rag_llm_tr(
-                    user,
-                    mode="daily",
-                    extra_context={
-                        "task": "department_routing_with_rag",
-                        "department": {"code": dept_code, "name": dept_name}
-                    }
-                )
-                resp = {
-                    "reply": tr,
-                    "intent": intent,
-                    "source": "rag+llm",
-                    "department": {"code": dept_code, "name": dept_name},
-                    "availability": slots,
-                }
-                if RETURN_EN_DEBUG:
-                    resp["reply_en"] = en
-                    resp["rag_chunks"] = chunks
+                if mode:
+                    prompt, ctx, chunks, cache_key = rag_prepare(user, mode=mode, extra_context=ctx)
+                    hit = answer_cache.get(cache_key)
+                    if hit is not None:
+                        tr_parts, en_parts, cached = [hit[0]], [hit[1]] if hit[1] else [], True
+                        yield _sse("delta", {"text": hit[0]})
+                        source = step_source
+                        break
+                else:
+                    prompt = user
+                for tr, en in pipelined_reply_tr(prompt, context=ctx):
+                    tr_parts.append(tr)
+                    if en:
+                        en_parts.append(en)
+                        complete = complete and tr != en
+                    yield _sse("delta", {"text": tr})
+                # buraya yalnız akış "done" ile bittiyse gelinir (erken kesilen akış hata fırlatır)
+                tr_text, en_text = " ".join(tr_parts), " ".join(en_parts)
+                if cache_key and complete and cacheable_reply(tr_text, en_text):
+                    answer_cache.put(cache_key, tr_text, en_text)
             except Exception as e:
-                log_event("rag_error", {"where": "route_with_dept", "error": str(e)})
-                try:
-                    tr, en = generate_reply_tr(
-                        user_message=user,
-                        context={"task": "department_routing", "department": {"code": dept_code, "name": dept_name}}
-                    )
-                    resp = {
-                        "reply": tr,
-                        "intent": intent,
-                        "source": "llm",
-                        "department": {"code": dept_code, "name": dept_name},
-                        "availability": slots
-                    }
-                    if RETURN_EN_DEBUG:
-                        resp["reply_en"] = en
-                except Exception as e2:
-                    log_event("llm_error", {"where": "route_with_dept_fallback", "error": str(e2)})
-                    resp = {
-                        "reply": f"Ön değerlendirme: {dept_name} uygun görünebilir.",
-                        "intent": intent,
-                        "source": "rule-based",
-                        "department": {"code": dept_code, "name": dept_name},
-                        "availability": slots
-                    }
-
-    # 3) LAB: RAG lab -> EN üretim -> TR
-    elif intent == "lab":
-        try:
-            tr, en, chunks = rag_llm_tr(user, mode="lab", extra_context={"task": "lab_rag"})
-            resp = {"reply": tr, "intent": intent, "source": "rag+llm"}
-            if RETURN_EN_DEBUG:
-                resp["reply_en"] = en
-                resp["rag_chunks"] = chunks
-        except Exception as e:
-            log_event("rag_error", {"where": "lab", "error": str(e)})
-            try:
-                tr, en = generate_reply_tr(user_message=user, context={"task": "lab_help"})
-                resp = {"reply": tr, "intent": intent, "source": "llm"}
-                if RETURN_EN_DEBUG:
-                    resp["reply_en"] = en
-            except Exception as e2:
-                log_event("llm_error", {"where": "lab_fallback", "error": str(e2)})
-                resp = {
-                    "reply": (
-                        "Laboratuvar değerleri yaş/cinsiyet/öykü bağlamında yorumlanır. "
-                        "Parametre adını, değerini, birimini ve referans aralığını ekleyip doktorla değerlendirmen iyi olur."
-                    ),
-                    "intent": intent,
-                    "source": "rule-based"
-                }
-
-    # 4) GENERAL: daily RAG (lab gibi görünürse lab'a çek)
-    else:
-        use_lab = looks_like_lab(user)
-        try:
-            if use_lab:
-                tr, en, chunks = rag_llm_tr(user, mode="lab", extra_context={"task": "general_looks_like_lab"})
-                out_intent = "lab"
-            else:
-                tr, en, chunks = rag_llm_tr(user, mode="daily", extra_context={"task": "general_daily_rag"})
-                out_intent = "general"
-
-            resp = {"reply": tr, "intent": out_intent, "source": "rag+llm"}
-            if RETURN_EN_DEBUG:
-                resp["reply_en"] = en
+                log_event("stream_error", {"source": step_source, "error": str(e)})
+                # yarım yanıt gönderildiyse başa dönmeyiz; eldekiyle bitiririz
+                if not tr_parts:
+                    tried.append(step_source)
+                    continue
+            source = step_source
+            break
+
+        if not tr_parts:
+            source = "rule-based"
+            tr_parts = [plan["fallback"]]
+            yield _sse("delta", {"text": plan["fallback"]})
+        if source != "rag+llm":
+            intent = plan.get("fallback_intent", intent)
+
+        resp = {"reply": " ".join(tr_parts), "intent": intent, "source": source}
+        if cached:
+            resp["cached"] = True
+        if "department" in meta:
+            resp["department"] = meta["department"]
+            resp["availability"] = meta["availability"]
+        if RETURN_EN_DEBUG and en_parts:
+            resp["reply_en"] = " ".join(en_parts)
+            if source == "rag+llm":
                 resp["rag_chunks"] = chunks
+        observe_request("chat_stream", rt, intent=intent, source=source, path=">".join(tried + [source]))
+        log_event("chat_stream", {"req": user, **resp})
+        if debug_timings:
+            resp["timings"] = rt.breakdown()
+        yield _sse("done", resp)
+
+    return Response(
+        stream_with_context(gen()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        except Exception as e:
-            log_event("rag_error", {"where": "general", "error": str(e)})
-            try:
-                tr, en = generate_reply_tr(user_message=user, context={"task": "general_health_info"})
-                resp = {"reply": tr, "intent": "general", "source": "llm"}
-                if RETURN_EN_DEBUG:
-                    resp["reply_en"] = en
-            except Exception as e2:
-                log_event("llm_error", {"where": "general_fallback", "error": str(e2)})
-                resp = {"reply": "Şu anda yanıt üretilemiyor.", "intent": "general", "source": "rule-based"}
+@app.get("/availability")
+def get_availability():
+    """
+    ?dept=ortopedi[,kbb,...]&start=YYYY-MM-DD HH:MM&end=...&limit=5&offset=0
+    Tek departmanda liste, birden çokta {dept: liste} döner.
+    """
+    body, status = availability_request(request.args)
+    return jsonify(body), status
 
-    log_event("chat", {"req": user, **resp})
-    return jsonify(resp)
+def availability_request(args) -> tuple[dict, int]:
+    codes = [c.strip() for c in (args.get("dept") or "").split(",") if c.strip()]
+    if not codes:
+        return {"ok": False, "error": "dept gerekli."}, 400
+    try:
+        limit = min(max(int(args.get("limit", 5)), 1), 100)
+        offset = max(int(args.get("offset", 0)), 0)
+    except ValueError:
+        return {"ok": False, "error": "limit/offset sayı olmalı."}, 400
+    out = availability_many(codes, start=args.get("start"), end=args.get("end"), limit=limit, offset=offset)
+    return {"ok": True, "availability": out[codes[0]] if len(codes) == 1 else out}, 200
 
 @app.post("/book")
 def book():
-    data = request.get_json(force=True, silent=True) or {}
+    body, status = book_request(request.get_json(force=True, silent=True) or {})
+    return jsonify(body), status
+
+def book_request(data: dict) -> tuple[dict, int]:
+    """/book gövdesi -> (yanıt JSON'u, HTTP kodu)."""
     dept = (data.get("department") or {}).get("code")
     doctor = data.get("doctor")
     slot = data.get("slot")
     patient = (data.get("patient") or "").strip()
 
     if not (dept and doctor and slot):
-        return jsonify({"ok": False, "error": "Eksik bilgi (department/doctor/slot)."}), 400
+        return {"ok": False, "error": "Eksik bilgi (department/doctor/slot)."}, 400
 
     ok, info, appt = book_appointment(dept, doctor, slot, patient)
     if not ok:
-        return jsonify({"ok": False, "error": info}), 409
+        return {"ok": False, "error": info}, 409
 
     reply = f"Randevu oluşturuldu: {appt['doctor']} – {appt['slot']} (Kod: {appt['id']})"
     updated = availability(dept)
     log_event("book", {"dept": dept, **appt, "patient": patient or None})
 
-    return jsonify({
+    return {
         "ok": True,
         "message": reply,
         "appointment": appt,
         "availability": updated
+    }, 200
+
+# İki aşamalı rezervasyon: önce kısa süreli hold, sonra onay
+@app.post("/book/hold")
+def book_hold():
+    data = request.get_json(force=True, silent=True) or {}
+    dept = (data.get("department") or {}).get("code")
+    doctor = data.get("doctor")
+    slot = data.get("slot")
+    if not (dept and doctor and slot):
+        return jsonify({"ok": False, "error": "Eksik bilgi (department/doctor/slot)."}), 400
+
+    ok, info, hold = hold_slot(dept, doctor, slot)
+    if not ok:
+        return jsonify({"ok": False, "error": info}), 409
+    return jsonify({"ok": True, **hold})
+
+@app.post("/book/confirm")
+def book_confirm():
+    data = request.get_json(force=True, silent=True) or {}
+    token = data.get("hold_token")
+    patient = (data.get("patient") or "").strip()
+    if not token:
+        return jsonify({"ok": False, "error": "hold_token gerekli."}), 400
+
+    ok, info, appt = confirm_hold(token, patient)
+    if not ok:
+        return jsonify({"ok": False, "error": info}), 409
+
+    dept = appt.pop("department_code")
+    reply = f"Randevu oluşturuldu: {appt['doctor']} – {appt['slot']} (Kod: {appt['id']})"
+    log_event("book", {"dept": dept, **appt, "patient": patient or None, "via": "hold"})
+    return jsonify({
+        "ok": True,
+        "message": reply,
+        "appointment": appt,
+        "availability": availability(dept)
     })
 
+@app.post("/book/release")
+def book_release():
+    data = request.get_json(force=True, silent=True) or {}
+    token = data.get("hold_token")
+    if not token:
+        return jsonify({"ok": False, "error": "hold_token gerekli."}), 400
+    return jsonify({"ok": release_hold(token)})
+
+@app.post("/book/batch")
+def book_batch():
+    """
+    Danışma için toplu randevu: tüm kalemler tek transaction'da.
+    atomic (varsayılan true): biri başarısızsa hiçbiri yazılmaz.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    items = data.get("items")
+    if not isinstance(items, list) or not all(isinstance(it, dict) for it in items):
+        return jsonify({"ok": False, "error": "items: randevu listesi bekleniyor."}), 400
+    if len(items) > BOOK_BATCH_MAX:
+        return jsonify({"ok": False, "error": f"En fazla {BOOK_BATCH_MAX} randevu gönderilebilir."}), 413
+
+    batch = []
+    for i, it in enumerate(items):
+        dept = it.get("department")
+        if dept is not None and not isinstance(dept, dict):
+            return jsonify({"ok": False, "error": f"items[{i}]: department nesne olmalı."}), 400
+        item = {
+            "dept_code": (dept or {}).get("code"),
+            "doctor": it.get("doctor"),
+            "slot": it.get("slot"),
+            "patient": it.get("patient"),
+        }
+        err = book_item_error(item)
+        if err:
+            return jsonify({"ok": False, "error": f"items[{i}]: {err}"}), 400
+        item["patient"] = (item["patient"] or "").strip()
+        batch.append(item)
+
+    ok, results = book_many(batch, atomic=bool(data.get("atomic", True)))
+    booked = sum(1 for r in results if r["ok"])
+    log_event("book_batch", {"count": len(items), "booked": booked, "atomic": bool(data.get("atomic", True))})
+    return jsonify({"ok": ok, "booked": booked, "results": results}), (200 if ok or booked else 409)
+
 @app.get("/debug/classify")
 def debug_classify():
-    text = request.args.get("text", "")
-    intent = predict_intent(text)
-    code, name = predict_department(text)
-    return jsonify({"text": text, "intent": intent, "dept_code": code, "dept_name": name})
+    return jsonify(classify_request(request.args.get("text", "")))
+
+def classify_request(text: str) -> dict:
+    cls = classify(text)
+    return {"text": text, "intent": cls["intent"], "dept_code": cls["department_code"], "dept_name": cls["department_name"]}
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+@app.post("/admin/reindex")
+def admin_reindex():
+    if ADMIN_TOKEN and request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return jsonify({"ok": False, "error": "Yetkisiz."}), 403
+    data = request.get_json(force=True, silent=True) or {}
+    names = data.get("collections")  # ["daily", "lab"] | None (hepsi)
+    return jsonify({"ok": True, "result": reindex_knowledge(names)})
+
+CLASSIFY_BATCH_MAX = int(os.getenv("CLASSIFY_BATCH_MAX", "5000"))
+
+@app.post("/classify/batch")
+def classify_batch_route():
+    data = request.get_json(force=True, silent=True) or {}
+    texts = data.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return jsonify({"ok": False, "error": "texts: metin listesi bekleniyor."}), 400
+    if len(texts) > CLASSIFY_BATCH_MAX:
+        return jsonify({"ok": False, "error": f"En fazla {CLASSIFY_BATCH_MAX} metin gönderilebilir."}), 413
+
+    results = [
+        {
+            "text": c["raw"],
+            "intent": c["intent"],
+            "urgent": c["urgent"],
+            "lab": c["lab"],
+            "dept_code": c["department_code"],
+            "dept_name": c["department_name"],
+        }
+        for c in classify_batch(texts, engine=data.get("engine"))
+    ]
+    return jsonify({"ok": True, "count": len(results), "results": results})
+
+@app.get("/debug/llm")
+def debug_llm():
+    body = llm_client.stats()
+    if async_client_stats() is not None:
+        body["async"] = async_client_stats()
+    body["breaker"] = llm_breaker.stats()
+    return jsonify(body)
+
+@app.get("/debug/cache")
+def debug_cache():
+    return jsonify({
+        "answer_cache": answer_cache.stats(),
+        "translation_memory": translation_memory.stats() if translation_memory is not None else None,
+        "query_embeddings": get_embedder().stats(),
+        "availability": availability_cache_stats(),
+        "coalescing": chat_flights.stats(),
+    })
+
+@app.get("/debug/log")
+def debug_log():
+    return jsonify(event_log.stats())
+
+# Bileşenlerin kendi stats() sayaçları /metrics okunurken gauge olarak aktarılır
+LLM_GAUGE = REGISTRY.register(Gauge("llm_client", "Ollama client pool state (llm_client.stats()).", ("field",)))
+CACHE_GAUGE = REGISTRY.register(Gauge("answer_cache", "Answer cache counters (answer_cache.stats()).", ("field",)))
+LOG_GAUGE = REGISTRY.register(Gauge("event_log", "Async event log writer counters.", ("field",)))
+BREAKER_GAUGE = REGISTRY.register(Gauge(
+    "llm_breaker", "Ollama circuit breaker (state_code: 0=closed, 1=half_open, 2=open).", ("field",)))
+FLIGHT_GAUGE = REGISTRY.register(Gauge(
+    "chat_coalescing", "Coalesced duplicate /chat generations (chat_flights.stats()).", ("field",)))
+
+def _export_stats(gauge: Gauge, stats: dict):
+    for k, v in stats.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            gauge.set(v, field=k)
+
+@app.get("/metrics")
+def metrics():
+    _export_stats(LLM_GAUGE, llm_client.stats())
+    _export_stats(CACHE_GAUGE, answer_cache.stats())
+    _export_stats(LOG_GAUGE, event_log.stats())
+    _export_stats(FLIGHT_GAUGE, chat_flights.stats())
+    _export_stats(BREAKER_GAUGE, llm_breaker.stats())
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 # Preflight
 @app.route("/chat", methods=["OPTIONS"])
 def chat_options():
     return ("", 204)
 
+@app.route("/chat/stream", methods=["OPTIONS"])
+def chat_stream_options():
+    return ("", 204)
+
+# "wsgi": Flask sunucusu (varsayılan) | "asgi": uvicorn + asgi.py (bekleyen LLM çağrıları thread tutmaz)
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
 if __name__ == "__main__":
-    # Debug reloader logları kaçırıyordu; docker için kapatıyoruz
-    app.run(host="0.0.0.0", port=8000, debug=False, use_reloader=False)
+    if SERVER_MODE == "asgi":
+        import sys, uvicorn
+        sys.modules.setdefault("app", sys.modules[__name__])   # asgi.py bu modülü ikinci kez yüklemesin
+        from asgi import app as asgi_app
+        uvicorn.run(asgi_app, host="0.0.0.0", port=8000, lifespan="on")
+    else:
+        # Debug reloader logları kaçırıyordu; docker için kapatıyoruz
+        app.run(host="0.0.0.0", port=8000, debug=False, use_reloader=False)
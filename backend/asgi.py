@@ -0,0 +1,262 @@
+# backend/asgi.py
+# ASGI sunum modu: SERVER_MODE=asgi python app.py  (ya da: uvicorn asgi:app --port 8000)
+#
+# /chat, /book, /debug/classify, /availability, /health burada async olarak sunulur:
+# - Ollama çağrıları AsyncOllamaClient ile beklenir (bekleyen sohbet thread tutmaz)
+# - sınıflandırma/DB/RAG retrieval gibi bloklayan işler executor'a devredilir
+# Diğer tüm uçlar (stream, admin, debug, hold/batch ...) WSGI köprüsüyle Flask'a gider.
+# JSON sözleşmesi Flask ile aynıdır: gövde aynı fonksiyonlarla üretilir, aynı encoder ile yazılır.
+import os, json, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import app as flask_app
+from app import (chat_plan, chat_context, rag_prepare, step_response, plan_chain, log_step_error, finish_chat,
+                 book_request, classify_request, availability_request, answer_cache, translation_memory, log_event,
+                 chat_flights, llm_flight_key, cacheable_reply, llm_breaker, step_budget_left, log_step_skipped,
+                 BREAKER_CHAIN, EMPTY_CHAT_REPLY, RETURN_EN_DEBUG, CHAT_SPECULATE_AFTER,
+                 CHAT_COALESCE_WAIT, APP_VERSION)
+from llm_client import (GENERATION_MODE, llm_reply_en_async, llm_reply_tr_async, translate_to_tr_async,
+                        close_async_client)
+from translation_memory import translate_with_memory
+from metrics import RequestTimings, span
+from stage_graph import StageGraph
+from deadline import DeadlineExceeded, clamp
+
+# Bloklayan işler (DB, retrieval, çeviri belleği) için thread havuzu
+ASGI_EXECUTOR_WORKERS = int(os.getenv("ASGI_EXECUTOR_WORKERS", "32"))
+# Flask'a köprülenen uçlar için thread sayısı
+ASGI_WSGI_WORKERS = int(os.getenv("ASGI_WSGI_WORKERS", "16"))
+CORS_ORIGINS = {"http://localhost:5173", "http://127.0.0.1:5173"}
+
+_wsgi = WSGIMiddleware(flask_app.app, workers=ASGI_WSGI_WORKERS)
+
+
+# ---------------------------
+# EN -> TR (async)
+# ---------------------------
+async def llm_en_to_tr_async(en_text: str) -> str:
+    try:
+        if translation_memory is not None:
+            # bellek SQLite + senkron toplu çeviri kullanır; executor'da çalışır
+            return await asyncio.to_thread(translate_with_memory, en_text, translation_memory)
+        return await translate_to_tr_async(en_text)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        log_event("translate_error", {"error": str(e)})
+        return en_text
+
+
+async def generate_reply_tr_async(user_message: str, *, context: dict | None = None) -> tuple[str, str]:
+    """app.generate_reply_tr'nin async hali (two_pass / single_pass)."""
+    if GENERATION_MODE == "single_pass":
+        with span("llm_tr"):
+            tr = await llm_reply_tr_async(user_message, context=context or {})
+        en = ""
+        if RETURN_EN_DEBUG:
+            try:
+                en = await llm_reply_en_async(user_message, context=context or {})
+            except Exception as e:
+                log_event("llm_error", {"where": "en_debug", "error": str(e)})
+        return tr, en
+
+    with span("llm_en"):
+        en = await llm_reply_en_async(user_message, context=context or {})
+    with span("translate"):
+        tr = await llm_en_to_tr_async(en)
+    return tr, en
+
+
+async def rag_llm_tr_async(user_message: str, *, mode: str, extra_context: dict | None = None):
+    """app.rag_llm_tr'nin async hali (aynı birleştirme tablosu). return: (tr, en, chunks, cached)"""
+    prompt, ctx, chunks, cache_key = await asyncio.to_thread(
+        rag_prepare, user_message, mode=mode, extra_context=extra_context)
+
+    async def produce():
+        hit = await asyncio.to_thread(answer_cache.get, cache_key)
+        if hit is not None:
+            return hit[0], hit[1], True
+        tr, en = await generate_reply_tr_async(prompt, context=ctx)
+        if cacheable_reply(tr, en):
+            await asyncio.to_thread(answer_cache.put, cache_key, tr, en)
+        return tr, en, False
+
+    (tr, en, cached), _shared = await chat_flights.do_async((cache_key, ctx.get("task")), produce,
+                                                           timeout=clamp(CHAT_COALESCE_WAIT, "coalesced wait"))
+    return tr, en, chunks, cached
+
+
+async def run_step_async(user: str, step: tuple) -> tuple[str, str, list[str], bool]:
+    _source, mode, ctx = step
+    if mode:
+        return await rag_llm_tr_async(user, mode=mode, extra_context=ctx)
+    (tr, en), _shared = await chat_flights.do_async(llm_flight_key(user, ctx),
+                                                    lambda: generate_reply_tr_async(user, context=ctx),
+                                                    timeout=clamp(CHAT_COALESCE_WAIT, "coalesced wait"))
+    return tr, en, [], False
+
+
+async def resolve_plan_async(plan: dict) -> dict:
+    """app.resolve_plan: grafikte bekleyen müsaitlik sorgusu loop'u bloklamadan beklenir."""
+    for key, fut in plan.pop("pending", {}).items():
+        plan["meta"][key] = await asyncio.wrap_future(fut)
+    return plan
+
+
+async def chat_reply_async(user: str, rt: RequestTimings) -> tuple[dict, tuple]:
+    """
+    app.chat_reply ile aynı plan, öncelik ve yanıtlar; LLM adımları await edilir.
+    Spekülatif yedek bir asyncio görevi olarak başlar; gereksiz kalırsa iptal edilir (HTTP isteği kesilir).
+    """
+    graph = StageGraph()
+    started: list[asyncio.Task] = []
+    try:
+        # sınıflandırma; müsaitlik sorgusu grafikte retrieval ile paralel yürür
+        plan = await asyncio.to_thread(chat_plan, user, graph=graph)
+        steps = plan["steps"]
+        if steps and llm_breaker.rejecting():
+            return step_response(await resolve_plan_async(plan), "rule-based", plan["fallback"]), BREAKER_CHAIN
+        for i, (source, _mode, ctx) in enumerate(steps):
+            if len(started) == i:
+                if not step_budget_left():
+                    log_step_skipped(ctx)
+                    break
+                started.append(asyncio.create_task(run_step_async(user, steps[i])))
+            if (i + 1 < len(steps) and len(started) == i + 1 and CHAT_SPECULATE_AFTER >= 0
+                    and step_budget_left()):
+                done, _ = await asyncio.wait([started[i]], timeout=CHAT_SPECULATE_AFTER)
+                if not done:
+                    started.append(asyncio.create_task(run_step_async(user, steps[i + 1])))
+            try:
+                tr, en, chunks, cached = await started[i]
+            except Exception as e:
+                log_step_error(source, ctx, e)
+                continue
+            return step_response(await resolve_plan_async(plan), source, tr, en, chunks, cached), plan_chain(plan)
+        return step_response(await resolve_plan_async(plan), "rule-based", plan["fallback"]), plan_chain(plan)
+    finally:
+        for t in started:
+            if not t.cancel() and not t.cancelled():
+                t.exception()   # bitmiş ama sonucu alınmamış yedeğin hatası "never retrieved" uyarısı vermesin
+        graph.cancel()
+
+
+async def chat_request_async(data: dict, *, debug_timings: bool = False) -> dict:
+    user = (data.get("message") or "").strip()
+    if not user:
+        return dict(EMPTY_CHAT_REPLY)
+
+    with chat_context() as rt:
+        resp, chain = await chat_reply_async(user, rt)
+        finish_chat(user, resp, chain, rt, debug_timings=debug_timings)
+    return resp
+
+
+# ---------------------------
+# Uçlar: (method, path) -> async handler(body, query, headers) -> (json, status)
+# ---------------------------
+async def _chat(body, query, headers):
+    return await chat_request_async(body, debug_timings=headers.get("x-debug-timings") == "1"), 200
+
+
+async def _book(body, query, headers):
+    return await asyncio.to_thread(book_request, body)
+
+
+async def _debug_classify(body, query, headers):
+    return classify_request(query.get("text", "")), 200
+
+
+async def _health(body, query, headers):
+    return {"ok": True, "version": APP_VERSION}, 200
+
+
+async def _availability(body, query, headers):
+    return await asyncio.to_thread(availability_request, query)
+
+
+ROUTES = {
+    ("POST", "/chat"): _chat,
+    ("POST", "/book"): _book,
+    ("GET", "/debug/classify"): _debug_classify,
+    ("GET", "/availability"): _availability,
+    ("GET", "/health"): _health,
+}
+
+
+# ---------------------------
+# ASGI
+# ---------------------------
+def _headers(scope) -> dict:
+    return {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers") or []}
+
+
+def _query(scope) -> dict:
+    """Tekrarlanan parametrede ilk değer (Flask request.args.get gibi)."""
+    out: dict = {}
+    for k, v in parse_qsl((scope.get("query_string") or b"").decode("utf-8"), keep_blank_values=True):
+        out.setdefault(k, v)
+    return out
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect":
+            break
+        chunks.append(msg.get("body", b""))
+        if not msg.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def _parse_json(raw: bytes) -> dict:
+    """Flask'ın get_json(force=True, silent=True) or {} davranışı."""
+    try:
+        data = json.loads(raw) if raw else None
+    except ValueError:
+        data = None
+    return data if isinstance(data, dict) else {}
+
+
+async def _send_json(send, status: int, payload: dict, headers: dict):
+    raw = flask_app.app.json.response(payload).get_data()   # jsonify ile aynı bayt dizisi
+    out = [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())]
+    origin = headers.get("origin")
+    if origin in CORS_ORIGINS:
+        out += [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+    await send({"type": "http.response.start", "status": status, "headers": out})
+    await send({"type": "http.response.body", "body": raw})
+
+
+async def _lifespan(receive, send):
+    while True:
+        msg = await receive()
+        if msg["type"] == "lifespan.startup":
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_WORKERS, thread_name_prefix="asgi-exec"))
+            await send({"type": "lifespan.startup.complete"})
+        elif msg["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    query = _query(scope)
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        return await _wsgi(scope, receive, send)
+
+    headers = _headers(scope)
+    body = _parse_json(await _read_body(receive)) if scope["method"] == "POST" else {}
+    payload, status = await handler(body, query, headers)
+    await _send_json(send, status, payload, headers)
@@ -0,0 +1,50 @@
+# backend/bench/bench_classify_corpus.py
+# Sentetik bir JSONL korpusu üretip classify_corpus.run ile tek süreç / çok süreç
+# throughput'unu ölçer.
+#
+#   cd backend && python bench/bench_classify_corpus.py --n 500000 --workers 4
+import os, sys, json, random, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import classify_corpus
+from classify_corpus import run
+
+SAMPLES = [
+    "Başım çok ağrıyor, iki gündür geçmiyor.",
+    "Göğsümde baskı var ve nefes almakta zorlanıyorum!",
+    "Kolesterol tahlil sonucum yüksek çıktı.",
+    "Dizim merdiven çıkarken ağrıyor, hangi doktora gitmeliyim?",
+    "Midem bulanıyor ve karnım şişkin.",
+    "Merhaba, nasılsın?",
+    "Ciltte kaşıntı ve kızarıklık var.",
+    "İdrar yaparken yanma oluyor.",
+    "Ateşim var, halsizim.",
+    "Kulak ağrısı ve akıntı",
+]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    # küçük dosyalarda da havuzun ölçülebilmesi için eşik kapatılır
+    classify_corpus.PARALLEL_MIN_BYTES = 0
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "corpus.jsonl")
+        with open(src, "w", encoding="utf-8") as f:
+            for i in range(args.n):
+                f.write(json.dumps({"id": i, "message": rng.choice(SAMPLES)}, ensure_ascii=False) + "\n")
+
+        for w in sorted({1, args.workers}):
+            stats = run(src, os.path.join(d, f"out_{w}.jsonl"), field="message", id_field="id",
+                        workers=w, chunk_size=2000)
+            print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
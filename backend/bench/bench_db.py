@@ -0,0 +1,95 @@
+# backend/bench/bench_db.py
+# db_sqlite eşzamanlı okuma/yazma ölçümü: çok thread'den availability (okuma) ve
+# book_appointment (yazma) karışımı. "legacy" modu eski davranışı taklit eder
+# (her çağrıda yeni bağlantı, varsayılan rollback journal); "pool" mevcut havuz + WAL.
+#
+#   cd backend && python bench/bench_db.py --threads 16 --seconds 5 --write-ratio 0.2
+import os, sys, json, time, random, sqlite3, argparse, tempfile, threading, subprocess
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import db_sqlite  # noqa: E402
+
+
+@contextmanager
+def _legacy_db():
+    con = sqlite3.connect(db_sqlite.DB_PATH, isolation_level=None, timeout=5)
+    con.row_factory = sqlite3.Row
+    try:
+        yield con
+    finally:
+        con.close()
+
+
+def run(mode: str, threads: int, seconds: float, write_ratio: float) -> dict:
+    tmp = tempfile.mkdtemp()
+    db_sqlite.DB_PATH = os.path.join(tmp, f"{mode}.db")
+    if mode == "legacy":
+        db_sqlite._db = _legacy_db
+    db_sqlite.init_db()
+
+    depts = list(db_sqlite.DEPTS)
+    stop = time.perf_counter() + seconds
+    counts = {"reads": 0, "writes": 0, "booked": 0, "conflicts": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        local = dict.fromkeys(counts, 0)
+        while time.perf_counter() < stop:
+            dept = rng.choice(depts)
+            try:
+                if rng.random() < write_ratio:
+                    rows = db_sqlite.availability(dept)
+                    if rows and rows[0]["slots"]:
+                        r = rng.choice(rows)
+                        ok, _, _ = db_sqlite.book_appointment(dept, r["doctor"], rng.choice(r["slots"] or [""]))
+                        local["booked" if ok else "conflicts"] += 1
+                    local["writes"] += 1
+                else:
+                    db_sqlite.availability(dept)
+                    local["reads"] += 1
+            except sqlite3.Error:
+                local["errors"] += 1
+        with lock:
+            for k, v in local.items():
+                counts[k] += v
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {
+        "mode": mode,
+        "threads": threads,
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "book_calls_per_s": round(counts["writes"] / elapsed, 1),
+        **{k: counts[k] for k in ("booked", "conflicts", "errors")},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--write-ratio", type=float, default=0.2)
+    ap.add_argument("--mode", choices=["legacy", "pool"], default=None)
+    args = ap.parse_args()
+    if args.mode:
+        print(json.dumps(run(args.mode, args.threads, args.seconds, args.write_ratio), ensure_ascii=False))
+        return
+    # her mod ayrı süreçte (monkeypatch/havuz durumu karışmasın)
+    for m in ("legacy", "pool"):
+        out = subprocess.run([sys.executable, __file__, "--mode", m, "--threads", str(args.threads),
+                              "--seconds", str(args.seconds), "--write-ratio", str(args.write_ratio)],
+                             capture_output=True, text=True, cwd=BACKEND_DIR)
+        print(out.stdout.strip() or out.stderr.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
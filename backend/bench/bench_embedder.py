@@ -0,0 +1,81 @@
+# backend/bench/bench_embedder.py
+# Eski düzen (koleksiyon başına ayrı SentenceTransformerEmbeddingFunction) ile paylaşılan
+# EmbeddingService'i karşılaştırır: yerleşik bellek (RSS) ve sorgu başı embedding süresi.
+# Her mod ayrı süreçte çalışır ki RSS ölçümleri birbirini etkilemesin.
+#
+#   cd backend && python bench/bench_embedder.py
+import os, sys, json, time, subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+QUERIES = [
+    "Başım ağrıyor ne yapmalıyım",
+    "dizim ağrıyor",
+    "HbA1c değerim 6.1",
+    "karnım ağrıyor",
+] * 5   # tekrarlar: önbellek isabetini görmek için
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _per_query_ms(fn) -> float:
+    t0 = time.perf_counter()
+    for q in QUERIES:
+        fn(q)
+    return (time.perf_counter() - t0) * 1000 / len(QUERIES)
+
+
+def run_legacy() -> dict:
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    daily = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    lab = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    daily(["warmup"]); lab(["warmup"])
+    load_s = time.perf_counter() - t0
+    return {
+        "mode": "legacy (2 x embedding function)",
+        "load_seconds": round(load_s, 2),
+        "rss_delta_mb": round(_rss_mb() - base, 1),
+        "query_ms": round(_per_query_ms(lambda q: daily([q])), 2),
+    }
+
+
+def run_shared() -> dict:
+    from rag.embedder import EmbeddingService
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    svc = EmbeddingService()
+    svc.embed_many(["warmup"])
+    load_s = time.perf_counter() - t0
+    return {
+        "mode": "shared service + query LRU",
+        "load_seconds": round(load_s, 2),
+        "rss_delta_mb": round(_rss_mb() - base, 1),
+        "query_ms": round(_per_query_ms(svc.embed_query), 2),
+        "cache": svc.stats(),
+    }
+
+
+def main():
+    if len(sys.argv) > 1:
+        print(json.dumps(run_legacy() if sys.argv[1] == "legacy" else run_shared(), ensure_ascii=False))
+        return
+    for mode in ("legacy", "shared"):
+        out = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, cwd=BACKEND_DIR)
+        print(out.stdout.strip() or out.stderr.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
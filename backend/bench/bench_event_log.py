@@ -0,0 +1,80 @@
+# backend/bench/bench_event_log.py
+# log_event maliyeti: eski senkron yol (print + her olayda aç/ekle/kapat) ile
+# AsyncLogWriter.submit (kuyruğa koyma) karşılaştırması, çok thread'den.
+#
+#   cd backend && python bench/bench_event_log.py --threads 8 --events 5000
+import os, sys, json, time, argparse, tempfile, threading, datetime, contextlib, io
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from event_log import AsyncLogWriter  # noqa: E402
+
+PAYLOAD = {"req": "başım ağrıyor ne yapmalıyım", "reply": "Ön değerlendirme: Nöroloji uygun görünebilir.",
+           "intent": "route", "source": "rule-based", "department": {"code": "noroloji", "name": "Nöroloji"}}
+
+
+def legacy_log(path: str):
+    def log_event(kind, payload):
+        rec = {"ts": datetime.datetime.now().isoformat(timespec="seconds"), "kind": kind, **payload}
+        print(f"[{rec['ts']}][{kind}] {payload}", flush=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    return log_event
+
+
+def async_log(path: str):
+    w = AsyncLogWriter(path)
+    def log_event(kind, payload):
+        w.submit({"ts": datetime.datetime.now().isoformat(timespec="seconds"), "kind": kind, **payload})
+    return log_event, w
+
+
+def run(fn, threads: int, events: int) -> float:
+    """return: olay başı ortalama çağrı süresi (µs), istek thread'inden görüldüğü gibi"""
+    totals = []
+    lock = threading.Lock()
+
+    def worker():
+        t0 = time.perf_counter()
+        for _ in range(events):
+            fn("chat", PAYLOAD)
+        with lock:
+            totals.append(time.perf_counter() - t0)
+
+    ts = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return sum(totals) / (threads * events) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--events", type=int, default=5000)
+    args = ap.parse_args()
+    tmp = tempfile.mkdtemp()
+
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        legacy_us = run(legacy_log(os.path.join(tmp, "legacy.log")), args.threads, args.events)
+        fn, w = async_log(os.path.join(tmp, "async.log"))
+        async_us = run(fn, args.threads, args.events)
+        t0 = time.perf_counter()
+        w.close(timeout=60)
+        drain_s = time.perf_counter() - t0
+
+    print(json.dumps({
+        "threads": args.threads,
+        "events_per_thread": args.events,
+        "legacy_us_per_event": round(legacy_us, 1),
+        "async_us_per_event": round(async_us, 1),
+        "async_drain_seconds": round(drain_s, 2),
+        "writer": w.stats(),
+    }, ensure_ascii=False, indent=1))
+
+
+if __name__ == "__main__":
+    main()
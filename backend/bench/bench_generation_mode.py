@@ -0,0 +1,77 @@
+# backend/bench/bench_generation_mode.py
+# two_pass (EN üret + TR çevir) ile single_pass (doğrudan TR) karşılaştırması.
+# Gerçek bir Ollama gerekir (OLLAMA_URL / OLLAMA_MODEL).
+#
+#   cd backend && python bench/bench_generation_mode.py --repeat 3
+import os, sys, time, json, argparse, statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_client import _ollama_generate_raw, _en_prompt, _translate_prompt, _tr_prompt
+
+MESSAGES = [
+    "Başım ağrıyor, ne yapabilirim?",
+    "Dizim ağrıyor merdiven çıkarken zorlanıyorum.",
+    "Karnım şişkin ve ağrıyor.",
+    "HbA1c değerim 6.1 çıktı, bu ne anlama geliyor?",
+    "Son günlerde çok halsizim.",
+]
+
+def _call(prompt: str) -> dict:
+    t0 = time.perf_counter()
+    data = _ollama_generate_raw(prompt)
+    return {
+        "ms": (time.perf_counter() - t0) * 1000,
+        "prompt_tokens": data.get("prompt_eval_count") or 0,
+        "gen_tokens": data.get("eval_count") or 0,
+        "text": (data.get("response") or "").strip(),
+    }
+
+def run_two_pass(msg: str) -> dict:
+    en = _call(_en_prompt(msg, {"task": "bench"}))
+    tr = _call(_translate_prompt(en["text"]))
+    return {
+        "ms": en["ms"] + tr["ms"],
+        "prompt_tokens": en["prompt_tokens"] + tr["prompt_tokens"],
+        "gen_tokens": en["gen_tokens"] + tr["gen_tokens"],
+        "calls": 2,
+    }
+
+def run_single_pass(msg: str) -> dict:
+    tr = _call(_tr_prompt(msg, {"task": "bench"}))
+    return {"ms": tr["ms"], "prompt_tokens": tr["prompt_tokens"], "gen_tokens": tr["gen_tokens"], "calls": 1}
+
+def _summary(rows: list[dict]) -> dict:
+    ms = sorted(r["ms"] for r in rows)
+    return {
+        "n": len(rows),
+        "ms_mean": round(statistics.mean(ms), 1),
+        "ms_p50": round(ms[len(ms) // 2], 1),
+        "ms_max": round(ms[-1], 1),
+        "prompt_tokens_mean": round(statistics.mean(r["prompt_tokens"] for r in rows), 1),
+        "gen_tokens_mean": round(statistics.mean(r["gen_tokens"] for r in rows), 1),
+        "calls_per_msg": rows[0]["calls"] if rows else 0,
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    # ısınma: model belleğe yüklensin
+    _call(_tr_prompt("merhaba"))
+
+    results = {"two_pass": [], "single_pass": []}
+    for _ in range(args.repeat):
+        for msg in MESSAGES:
+            results["two_pass"].append(run_two_pass(msg))
+            results["single_pass"].append(run_single_pass(msg))
+
+    report = {mode: _summary(rows) for mode, rows in results.items()}
+    two, one = report["two_pass"], report["single_pass"]
+    if two["ms_mean"]:
+        report["latency_saving_pct"] = round(100 * (1 - one["ms_mean"] / two["ms_mean"]), 1)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
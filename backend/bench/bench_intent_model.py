@@ -0,0 +1,52 @@
+# backend/bench/bench_intent_model.py
+# Öğrenilmiş intent modeli vs kural motoru: uyum (agreement) ve msg/s.
+#
+#   cd backend && python bench/bench_intent_model.py --train 60000 --test 20000
+import os, sys, time, json, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_intent import classify_batch
+from intent_model import train, synthetic_messages, logged_messages, IntentModel, BASE_DIR
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--train", type=int, default=60000)
+    ap.add_argument("--test", type=int, default=20000)
+    ap.add_argument("--epochs", type=int, default=5)
+    ap.add_argument("--log", default=os.path.join(BASE_DIR, "logs", "chat.log"))
+    args = ap.parse_args()
+
+    train_texts = logged_messages(args.log) + synthetic_messages(args.train, seed=1)
+    t0 = time.perf_counter()
+    model: IntentModel = train(train_texts, epochs=args.epochs)
+    train_s = time.perf_counter() - t0
+
+    test = synthetic_messages(args.test, seed=2)
+
+    t0 = time.perf_counter()
+    ref = classify_batch(test)
+    rules_s = time.perf_counter() - t0
+
+    model.predict(test[:100])  # ısınma
+    t0 = time.perf_counter()
+    pred = model.classify_batch(test)
+    model_s = time.perf_counter() - t0
+
+    n = len(test)
+    report = {
+        "train_messages": len(train_texts),
+        "train_seconds": round(train_s, 1),
+        "test_messages": n,
+        "agreement_intent": round(sum(a["intent"] == b["intent"] for a, b in zip(ref, pred)) / n, 4),
+        "agreement_department": round(sum(a["department_code"] == b["department_code"] for a, b in zip(ref, pred)) / n, 4),
+        "agreement_urgent": round(sum(a["urgent"] == b["urgent"] for a, b in zip(ref, pred)) / n, 4),
+        "rules_msg_per_s": round(n / rules_s, 1),
+        "model_msg_per_s": round(n / model_s, 1),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
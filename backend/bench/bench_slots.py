@@ -0,0 +1,81 @@
+# backend/bench/bench_slots.py
+# Büyük kadro + uzun ufuk: slots tablosu üretimi, müsaitlik sorgusu (önbelleksiz, tarih
+# aralığı, sayfalama) ve koşullu-güncelleme rezervasyonu süreleri.
+#
+#   cd backend && python bench/bench_slots.py --doctors 300 --days 30
+import os, sys, json, time, random, argparse, tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import db_sqlite  # noqa: E402
+
+
+def _ms(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return round((time.perf_counter() - t0) * 1000 / n, 3)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--doctors", type=int, default=300)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--bookings", type=int, default=2000)
+    args = ap.parse_args()
+
+    db_sqlite.DB_PATH = os.path.join(tempfile.mkdtemp(), "slots.db")
+    db_sqlite.init_db()
+    depts = list(db_sqlite.DEPTS)
+    with db_sqlite._db() as con, db_sqlite._write(con):
+        con.executemany("INSERT INTO doctors(dept_code, name) VALUES(?,?)",
+                        [(depts[i % len(depts)], f"Dr. Bench {i:04d}") for i in range(args.doctors)])
+        # varsayılan şablon yeni doktorlara da
+        db_sqlite._init_schema(con.cursor())
+
+    t0 = time.perf_counter()
+    added = db_sqlite.generate_slots(horizon_days=args.days)
+    gen_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    db_sqlite.generate_slots(horizon_days=args.days)
+    regen_s = time.perf_counter() - t0
+
+    rng = random.Random(0)
+    booked = conflicts = 0
+    t0 = time.perf_counter()
+    for _ in range(args.bookings):
+        dept = rng.choice(depts)
+        rows = db_sqlite.availability(dept, offset=rng.randint(0, 50), limit=5)
+        r = rng.choice(rows)
+        if not r["slots"]:
+            continue
+        ok, _, _ = db_sqlite.book_appointment(dept, r["doctor"], rng.choice(r["slots"]))
+        booked += ok
+        conflicts += not ok
+    book_ms = (time.perf_counter() - t0) * 1000 / args.bookings
+
+    def uncached():
+        db_sqlite._avail_cache.clear()
+        db_sqlite.availability(rng.choice(depts))
+
+    print(json.dumps({
+        "doctors": args.doctors + 10,
+        "days": args.days,
+        "slots_generated": added,
+        "generate_seconds": round(gen_s, 2),
+        "incremental_rerun_seconds": round(regen_s, 3),
+        "availability_uncached_ms": _ms(uncached, 200),
+        "availability_cached_ms": _ms(lambda: db_sqlite.availability("ortopedi"), 2000),
+        "availability_range_page_ms": _ms(lambda: db_sqlite.availability(
+            rng.choice(depts), start=f"{db_sqlite.date.today().isoformat()} 12:00", limit=10, offset=20), 200),
+        "availability_many_all_depts_ms": _ms(lambda: (db_sqlite._avail_cache.clear(),
+                                                       db_sqlite.availability_many(depts)), 50),
+        "page_and_book_ms": round(book_ms, 3),
+        "booked": booked,
+        "conflicts": conflicts,
+    }, ensure_ascii=False, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/bench/bench_vector_store.py
+# chromadb (HNSW) ile NumpyVectorStore (float32 / float16 / int8) karşılaştırması:
+# sorgu gecikmesi (p50/p95), yerleşik bellek (RSS) ve kesin (brute-force float32) sonuca göre recall@k.
+# Vektörler sentetiktir (model yüklenmez); her arka uç ayrı süreçte çalışır ki RSS ölçümleri karışmasın.
+#
+#   cd backend && python bench/bench_vector_store.py --n 20000 --dim 384 --queries 200
+import os, sys, json, time, argparse, tempfile, subprocess
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+K = 3
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _data(n: int, dim: int, q: int):
+    rng = np.random.default_rng(0)
+    # küme yapılı veri: gerçek embedding'lere rastgele gürültüden daha yakın
+    centers = rng.normal(size=(64, dim)).astype(np.float32)
+    base = centers[rng.integers(0, 64, n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    queries = centers[rng.integers(0, 64, q)] + 0.6 * rng.normal(size=(q, dim)).astype(np.float32)
+    return base, queries
+
+
+def _exact(base: np.ndarray, queries: np.ndarray) -> list:
+    b = base / np.linalg.norm(base, axis=1, keepdims=True)
+    qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    s = b @ qn.T
+    return [set(np.argsort(-s[:, j])[:K].tolist()) for j in range(s.shape[1])]
+
+
+def run(backend: str, n: int, dim: int, nq: int) -> dict:
+    base, queries = _data(n, dim, nq)
+    truth = _exact(base, queries)
+    ids = [str(i) for i in range(n)]
+    docs = [f"doc {i}" for i in range(n)]
+    metas = [{"i": i} for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rss0 = _rss_mb()
+        t0 = time.perf_counter()
+        if backend == "chroma":
+            import chromadb
+            rss0 = _rss_mb()
+            client = chromadb.PersistentClient(path=tmp)
+            col = client.get_or_create_collection(name="bench", embedding_function=None,
+                                                  metadata={"hnsw:space": "cosine"})
+            for i in range(0, n, 5000):
+                col.add(ids=ids[i:i + 5000], documents=docs[i:i + 5000], metadatas=metas[i:i + 5000],
+                        embeddings=base[i:i + 5000].tolist())
+        else:
+            from rag.vector_store import NumpyVectorStore
+            NumpyVectorStore(tmp, "bench", dtype=backend).add(ids, docs, metas, embeddings=base)
+            del base
+            rss0 = _rss_mb()
+            # kalıcı dosyadan (mmap) yeniden aç: uygulamanın açılıştaki durumu
+            col = NumpyVectorStore(tmp, "bench", dtype=backend)
+        build_s = time.perf_counter() - t0
+
+        lat, hit = [], 0
+        for j, qv in enumerate(queries.tolist()):
+            t = time.perf_counter()
+            res = col.query(query_embeddings=[qv], n_results=K)
+            lat.append((time.perf_counter() - t) * 1000)
+            hit += len(truth[j] & {int(x) for x in res["ids"][0]})
+
+        lat.sort()
+        return {
+            "backend": backend,
+            "n": n,
+            "build_seconds": round(build_s, 2),
+            "rss_delta_mb": round(_rss_mb() - rss0, 1),
+            "query_ms_p50": round(lat[len(lat) // 2], 3),
+            "query_ms_p95": round(lat[int(len(lat) * 0.95)], 3),
+            f"recall@{K}": round(hit / (K * nq), 4),
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--backend", default=None, help="tek arka uç (alt süreç modu)")
+    args = ap.parse_args()
+
+    if args.backend:
+        print(json.dumps(run(args.backend, args.n, args.dim, args.queries), ensure_ascii=False))
+        return
+    for b in ("chroma", "float32", "float16", "int8"):
+        out = subprocess.run([sys.executable, __file__, "--backend", b, "--n", str(args.n),
+                              "--dim", str(args.dim), "--queries", str(args.queries)],
+                             capture_output=True, text=True, cwd=BACKEND_DIR)
+        print(out.stdout.strip() or out.stderr.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
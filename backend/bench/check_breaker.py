@@ -0,0 +1,86 @@
+# backend/bench/check_breaker.py
+# Devre kesici kontrolü: asılı bir Ollama taklidine karşı /chat, istek bütçesi okuma zaman aşımından
+# kısa iken (varsayılanlar gibi: CHAT_DEADLINE 60 < OLLAMA_READ_TIMEOUT 90, her çağrı kırpılır)
+# art arda zaman aşımına düşer; devre OLLAMA_BREAKER_FAILURES çağrı sonra açılmalı ve sonraki /chat
+# Ollama'yı beklemeden sabit yanıt dönmeli. Ayrıca bütçeye kırpılıp OLLAMA_BREAKER_MIN_WAIT'ten kısa
+# kalan zaman aşımı hata sayılmamalı. Başarısızlıkta çıkış kodu 1.
+#
+#   cd backend && python bench/check_breaker.py                  # bütçe 4 sn (hızlı)
+#   cd backend && python bench/check_breaker.py --deadline 60    # varsayılan bütçeyle birebir
+import os, sys, time, tempfile, argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_ollama import FakeOllama
+
+MESSAGES = [
+    "Son günlerde çok halsizim.",
+    "Başım ağrıyor, ne yapabilirim?",
+    "Dizim ağrıyor merdiven çıkarken zorlanıyorum.",
+    "Karnım şişkin ve ağrıyor.",
+    "Uykularım düzensiz, ne yapmalıyım?",
+]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--deadline", type=float, default=4.0, help="CHAT_DEADLINE (okuma zaman aşımı 90 sn kalır)")
+    ap.add_argument("--failures", type=int, default=5, help="OLLAMA_BREAKER_FAILURES")
+    args = ap.parse_args()
+
+    fake = FakeOllama(port=0, latency=3600).start()   # ilk token hiç gelmez
+    tmp = tempfile.mkdtemp(prefix="check-breaker-")
+    os.environ.update({
+        "OLLAMA_URL": f"http://127.0.0.1:{fake.port}/api/generate",
+        "CHAT_DEADLINE": str(args.deadline),
+        "OLLAMA_BREAKER_FAILURES": str(args.failures),
+        "OLLAMA_BREAKER_RESET": "600",
+        "DB_PATH": os.path.join(tmp, "app.db"),
+        "LOG_DIR": os.path.join(tmp, "logs"),
+        "LOG_STDOUT": "0",
+        "STARTUP_MODE": "background",
+        "ANSWER_CACHE_SIZE": "0",
+    })
+    import app
+    import llm_client
+    from deadline import budget
+
+    bad = []
+    client = app.app.test_client()
+    for i in range(args.failures):
+        t0 = time.perf_counter()
+        body = client.post("/chat", json={"message": MESSAGES[i % len(MESSAGES)] + " " + str(i)}).get_json()
+        stats = llm_client.breaker.stats()
+        print(f"/chat {i + 1}: {time.perf_counter() - t0:5.1f}s  source={body.get('source')}  "
+              f"failures={stats['consecutive_failures']}  state={stats['state']}")
+    if llm_client.breaker.stats()["state"] != "open":
+        bad.append("breaker did not open after timed-out /chat calls")
+
+    t0 = time.perf_counter()
+    body = client.post("/chat", json={"message": MESSAGES[0]}).get_json()
+    took = time.perf_counter() - t0
+    print(f"/chat (open): {took:5.1f}s  source={body.get('source')}")
+    if took > 1.0 or body.get("source") != "rule-based":
+        bad.append("open breaker still waited for Ollama")
+
+    # bütçe bitmek üzereyken kırpılmış kısa zaman aşımı devreyi etkilememeli
+    breaker = llm_client.CircuitBreaker(failure_threshold=1, reset_timeout=600)
+    short = llm_client.OllamaClient(os.environ["OLLAMA_URL"], "m", breaker=breaker)
+    with budget(llm_client.OLLAMA_BREAKER_MIN_WAIT / 2):
+        try:
+            short.generate_raw("x")
+        except Exception as e:
+            print(f"short budget: {type(e).__name__}  failures={breaker.stats()['consecutive_failures']}")
+    if breaker.stats()["consecutive_failures"]:
+        bad.append("budget-clamped short timeout counted as a backend failure")
+
+    fake.stop()
+    for msg in bad:
+        print("FAIL:", msg)
+    print("ok" if not bad else f"{len(bad)} check(s) failed")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/bench/check_intent_automaton.py
+# Derlenmiş sınıflandırıcı (classify) ile referans kural zincirinin (intent_reference.classify_ref)
+# diferansiyel karşılaştırması + hız ölçümü. Uyuşmazlıkta çıkış kodu 1.
+#
+#   cd backend && python bench/check_intent_automaton.py --random 50000
+import os, sys, time, random, argparse, itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml_intent
+from ml_intent import classify, normalize
+from intent_reference import classify_ref, normalize_ref
+
+FILLER = ["ben", "çok", "iki gündür", "sabah", "biraz", "ve", "ama", "hocam", "Doktor", "ağrı", "Ağrıyor"]
+NOISE = [",", ".", "!", "?", "(", ")", "'", '"', ";", ":", "  ", "\t", "İ", "I", "Ş", "Ç", "Ğ", "Ü", "Ö", "â", "é"]
+
+# Kelimeleri Türkçe harfli yazımlarına geri çevir (normalize'ın da sınanması için)
+TURKISH = {"c": "ç", "g": "ğ", "i": "ı", "o": "ö", "s": "ş", "u": "ü"}
+
+
+def _vocab() -> list[str]:
+    words = set(ml_intent._RULES.closure_mask)
+    words.update(["gogus", "nefes", "bas", "diz", "bel", "karin", "mide", "idrar", "kulak", "bogaz"])
+    return sorted(words)
+
+
+def _turkify(w: str, rng: random.Random) -> str:
+    return "".join(TURKISH[ch] if ch in TURKISH and rng.random() < 0.3 else ch for ch in w)
+
+
+def _corpus(n_random: int, seed: int):
+    vocab = _vocab()
+    # 1) tek kelime ve ikililer
+    for w in vocab:
+        yield w
+        yield w.upper()
+    for a, b in itertools.combinations(vocab, 2):
+        yield f"{a} {b}"
+    # 2) rastgele karışımlar
+    rng = random.Random(seed)
+    for _ in range(n_random):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            r = rng.random()
+            if r < 0.5:
+                parts.append(_turkify(rng.choice(vocab), rng))
+            elif r < 0.8:
+                parts.append(rng.choice(FILLER))
+            else:
+                parts.append(rng.choice(NOISE))
+        sep = rng.choice([" ", "", " ", "  "])
+        text = sep.join(parts)
+        yield text.upper() if rng.random() < 0.1 else text
+    yield ""
+    yield "   "
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--random", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    corpus = list(_corpus(args.random, args.seed))
+    bad = 0
+    for text in corpus:
+        if normalize(text) != normalize_ref(text) or classify(text) != classify_ref(text):
+            bad += 1
+            if bad <= 10:
+                print("MISMATCH:", repr(text), classify(text), classify_ref(text))
+
+    t0 = time.perf_counter()
+    for text in corpus:
+        classify_ref(text)
+    t_ref = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for text in corpus:
+        classify(text)
+    t_new = time.perf_counter() - t0
+
+    print(f"messages      : {len(corpus)}")
+    print(f"mismatches    : {bad}")
+    print(f"classify_ref  : {len(corpus) / t_ref:,.0f} msg/s")
+    print(f"classify      : {len(corpus) / t_new:,.0f} msg/s  (x{t_ref / t_new:.2f})")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# backend/bench/fake_ollama.py
+# Yük testleri için yerel Ollama taklidi (yalnız stdlib, asyncio). /api/generate (stream true/false) ve
+# /api/tags uçlarını taklit eder:
+# - latency: ilk token'a kadar bekleme (prompt değerlendirme)
+# - tokens_per_sec / tokens: üretim hızı ve yanıt uzunluğu
+# - parallel: aynı anda üretilen istek sayısı (OLLAMA_NUM_PARALLEL gibi; fazlası sırada bekler)
+# - fail_rate: bu oranda istek 500 döner (fallback yollarını denemek için)
+#
+#   cd backend && python bench/fake_ollama.py --port 11434 --latency 0.3 --tokens-per-sec 40
+#   OLLAMA_URL=http://127.0.0.1:11434/api/generate python app.py
+import json, time, random, asyncio, hashlib, argparse, threading
+
+_WORDS = ("rest", "drink", "water", "regularly", "and", "try", "to", "sleep", "well", "your", "symptoms",
+          "may", "improve", "with", "light", "activity", "if", "pain", "continues", "please", "see", "a",
+          "doctor", "for", "a", "proper", "check", "gentle", "stretching", "can", "help", "too")
+
+
+def fake_text(prompt: str, tokens: int) -> list:
+    """Prompt'tan türetilmiş deterministik İngilizce token listesi (cümleler '.' ile biter)."""
+    rng = random.Random(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest())
+    out = []
+    for i in range(tokens):
+        w = rng.choice(_WORDS)
+        if not out or out[-1].endswith("."):
+            w = w.capitalize()
+        if i % 12 == 11 or i == tokens - 1:
+            w += "."
+        out.append(w if not out else " " + w)
+    return out
+
+
+class FakeOllama:
+    """asyncio tabanlı: binlerce eşzamanlı bağlantıda da kendisi darboğaz olmaz (thread yok)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 11434, *, latency: float = 0.3,
+                 tokens_per_sec: float = 40.0, tokens: int = 48, parallel: int = 4, fail_rate: float = 0.0,
+                 model: str = "llama3.2:1b"):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.tokens = tokens
+        self.parallel = max(parallel, 1)
+        self.fail_rate = fail_rate
+        self.model = model
+        self.requests = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server = None
+        self._sem: asyncio.Semaphore | None = None
+
+    # ---- HTTP/1.1 (keep-alive) ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                raw = await reader.readexactly(int(headers.get("content-length") or 0))
+                if method == "GET" and path.startswith("/api/tags"):
+                    await self._json(writer, 200, {"models": [{"name": self.model}]})
+                elif method == "GET" and path.startswith("/stats"):
+                    await self._json(writer, 200, self.stats())
+                elif method == "POST" and path.startswith("/api/generate"):
+                    await self._generate(writer, json.loads(raw or b"{}"))
+                else:
+                    await self._json(writer, 404, {"error": "not found"})
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass   # istemci bağlantıyı bıraktı (zaman aşımı vb.)
+        except asyncio.CancelledError:
+            pass   # stop(): bekleyen (askıda) istekler kapanışta iptal edilir
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _json(writer: asyncio.StreamWriter, code: int, body: dict):
+        raw = json.dumps(body).encode("utf-8")
+        writer.write(f"HTTP/1.1 {code} {'OK' if code == 200 else 'Error'}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(raw)}\r\n\r\n".encode("latin-1") + raw)
+        await writer.drain()
+
+    @staticmethod
+    async def _chunk(writer: asyncio.StreamWriter, obj: dict):
+        raw = (json.dumps(obj) + "\n").encode("utf-8")
+        writer.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+        await writer.drain()
+
+    async def _generate(self, writer: asyncio.StreamWriter, body: dict):
+        prompt = body.get("prompt") or ""
+        self.requests += 1
+        if random.random() < self.fail_rate:
+            self.failed += 1
+            await self._json(writer, 500, {"error": "fake failure"})
+            return
+
+        async with self._sem:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                t0 = time.perf_counter()
+                await asyncio.sleep(self.latency)
+                pieces = fake_text(prompt, self.tokens)
+                step = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+                meta = {"model": self.model, "prompt_eval_count": len(prompt) // 4, "eval_count": len(pieces)}
+                if body.get("stream"):
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                                 b"Transfer-Encoding: chunked\r\n\r\n")
+                    for p in pieces:
+                        await asyncio.sleep(step)
+                        await self._chunk(writer, {"model": self.model, "response": p, "done": False})
+                    await self._chunk(writer, {**meta, "response": "", "done": True,
+                                               "total_duration": int((time.perf_counter() - t0) * 1e9)})
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                else:
+                    await asyncio.sleep(step * len(pieces))
+                    await self._json(writer, 200, {**meta, "response": "".join(pieces), "done": True,
+                                                   "total_duration": int((time.perf_counter() - t0) * 1e9)})
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "failed": self.failed, "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight}
+
+    # ---- yaşam döngüsü ----
+    async def serve(self, ready: threading.Event | None = None):
+        self._loop = asyncio.get_running_loop()
+        self._sem = asyncio.Semaphore(self.parallel)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=2048)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "FakeOllama":
+        """Arka plan thread'inde kendi event loop'uyla başlatır (port=0 ise boş port seçilir)."""
+        ready = threading.Event()
+        threading.Thread(target=lambda: asyncio.run(self._serve_quietly(ready)), daemon=True,
+                         name="fake-ollama").start()
+        ready.wait(10)
+        return self
+
+    async def _serve_quietly(self, ready: threading.Event):
+        try:
+            await self.serve(ready)
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    ap.add_argument("--latency", type=float, default=0.3, help="ilk token'a kadar saniye")
+    ap.add_argument("--tokens-per-sec", type=float, default=40.0)
+    ap.add_argument("--tokens", type=int, default=48, help="yanıt başına token")
+    ap.add_argument("--parallel", type=int, default=4)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    fake = FakeOllama(args.host, args.port, latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                      tokens=args.tokens, parallel=args.parallel, fail_rate=args.fail_rate)
+    print(json.dumps({"fake_ollama": f"http://{args.host}:{args.port}/api/generate"}), flush=True)
+    try:
+        asyncio.run(fake.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# backend/bench/intent_reference.py
+# ml_intent kurallarının okunabilir referans hali (eski çok geçişli zincir). Üretimde yalnız
+# ml_intent'in derlenmiş tarayıcısı (DEPT_RULES + tek tarama) kullanılır; bu modül yalnız
+# bench/check_intent_automaton.py'nin birebir karşılaştırması içindir.
+import os, sys
+from typing import Optional, Tuple, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_intent import DEPTS
+
+
+def normalize_ref(s: str) -> str:
+    """normalize()'ın eski (çok geçişli) hali; referans zincir bunu kullanır."""
+    t = (s or "").casefold()
+    tr = {"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u",
+          "â": "a", "î": "i", "û": "u", "é": "e"}
+    for k, v in tr.items():
+        t = t.replace(k, v)
+    # noktalama/çift boşlukları sadeleştirme
+    for ch in ",.;:!?()[]{}'\"":
+        t = t.replace(ch, " ")
+    t = " ".join(t.split())
+    return t
+
+
+def contains_any(t: str, words) -> bool:
+    return any(w in t for w in words)
+
+
+# --- intent desenleri ---
+def is_urgent_ref(t: str) -> bool:
+    # göğüs + (ağrı|baskı|sıkışma)
+    if (("gogus" in t or "gogsum" in t or "gogsumde" in t) and contains_any(t, ["agri", "baski", "sikisma"])):
+        return True
+
+    # nefes darlığı / nefes almakta zorlanma varyantları
+    if ("nefes" in t and contains_any(t, [
+        "darl",          # nefes darligi, daraliyor
+        "zor",           # nefes zor
+        "zorlan",        # nefes almakta zorlaniyorum
+        "alam",          # nefes alamiyorum
+        "yetmiyor",      # nefes yetmiyor
+        "tikan"          # tikanir gibi
+    ])):
+        return True
+
+    if contains_any(t, ["bayil", "suur kayb", "felc"]):
+        return True
+    if contains_any(t, ["ani gorme kaybi", "ani gorme bozuklugu"]):
+        return True
+    return False
+
+
+def looks_like_lab_ref(t: str) -> bool:
+    """
+    Basit laboratuvar cümlelerini tespit eder:
+    örnek: 'tahlil', 'sonuç', 'kolesterol', 'şeker', 'kan değeri' vb.
+    """
+    keywords = [
+        "tahlil", "sonuc", "sonuç", "test", "deger", "değer",
+        "kan", "kolesterol", "seker", "şeker", "glukoz",
+        "trigliserid", "vitamin", "hemogram"
+    ]
+    return any(k in t for k in keywords)
+
+
+# --- branş kombinasyonları ---
+def predict_department_ref(text: str) -> Tuple[Optional[str], Optional[str]]:
+    t = normalize_ref(text)
+
+    # Kardiyoloji
+    if (("gogus" in t or "gogsum" in t or "gogsumde" in t) and contains_any(t, ["agri", "baski", "sikisma"])) \
+       or contains_any(t, ["kalp carpinti"]) \
+       or ("nefes" in t and contains_any(t, ["darl", "zor", "zorlan", "alam", "yetmiyor", "tikan"])):
+        return ("kardiyoloji", DEPTS["kardiyoloji"])
+
+    # KBB
+    if ("bogaz" in t and contains_any(t, ["agri", "yan"])) \
+       or ("kulak" in t and contains_any(t, ["agri", "akinti", "tikan"])) \
+       or ("burun" in t and "tikan" in t) \
+       or contains_any(t, ["sinuzit", "geniz akinti", "ses kisik"]):
+        return ("kbb", DEPTS["kbb"])
+
+    # Gastro
+    if ("mide" in t and contains_any(t, ["agri", "bulant", "eksime", "ekşime", "yanma"])) \
+       or ("karin" in t and contains_any(t, ["agri", "siskin", "siskinlik"])) \
+       or contains_any(t, ["ishal", "kabiz", "reflu", "gaz sanci", "gaz sancisi"]):
+        return ("gastro", DEPTS["gastro"])
+
+    # Dermatoloji
+    if contains_any(t, ["dokuntu", "kizin", "kasin", "egzama", "akne", "sivilce", "kurdesen", "mant"]):
+        return ("dermatoloji", DEPTS["dermatoloji"])
+
+    # Üroloji
+    if ("idrar" in t and contains_any(t, ["yan", "yanma", "yaniyor", "yakarak", "zor", "kanli"])) \
+       or ("bobrek" in t and contains_any(t, ["agri", "tas", "tasi"])):
+        return ("uroloji", DEPTS["uroloji"])
+
+    # Nöroloji
+    if contains_any(t, ["migren"]) \
+       or (("bas" in t) and contains_any(t, ["agri", "don"])) \
+       or contains_any(t, ["uyusma", "nobet", "kasilma", "titreme"]):
+        return ("noroloji", DEPTS["noroloji"])
+
+    # Ortopedi / FTR
+    if contains_any(t, ["diz", "omuz", "dirsek", "bilek", "ayak bilegi"]) \
+       or (contains_any(t, ["bel", "boyun"]) and "agri" in t) \
+       or contains_any(t, ["kirilma", "cikik", "burkul", "kas yirt", "kas zorlan"]):
+        return ("ortopedi", DEPTS["ortopedi"])
+
+    # Dahiliye – genel semptomlar
+    if contains_any(t, ["ates", "halsiz", "yorgunluk", "usume titreme", "soguk algin", "grip"]):
+        return ("dahiliye", DEPTS["dahiliye"])
+
+    return (None, None)
+
+
+def predict_intent_ref(text: str) -> str:
+    t = normalize_ref(text)
+
+    # 1) Acil
+    if is_urgent_ref(t):
+        return "urgent"
+
+    # 2) Lab/tahlil
+    if looks_like_lab_ref(t):
+        return "lab"
+
+    # 3) Branş (route) — code varsa
+    code, _ = predict_department_ref(text)
+    if code:
+        return "route"
+
+    # 4) Diğer
+    return "general"
+
+
+def classify_ref(text: str) -> Dict[str, Any]:
+    """classify()'ın referans (çok geçişli) hali."""
+    raw = text or ""
+    t = normalize_ref(raw)
+
+    urgent_flag = is_urgent_ref(t)
+    lab_flag = looks_like_lab_ref(t)
+
+    intent = predict_intent_ref(raw)
+
+    # ✅ Güncelleme: acil durumda da branş tahmini yap
+    dept_code, dept_name = predict_department_ref(raw)
+
+    return {
+        "raw": raw,
+        "normalized": t,
+        "intent": intent,
+        "urgent": urgent_flag,
+        "lab": lab_flag,
+        "department_code": dept_code,
+        "department_name": dept_name,
+    }
@@ -0,0 +1,365 @@
+# backend/bench/load_test.py
+# Kapasite ölçümü: yerel Ollama taklidi (bench/fake_ollama.py) + uygulama ayrı süreçlerde başlatılır,
+# JSONL trafik profili (urgent/lab/route/general/book) hedef RPS'te açık döngüyle (yanıtı beklemeden)
+# gönderilir. Her sunucu yapılandırması için p50/p95/p99 gecikme, throughput ve llm / rule-based
+# fallback oranları raporlanır. Gecikme planlanan gönderim anından ölçülür (kuyrukta bekleme dahil).
+#
+#   cd backend && python bench/load_test.py --rps 5 --duration 30 --configs threads:4,threads:16,threaded
+#   cd backend && python bench/load_test.py --mix route=3,general=2,lab=1,urgent=1,book=1 --latency 1.0
+#   cd backend && python bench/load_test.py --url http://127.0.0.1:8000   # çalışan uygulamaya karşı
+#
+# Sunucu yapılandırmaları:
+#   threaded     Flask geliştirme sunucusu (istek başı thread; python app.py ile aynı)
+#   threads:N    N thread'lik sabit havuz (sınırlı worker thread davranışı)
+#   gunicorn:WxT W süreç x T thread (gunicorn kuruluysa)
+#   asgi[:W]     uvicorn + asgi.py, W süreç (SERVER_MODE=asgi)
+import os, sys, json, time, random, argparse, tempfile, threading, subprocess
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(BACKEND_DIR, "bench")
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_PROFILE = os.path.join(BENCH_DIR, "traffic", "mixed.jsonl")
+KINDS = ("urgent", "lab", "route", "general", "book")
+
+
+def load_profile(path: str) -> dict:
+    """return: {kind: [satır, ...]}"""
+    by_kind = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                by_kind[item["kind"]].append(item)
+    return dict(by_kind)
+
+
+def parse_mix(spec: str | None, profile: dict) -> dict:
+    """"route=3,lab=1" -> {kind: ağırlık}; verilmezse profildeki satır sayıları."""
+    if not spec:
+        return {k: float(len(v)) for k, v in profile.items()}
+    mix = {}
+    for part in spec.split(","):
+        kind, _, w = part.partition("=")
+        if kind.strip() not in profile:
+            raise SystemExit(f"profilde '{kind.strip()}' türü yok")
+        mix[kind.strip()] = float(w or 1)
+    return mix
+
+
+def pct(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+# ---------------------------
+# Trafik
+# ---------------------------
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
+
+def _do_chat(base: str, item: dict, timeout: float) -> dict:
+    r = _session().post(f"{base}/chat", json={"message": item["message"]}, timeout=timeout)
+    out = {"status": r.status_code}
+    if r.ok:
+        body = r.json()
+        out.update(source=body.get("source"), intent=body.get("intent"))
+    return out
+
+
+def _do_book(base: str, item: dict, timeout: float, rng: random.Random) -> dict:
+    """Kullanıcı akışı: müsaitlik listesi -> rastgele bir slot -> /book (409 = başkası kaptı)."""
+    dept = item["department"]
+    r = _session().get(f"{base}/availability", params={"dept": dept, "limit": 20}, timeout=timeout)
+    if not r.ok:
+        return {"status": r.status_code}
+    pairs = [(row["doctor"], s) for row in r.json().get("availability") or [] for s in row["slots"]]
+    if not pairs:
+        return {"status": r.status_code, "book": "no_slot"}
+    doctor, slot = rng.choice(pairs)
+    r = _session().post(f"{base}/book", json={"department": {"code": dept}, "doctor": doctor, "slot": slot,
+                                              "patient": "load-test"}, timeout=timeout)
+    return {"status": r.status_code, "book": "ok" if r.ok else "conflict" if r.status_code == 409 else "error"}
+
+
+def replay(base: str, profile: dict, mix: dict, *, rps: float, duration: float, arrival: str = "poisson",
+           clients: int = 256, timeout: float = 300.0, seed: int = 0) -> dict:
+    """Açık döngü: istekler planlanan anlarda gönderilir; yanıt gecikmesi sonraki gönderimi ertelemez."""
+    rng = random.Random(seed)
+    kinds = [k for k in mix if mix[k] > 0]
+    weights = [mix[k] for k in kinds]
+    results: list = []
+    lock = threading.Lock()
+
+    def one(item: dict, scheduled: float, n: int):
+        out = {"kind": item["kind"]}
+        try:
+            if item["kind"] == "book":
+                out.update(_do_book(base, item, timeout, random.Random(seed * 100003 + n)))
+            else:
+                out.update(_do_chat(base, item, timeout))
+        except requests.RequestException as e:
+            out.update(status=0, error=type(e).__name__)
+        done = time.perf_counter()
+        out["ms"] = (done - scheduled) * 1000
+        out["done"] = done
+        with lock:
+            results.append(out)
+
+    pool = ThreadPoolExecutor(max_workers=clients, thread_name_prefix="load")
+    start = time.perf_counter() + 0.05
+    t = start
+    n = 0
+    while True:
+        t += rng.expovariate(rps) if arrival == "poisson" else 1.0 / rps
+        if t - start >= duration:
+            break
+        kind = rng.choices(kinds, weights)[0]
+        item = rng.choice(profile[kind])
+        delay = t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pool.submit(one, item, t, n)
+        n += 1
+    pool.shutdown(wait=True)
+    return summarize(results, start)
+
+
+def summarize(results: list, start: float) -> dict:
+    lat = sorted(r["ms"] for r in results)
+    for r in results:
+        r["ok"] = 200 <= r.get("status", 0) < 300 or r.get("book") == "conflict"
+    ok = [r for r in results if r["ok"]]
+    elapsed = (max(r["done"] for r in results) - start) if results else 0.0
+
+    by_kind = {}
+    for kind in KINDS:
+        ks = sorted(r["ms"] for r in results if r["kind"] == kind)
+        if ks:
+            by_kind[kind] = {"n": len(ks), "p50_ms": round(pct(ks, 0.50), 1), "p95_ms": round(pct(ks, 0.95), 1),
+                             "p99_ms": round(pct(ks, 0.99), 1)}
+
+    # fallback oranı: LLM denenen sohbetler (urgent hep rule-based, hariç tutulur)
+    chats = [r for r in results if r["kind"] not in ("urgent", "book") and r.get("source")]
+    sources = Counter(r["source"] for r in chats)
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "error_types": dict(Counter(r.get("error") or f"http_{r.get('status')}" for r in results if not r["ok"])),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {"p50": round(pct(lat, 0.50), 1), "p95": round(pct(lat, 0.95), 1),
+                       "p99": round(pct(lat, 0.99), 1), "max": round(lat[-1], 1) if lat else 0.0},
+        "by_kind": by_kind,
+        "sources": dict(Counter(r.get("source") for r in results if r.get("source"))),
+        "fallback_rate": {
+            "llm": round(sources["llm"] / len(chats), 3) if chats else 0.0,
+            "rule-based": round(sources["rule-based"] / len(chats), 3) if chats else 0.0,
+        },
+        "book": dict(Counter(r["book"] for r in results if r.get("book"))),
+    }
+
+
+# ---------------------------
+# Sunucu süreçleri
+# ---------------------------
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(config: str, port: int):
+    """Alt süreç modu: uygulamayı verilen yapılandırmayla 127.0.0.1:port'ta çalıştırır."""
+    from werkzeug.serving import BaseWSGIServer, make_server
+    import app as app_module
+
+    if config == "threaded":
+        server = make_server("127.0.0.1", port, app_module.app, threaded=True)
+    elif config.startswith("threads:"):
+        threads = int(config.split(":", 1)[1])
+
+        class PooledWSGIServer(BaseWSGIServer):
+            """Sabit boyutlu thread havuzu: havuz doluyken bağlantılar sırada bekler."""
+            multithread = True
+            request_queue_size = 1024   # listen() __init__ içinde çağrılır
+
+            def __init__(self, *a, **kw):
+                super().__init__(*a, **kw)
+                self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+            def process_request(self, request, client_address):
+                self._pool.submit(self._handle, request, client_address)
+
+            def _handle(self, request, client_address):
+                try:
+                    self.finish_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                finally:
+                    self.shutdown_request(request)
+
+        server = PooledWSGIServer("127.0.0.1", port, app_module.app)
+    else:
+        raise SystemExit(f"bilinmeyen yapılandırma: {config}")
+    server.serve_forever()
+
+
+def start_app(config: str, port: int, env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "ab")
+    if config.startswith("gunicorn:"):
+        workers, _, threads = config.split(":", 1)[1].partition("x")
+        cmd = [sys.executable, "-m", "gunicorn", "-w", workers, "--threads", threads or "1",
+               "-b", f"127.0.0.1:{port}", "--backlog", "1024", "app:app"]
+    elif config == "asgi" or config.startswith("asgi:"):
+        workers = config.partition(":")[2] or "1"
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", workers, "--lifespan", "on", "--log-level", "warning", "--backlog", "2048"]
+    else:
+        cmd = [sys.executable, os.path.abspath(__file__), "--serve", config, "--port", str(port)]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base: str, proc: subprocess.Popen | None, timeout: float) -> dict:
+    """/ready'de en az sözcüksel RAG hazır olana dek bekler (embedding modeli gelmese de istekler çalışır)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"uygulama çıktı (kod {proc.returncode})")
+        try:
+            comp = requests.get(f"{base}/ready", timeout=5).json().get("components") or {}
+            if comp.get("lexical"):
+                return comp
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base} {timeout:.0f} sn içinde hazır olmadı")
+
+
+def _get_json(url: str) -> dict | None:
+    try:
+        return requests.get(url, timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profile", default=DEFAULT_PROFILE, help="JSONL trafik profili")
+    ap.add_argument("--mix", default=None, help="tür ağırlıkları, örn. route=3,general=2,lab=1,urgent=1,book=1")
+    ap.add_argument("--rps", type=float, default=5.0)
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--warmup", type=float, default=3.0, help="ölçülmeyen ısınma süresi (sn)")
+    ap.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    ap.add_argument("--clients", type=int, default=256, help="yük üretecinin eşzamanlı istek sınırı")
+    ap.add_argument("--timeout", type=float, default=300.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--configs", default="threads:4,threads:16,threaded")
+    ap.add_argument("--url", default=None, help="çalışan uygulama; verilirse süreç başlatılmaz")
+    ap.add_argument("--ollama-url", default=None, help="gerçek/başka Ollama; verilmezse taklit başlatılır")
+    ap.add_argument("--latency", type=float, default=0.3, help="taklit: ilk token'a kadar sn")
+    ap.add_argument("--tokens-per-sec", type=float, default=40.0)
+    ap.add_argument("--tokens", type=int, default=48)
+    ap.add_argument("--parallel", type=int, default=4, help="taklit: eşzamanlı üretim")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--answer-cache", action="store_true", help="yanıt önbelleği açık (varsayılan kapalı)")
+    ap.add_argument("--ready-timeout", type=float, default=180.0)
+    ap.add_argument("--out", default=None, help="raporları JSONL olarak bu dosyaya da ekle")
+    ap.add_argument("--serve", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    profile = load_profile(args.profile)
+    mix = parse_mix(args.mix, profile)
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+
+    fake = None
+    ollama_url = args.ollama_url
+    if not ollama_url and not args.url:
+        fake_port = _free_port()
+        fake_log = open(os.path.join(tmp, "fake_ollama.log"), "ab")
+        fake = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "fake_ollama.py"), "--port", str(fake_port),
+                                 "--latency", str(args.latency), "--tokens-per-sec", str(args.tokens_per_sec),
+                                 "--tokens", str(args.tokens), "--parallel", str(args.parallel),
+                                 "--fail-rate", str(args.fail_rate)],
+                                stdout=fake_log, stderr=subprocess.STDOUT)
+        ollama_url = f"http://127.0.0.1:{fake_port}/api/generate"
+
+    configs = [None] if args.url else [c.strip() for c in args.configs.split(",") if c.strip()]
+    try:
+        for config in configs:
+            proc = None
+            base = args.url
+            if base is None:
+                port = _free_port()
+                base = f"http://127.0.0.1:{port}"
+                env = dict(os.environ)
+                env.update({
+                    "OLLAMA_URL": ollama_url,
+                    "DB_PATH": os.path.join(tmp, f"app-{port}.db"),
+                    "LOG_DIR": os.path.join(tmp, f"logs-{port}"),
+                    "LOG_STDOUT": "0",
+                    "STARTUP_MODE": "background",
+                    "PYTHONUNBUFFERED": "1",
+                })
+                if not args.answer_cache:
+                    env["ANSWER_CACHE_SIZE"] = "0"
+                proc = start_app(config, port, env, os.path.join(tmp, f"app-{port}.log"))
+            try:
+                ready = wait_ready(base, proc, args.ready_timeout)
+                if args.warmup > 0:
+                    replay(base, profile, mix, rps=args.rps, duration=args.warmup, arrival=args.arrival,
+                           clients=args.clients, timeout=args.timeout, seed=args.seed + 1)
+                report = replay(base, profile, mix, rps=args.rps, duration=args.duration, arrival=args.arrival,
+                                clients=args.clients, timeout=args.timeout, seed=args.seed)
+                report = {
+                    "config": config or base,
+                    "rps_target": args.rps,
+                    "duration": args.duration,
+                    "mix": mix,
+                    "fake_ollama": None if fake is None else {
+                        "latency": args.latency, "tokens_per_sec": args.tokens_per_sec,
+                        "tokens": args.tokens, "parallel": args.parallel, "fail_rate": args.fail_rate},
+                    "components": ready,
+                    **report,
+                    "llm_client": _get_json(f"{base}/debug/llm"),
+                    "coalescing": (_get_json(f"{base}/debug/cache") or {}).get("coalescing"),
+                }
+            finally:
+                if proc is not None:
+                    proc.terminate()
+                    try:
+                        proc.wait(10)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+            line = json.dumps(report, ensure_ascii=False)
+            print(line, flush=True)
+            if args.out:
+                with open(args.out, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+    finally:
+        if fake is not None:
+            fake.terminate()
+        print(json.dumps({"logs": tmp}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/bench/stress_booking.py
+# Çekişme altında rezervasyon: çok thread aynı küçük slot kümesine aynı anda
+# /book (tek aşama), hold -> confirm (iki aşama) ve toplu (book_many) ile saldırır.
+# Sonunda veritabanı denetlenir: çift rezervasyon, sahipsiz booked slot ya da slotsuz randevu
+# olmamalı. Başarı oranları yöntem bazında raporlanır.
+#
+#   cd backend && python bench/stress_booking.py --threads 32 --seconds 5
+import os, sys, json, time, random, argparse, tempfile, threading
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import db_sqlite  # noqa: E402
+
+
+def audit() -> dict:
+    with db_sqlite._db() as con:
+        dup = con.execute("""SELECT COUNT(*) FROM (SELECT doctor, slot FROM appointments
+                             GROUP BY doctor, slot HAVING COUNT(*) > 1)""").fetchone()[0]
+        booked_no_appt = con.execute("""SELECT COUNT(*) FROM slots s WHERE s.status = 'booked'
+                                        AND NOT EXISTS (SELECT 1 FROM appointments a
+                                                        WHERE a.id = s.appointment_id)""").fetchone()[0]
+        appt_no_slot = con.execute("""SELECT COUNT(*) FROM appointments a WHERE NOT EXISTS
+                                      (SELECT 1 FROM slots s WHERE s.appointment_id = a.id
+                                       AND s.status = 'booked')""").fetchone()[0]
+        appts = con.execute("SELECT COUNT(*) FROM appointments").fetchone()[0]
+        booked = con.execute("SELECT COUNT(*) FROM slots WHERE status = 'booked'").fetchone()[0]
+    return {"appointments": appts, "booked_slots": booked, "double_bookings": dup,
+            "booked_without_appointment": booked_no_appt, "appointment_without_slot": appt_no_slot}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--hot-slots", type=int, default=20, help="herkesin hedeflediği slot sayısı")
+    args = ap.parse_args()
+
+    db_sqlite.DB_PATH = os.path.join(tempfile.mkdtemp(), "stress.db")
+    db_sqlite.init_db()
+    db_sqlite.generate_slots(horizon_days=30)
+
+    # herkesin aynı anda gördüğü "popüler" slotlar
+    hot = []
+    for dept in db_sqlite.DEPTS:
+        for row in db_sqlite.availability(dept, limit=50):
+            hot.extend((dept, row["doctor"], s) for s in row["slots"])
+    random.Random(0).shuffle(hot)
+    hot = hot[:args.hot_slots * 10]
+
+    stats = {m: Counter() for m in ("direct", "hold", "batch")}
+    lock = threading.Lock()
+    stop = time.perf_counter() + args.seconds
+    start_gate = threading.Barrier(args.threads)
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        local = {m: Counter() for m in stats}
+        start_gate.wait()
+        while time.perf_counter() < stop:
+            method = rng.choice(("direct", "hold", "batch"))
+            if method == "direct":
+                dept, doc, slot = rng.choice(hot[:args.hot_slots])
+                ok, _, _ = db_sqlite.book_appointment(dept, doc, slot, f"p{seed}")
+            elif method == "hold":
+                dept, doc, slot = rng.choice(hot[:args.hot_slots])
+                ok, token, _ = db_sqlite.hold_slot(dept, doc, slot, ttl=rng.choice((1, 30)))
+                if ok:
+                    local[method]["held"] += 1
+                    if rng.random() < 0.2:
+                        time.sleep(1.1)   # bazıları hold süresini kaçırır
+                    if rng.random() < 0.1:
+                        db_sqlite.release_hold(token)
+                        local[method]["released"] += 1
+                        continue
+                    ok, _, _ = db_sqlite.confirm_hold(token, f"p{seed}")
+            else:
+                picks = rng.sample(hot, 3)
+                ok, _ = db_sqlite.book_many([{"dept_code": d, "doctor": doc, "slot": s} for d, doc, s in picks],
+                                            atomic=rng.random() < 0.5)
+            local[method]["ok" if ok else "fail"] += 1
+        with lock:
+            for m in stats:
+                stats[m].update(local[m])
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    swept = db_sqlite.sweep_expired_holds()
+
+    report = {
+        m: {**c, "success_rate": round(c["ok"] / (c["ok"] + c["fail"]), 3) if (c["ok"] + c["fail"]) else 0.0}
+        for m, c in stats.items()
+    }
+    result = {"threads": args.threads, "seconds": args.seconds, "methods": report,
+              "expired_holds_swept": swept, "audit": audit()}
+    print(json.dumps(result, ensure_ascii=False, indent=1))
+    a = result["audit"]
+    if a["double_bookings"] or a["booked_without_appointment"] or a["appointment_without_slot"]:
+        sys.exit("TUTARSIZLIK: çift rezervasyon / sahipsiz kayıt bulundu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# backend/classify_corpus.py
+# JSONL korpusu ml_intent kurallarıyla yeniden etiketler (akış halinde, sabit bellek).
+#
+#   python classify_corpus.py logs/chat.log labels.jsonl --field req
+#   python classify_corpus.py messages.jsonl labels.jsonl --field message --workers 4
+#
+# Her çıktı satırı: {"line", "id"?, "intent", "urgent", "lab", "department_code"}
+# Throughput istatistikleri stderr'e yazılır.
+
+import os, sys, json, time, argparse
+from collections import Counter, deque
+from itertools import islice
+from multiprocessing import Pool
+
+from ml_intent import classify
+
+# Bu boyutun altındaki dosyalarda süreç havuzu açmak kazançtan çok maliyet getirir
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+def _read_lines(path: str):
+    """(satır_no, ham satır) çiftlerini tembel üretir; JSON ayrıştırma işçilerde yapılır."""
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                yield n, line
+
+
+def _label_chunk(chunk: list, field: str, id_field: str | None) -> tuple[list[str], Counter]:
+    out = []
+    intents: Counter = Counter()
+    for n, line in chunk:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(rec, dict) or not isinstance(rec.get(field), str):
+            continue
+        rid = rec.get(id_field) if id_field else None
+        c = classify(rec[field])
+        intents[c["intent"]] += 1
+        row = {"line": n}
+        if rid is not None:
+            row["id"] = rid
+        row.update({
+            "intent": c["intent"],
+            "urgent": c["urgent"],
+            "lab": c["lab"],
+            "department_code": c["department_code"],
+        })
+        out.append(json.dumps(row, ensure_ascii=False))
+    return out, intents
+
+
+def _chunks(it, size: int):
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(in_path: str, out_path: str, *, field: str, id_field: str | None,
+        workers: int, chunk_size: int) -> dict:
+    lines = _read_lines(in_path)
+    intents: Counter = Counter()
+    total = 0
+    t0 = time.perf_counter()
+
+    use_pool = workers > 1 and os.path.getsize(in_path) >= PARALLEL_MIN_BYTES
+
+    with open(out_path, "w", encoding="utf-8") as out:
+        def write(result: tuple[list[str], Counter]):
+            nonlocal total
+            lines, counts = result
+            out.writelines(line + "\n" for line in lines)
+            intents.update(counts)
+            total += len(lines)
+
+        if not use_pool:
+            for chunk in _chunks(lines, chunk_size):
+                write(_label_chunk(chunk, field, id_field))
+        else:
+            # Pool.imap girdiyi hızla tüketir; burada en fazla 2*workers parça uçuşta tutulur
+            # (sıra korunur, bellek sabit kalır).
+            with Pool(workers) as pool:
+                pending: deque = deque()
+                for chunk in _chunks(lines, chunk_size):
+                    pending.append(pool.apply_async(_label_chunk, (chunk, field, id_field)))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().get())
+                while pending:
+                    write(pending.popleft().get())
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "messages": total,
+        "seconds": round(elapsed, 3),
+        "msg_per_s": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        "workers": workers if use_pool else 1,
+        "intents": dict(intents),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSONL korpusu ml_intent ile etiketler.")
+    ap.add_argument("input")
+    ap.add_argument("output")
+    ap.add_argument("--field", default="message", help="metin alanı (örn. message, req, body)")
+    ap.add_argument("--id-field", default=None, help="çıktıya kopyalanacak kimlik alanı")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk-size", type=int, default=2000)
+    args = ap.parse_args()
+
+    stats = run(args.input, args.output, field=args.field, id_field=args.id_field,
+                workers=args.workers, chunk_size=args.chunk_size)
+    print(json.dumps(stats, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,149 @@
 # backend/db_sqlite.py
-import os, sqlite3, uuid
-from datetime import datetime, timedelta
+import os, json, time, sqlite3, uuid, queue, threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Tuple
 from ml_intent import DEPTS  # {"ortopedi":"Ortopedi / FTR", ...}
 
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
-DB_PATH = os.path.join(DATA_DIR, "app.db")
+DB_PATH = os.getenv("DB_PATH", os.path.join(DATA_DIR, "app.db"))
 
-def _conn():
-    con = sqlite3.connect(DB_PATH)
+# Bağlantı havuzu: Flask geliştirme sunucusu her istek için yeni thread açar, bu yüzden
+# thread-local yerine paylaşılan havuz (bağlantı aynı anda tek thread'de kullanılır).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_STMT_CACHE = int(os.getenv("DB_STMT_CACHE", "256"))   # bağlantı başı hazır ifade önbelleği
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Slot takvimi: doktor başı çalışma saati şablonlarından (schedules) üretilen kalıcı slots tablosu
+SLOT_HORIZON_DAYS = int(os.getenv("SLOT_HORIZON_DAYS", "3"))          # bugünden kaç gün ileri
+SLOT_SCHEDULER_INTERVAL = float(os.getenv("SLOT_SCHEDULER_INTERVAL", "3600"))
+# Şablonu olmayan doktorlara verilen varsayılan: her gün 09:00-17:00, 60 dk (eski 3 gün x 09-16)
+DEFAULT_START_HOUR, DEFAULT_END_HOUR, DEFAULT_SLOT_MINUTES = 9, 17, 60
+SLOT_FMT = "%Y-%m-%d %H:%M"
+# İki aşamalı rezervasyon: slot kısa süre tutulur (hold), sonra onaylanır
+HOLD_TTL_SECONDS = int(os.getenv("HOLD_TTL_SECONDS", "120"))
+HOLD_SWEEP_INTERVAL = float(os.getenv("HOLD_SWEEP_INTERVAL", "30"))
+BOOK_BATCH_MAX = int(os.getenv("BOOK_BATCH_MAX", "200"))
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",          # okuyucular yazma commit'ini beklemez
+    "PRAGMA synchronous=NORMAL",        # WAL'da güvenli; her commit'te fsync yok
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",         # ~16MB sayfa önbelleği
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _connect() -> sqlite3.Connection:
+    # isolation_level=None: okumalar açık transaction tutmaz (WAL snapshot'ı sabitlenmez);
+    # yazmalar _write() ile BEGIN IMMEDIATE içinde yapılır.
+    con = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False,
+                          cached_statements=DB_STMT_CACHE)
     con.row_factory = sqlite3.Row
+    for p in _PRAGMAS:
+        con.execute(p)
     return con
 
+
+class _Pool:
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._path = DB_PATH
+        self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        self._reset_if_stale()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("db connection pool exhausted")
+
+    def release(self, con: sqlite3.Connection):
+        if self._path != DB_PATH or self._pid != os.getpid():
+            con.close()   # havuz bu arada sıfırlandı
+            return
+        if con.in_transaction:
+            con.rollback()
+        self._idle.put(con)
+
+    def _reset_if_stale(self):
+        # DB_PATH değişti (bench/test) ya da süreç fork edildi: eski bağlantıları bırak
+        if self._path != DB_PATH or self._pid != os.getpid():
+            self.close_all()
+            self._path, self._pid = DB_PATH, os.getpid()
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+
+_pool = _Pool(DB_POOL_SIZE)
+
+
+@contextmanager
+def _db():
+    """Havuzdan bağlantı ödünç al."""
+    con = _pool.acquire()
+    try:
+        yield con
+    finally:
+        _pool.release(con)
+
+
+@contextmanager
+def _write(con: sqlite3.Connection):
+    """Yazma transaction'ı: yazma kilidi baştan alınır (WAL'da okuma->yazma yükseltme çakışması yok)."""
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        yield con
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+
+
+def close_db():
+    """Havuzdaki boşta bağlantıları kapatır (kapanış/test)."""
+    _pool.close_all()
+
+def ping_db() -> bool:
+    try:
+        with _db() as con:
+            con.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
 def init_db():
-    con = _conn(); cur = con.cursor()
+    with _db() as con, _write(con):
+        _init_schema(con.cursor())
+    generate_slots()
+
+def _init_schema(cur):
     cur.execute("""
       CREATE TABLE IF NOT EXISTS departments(
         code TEXT PRIMARY KEY,
@@ -64,62 +192,486 @@ def init_db():
             for n in names:
                 rows.append((code, n))
         cur.executemany("INSERT INTO doctors(dept_code, name) VALUES(?,?)", rows)
-    con.commit(); con.close()
-
-def _generate_slots(start_hour=9, end_hour=16) -> List[str]:
-    """Bugünden 3 gün, her saat başı slot."""
-    out = []
-    now = datetime.now().replace(minute=0, second=0, microsecond=0)
-    for day in range(0, 3):
-        base = (now + timedelta(days=day)).replace(hour=start_hour)
-        for h in range(start_hour, end_hour + 1):
-            ts = base.replace(hour=h)
-            if ts >= now:
-                out.append(ts.strftime("%Y-%m-%d %H:%M"))
+
+    # doktor başı haftalık çalışma saati şablonu (aynı güne birden çok vardiya olabilir)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS schedules(
+        doctor_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,        -- 0=Pazartesi ... 6=Pazar
+        start_hour INTEGER NOT NULL,
+        end_hour INTEGER NOT NULL,       -- hariç (09-17 => son slot 16:00)
+        slot_minutes INTEGER NOT NULL DEFAULT 60,
+        PRIMARY KEY(doctor_id, weekday, start_hour),
+        FOREIGN KEY(doctor_id) REFERENCES doctors(id)
+      )
+    """)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS slots(
+        id INTEGER PRIMARY KEY,
+        dept_code TEXT NOT NULL,
+        doctor TEXT NOT NULL,
+        start TEXT NOT NULL,             -- "YYYY-MM-DD HH:MM"
+        status TEXT NOT NULL DEFAULT 'free',   -- free | held | booked
+        appointment_id TEXT,
+        hold_token TEXT,
+        held_until TEXT,                 -- ISO zaman; geçmişteyse hold düşmüş sayılır
+        updated_at TEXT,
+        UNIQUE(doctor, start)
+      )
+    """)
+    # hold kolonları sonradan eklendi: eski tabloyu yükselt
+    cols = {r["name"] for r in cur.execute("PRAGMA table_info(slots)")}
+    for col in ("hold_token", "held_until"):
+        if col not in cols:
+            cur.execute(f"ALTER TABLE slots ADD COLUMN {col} TEXT")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_slots_hold_token ON slots(hold_token) WHERE hold_token IS NOT NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_slots_held_until ON slots(held_until) WHERE status = 'held'")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_slots_dept_doctor_start ON slots(dept_code, doctor, start)")
+    # doktor başı üretimin nereye kadar yapıldığı (artımlı üretim)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS slot_generation(
+        doctor_id INTEGER PRIMARY KEY,
+        generated_until TEXT NOT NULL    -- "YYYY-MM-DD" (dahil)
+      )
+    """)
+    # şablonu olmayan doktorlara varsayılan şablon
+    cur.execute("""
+      INSERT INTO schedules(doctor_id, weekday, start_hour, end_hour, slot_minutes)
+      SELECT d.id, w.value, ?, ?, ?
+      FROM doctors d CROSS JOIN json_each('[0,1,2,3,4,5,6]') w
+      WHERE NOT EXISTS (SELECT 1 FROM schedules s WHERE s.doctor_id = d.id)
+    """, (DEFAULT_START_HOUR, DEFAULT_END_HOUR, DEFAULT_SLOT_MINUTES))
+
+def _current_hour() -> str:
+    return datetime.now().replace(minute=0, second=0, microsecond=0).strftime(SLOT_FMT)
+
+def generate_slots(horizon_days: int | None = None, today: date | None = None) -> int:
+    """
+    Zamanlayıcı işi: her doktor için generated_until'dan sonraki günlerin slotlarını
+    şablondan üretir (INSERT OR IGNORE) ve geçmişte kalmış boş slotları siler.
+    Mevcut randevusu olan slotlar 'booked' işaretlenir. return: eklenen slot sayısı
+    """
+    horizon = SLOT_HORIZON_DAYS if horizon_days is None else horizon_days
+    today = today or date.today()
+    last_day = today + timedelta(days=horizon - 1)
+    with _db() as con:
+        templates: Dict[int, Dict[int, List[Tuple[int, int, int]]]] = {}
+        for r in con.execute("SELECT doctor_id, weekday, start_hour, end_hour, slot_minutes FROM schedules"):
+            templates.setdefault(r["doctor_id"], {}).setdefault(r["weekday"], []).append(
+                (r["start_hour"], r["end_hour"], r["slot_minutes"]))
+        doctors = con.execute("""
+            SELECT d.id, d.dept_code, d.name, g.generated_until
+            FROM doctors d LEFT JOIN slot_generation g ON g.doctor_id = d.id
+        """).fetchall()
+
+        rows, marks = [], []
+        for d in doctors:
+            first = today
+            if d["generated_until"]:
+                first = max(today, date.fromisoformat(d["generated_until"]) + timedelta(days=1))
+            day = first
+            while day <= last_day:
+                for start_h, end_h, minutes in templates.get(d["id"], {}).get(day.weekday(), ()):
+                    t = datetime.combine(day, datetime.min.time()).replace(hour=start_h)
+                    end = t.replace(hour=0) + timedelta(hours=end_h)
+                    while t < end:
+                        rows.append((d["dept_code"], d["name"], t.strftime(SLOT_FMT)))
+                        t += timedelta(minutes=minutes)
+                day += timedelta(days=1)
+            if first <= last_day:
+                marks.append((d["id"], last_day.isoformat()))
+
+        with _write(con):
+            max_id = con.execute("SELECT COALESCE(MAX(id), 0) FROM slots").fetchone()[0]
+            before = con.total_changes
+            con.executemany("INSERT OR IGNORE INTO slots(dept_code, doctor, start) VALUES(?,?,?)", rows)
+            added = con.total_changes - before
+            con.executemany("""
+                INSERT INTO slot_generation(doctor_id, generated_until) VALUES(?,?)
+                ON CONFLICT(doctor_id) DO UPDATE SET generated_until = excluded.generated_until
+            """, marks)
+            # yeni üretilen slotlardan randevusu zaten olanlar (slots tablosu öncesi kayıtlar)
+            con.execute("""
+                UPDATE slots SET status = 'booked', appointment_id = a.id
+                FROM appointments a
+                WHERE slots.id > ? AND a.doctor = slots.doctor AND a.slot = slots.start
+            """, (max_id,))
+            con.execute("DELETE FROM slots WHERE status = 'free' AND start < ?", (_current_hour(),))
+    if added:
+        _avail_cache.clear()
+    return added
+
+
+class SlotScheduler(threading.Thread):
+    """
+    generate_slots()'u belirli aralıkla çalıştırır (gün döndükçe ufuk ilerler);
+    süresi dolan hold'ları daha sık süpürür. İki aralık bağımsızdır (<= 0 = kapalı):
+    slot üretimi kapalıyken de hold'lar süpürülür.
+    """
+
+    def __init__(self, interval: float = SLOT_SCHEDULER_INTERVAL, sweep_interval: float = HOLD_SWEEP_INTERVAL):
+        super().__init__(daemon=True, name="slot-scheduler")
+        self.interval = interval
+        ticks = [t for t in (interval, sweep_interval) if t > 0]
+        self.sweep_interval = min(ticks) if ticks else 0.0
+        self._stop_event = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sweep_interval > 0
+
+    def run(self):
+        if not self.enabled:
+            return
+        next_gen = time.monotonic() + self.interval
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                sweep_expired_holds()
+                if self.interval > 0 and time.monotonic() >= next_gen:
+                    next_gen = time.monotonic() + self.interval
+                    generate_slots()
+            except sqlite3.Error:
+                # bir sonraki turda yeniden denenir
+                pass
+
+    def stop(self):
+        self._stop_event.set()
+
+_SQL_DOCTORS = "SELECT name FROM doctors WHERE dept_code=? ORDER BY name"
+_SQL_INSERT_APPT = """
+   INSERT INTO appointments(id, dept_code, doctor, slot, patient, created_at)
+   VALUES(?,?,?,?,?,?)
+"""
+
+def _list_doctors(con, dept_code: str) -> List[str]:
+    return [r["name"] for r in con.execute(_SQL_DOCTORS, (dept_code,))]
+
+AVAILABILITY_SLOTS_PER_DOCTOR = 5
+
+# Tek sorgu (slots tablosu): her doktor için (dept, doctor, start) indeksinde tarih aralığına
+# atlanır, ilk boş slotlardan bir sayfa okunur (LIMIT/OFFSET; tüm takvim taranmaz).
+# Slotu kalmayan doktor da (LEFT JOIN ile) boş listeyle döner. Hold'u süresi dolmuş slot, süpürücü
+# henüz boşa çıkarmadıysa da boş sayılır (_claim/hold_slot ile aynı kural).
+_SQL_AVAILABILITY = """
+SELECT d.dept_code, d.name AS doctor, s.start AS slot
+FROM doctors d
+LEFT JOIN slots s ON s.id IN (
+  SELECT x.id FROM slots x
+  WHERE x.dept_code = d.dept_code AND x.doctor = d.name
+    AND x.start >= ? AND x.start < ?
+    AND (x.status = 'free' OR (x.status = 'held' AND x.held_until < ?))
+  ORDER BY x.start LIMIT ? OFFSET ?
+)
+WHERE d.dept_code IN (SELECT value FROM json_each(?))
+ORDER BY d.dept_code, d.name, s.start
+"""
+
+class _AvailabilityCache:
+    """
+    Departman başı müsaitlik önbelleği. Kayıt iki durumda geçersizleşir:
+    - o departmana randevu yazıldığında (invalidate)
+    - saat dilimi değiştiğinde (slot listesi saat başında kayar)
+    Sürüm (genel nesil, departman sayacı): sorgu sürerken gelen invalidate ya da clear,
+    eski sonucun yazılmasını engeller; clear o an önbellekte olmayan departmanları da kapsar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[str, Tuple[str, List[Dict]]] = {}
+        self._version: Dict[str, int] = {}
+        self._generation = 0   # clear() ile artar
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, dept_code: str, hour_key: str):
+        with self._lock:
+            item = self._items.get(dept_code)
+            if item is not None and item[0] == hour_key:
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+            return None
+
+    def version(self, dept_code: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._generation, self._version.get(dept_code, 0)
+
+    def put(self, dept_code: str, hour_key: str, rows: List[Dict], version: Tuple[int, int]):
+        with self._lock:
+            if (self._generation, self._version.get(dept_code, 0)) == version:
+                self._items[dept_code] = (hour_key, rows)
+
+    def invalidate(self, dept_code: str):
+        with self._lock:
+            self._version[dept_code] = self._version.get(dept_code, 0) + 1
+            self._items.pop(dept_code, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_avail_cache = _AvailabilityCache()
+
+
+def _hour_key() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H")
+
+def _query_availability(dept_codes: List[str], *, start: str, end: str,
+                        limit: int, offset: int) -> Dict[str, List[Dict]]:
+    codes = json.dumps(dept_codes)
+    out: Dict[str, List[Dict]] = {c: [] for c in dept_codes}
+    with _db() as con:
+        rows = con.execute(_SQL_AVAILABILITY, (start, end, _now_iso(), limit, offset, codes))
+        for r in rows:
+            docs = out[r["dept_code"]]
+            if not docs or docs[-1]["doctor"] != r["doctor"]:
+                docs.append({"doctor": r["doctor"], "slots": []})
+            if r["slot"] is not None:
+                docs[-1]["slots"].append(r["slot"])
+    return out
+
+def _copy_rows(rows: List[Dict]) -> List[Dict]:
+    return [{"doctor": r["doctor"], "slots": list(r["slots"])} for r in rows]
+
+def availability_many(dept_codes: List[str], *, start: str | None = None, end: str | None = None,
+                      limit: int = AVAILABILITY_SLOTS_PER_DOCTOR, offset: int = 0) -> Dict[str, List[Dict]]:
+    """
+    {dept_code: [{doctor, slots:[...]}, ...]}
+    start/end: "YYYY-MM-DD HH:MM" aralığı (end hariç); limit/offset: doktor başı sayfalama.
+    Varsayılan görünüm (şu andan itibaren ilk 5) önbellekten; önbellekte olmayanlar tek sorguda.
+    """
+    now = _current_hour()
+    q_start = max(start, now) if start else now
+    q_end = end or "9999"
+    if start is not None or end is not None or limit != AVAILABILITY_SLOTS_PER_DOCTOR or offset:
+        return _query_availability(list(dict.fromkeys(dept_codes)), start=q_start, end=q_end,
+                                   limit=limit, offset=offset)
+
+    hour = _hour_key()
+    out: Dict[str, List[Dict]] = {}
+    missing = []
+    for code in dict.fromkeys(dept_codes):
+        rows = _avail_cache.get(code, hour)
+        if rows is not None:
+            out[code] = _copy_rows(rows)
+        else:
+            missing.append(code)
+    if missing:
+        versions = {c: _avail_cache.version(c) for c in missing}
+        fresh = _query_availability(missing, start=q_start, end=q_end, limit=limit, offset=offset)
+        for code, rows in fresh.items():
+            _avail_cache.put(code, hour, rows, versions[code])
+            out[code] = _copy_rows(rows)
     return out
 
-def list_doctors(dept_code: str) -> List[str]:
-    con = _conn(); cur = con.cursor()
-    cur.execute("SELECT name FROM doctors WHERE dept_code=? ORDER BY name", (dept_code,))
-    names = [r["name"] for r in cur.fetchall()]
-    con.close()
-    return names
-
-def booked_set_for_dept(dept_code: str) -> set:
-    con = _conn(); cur = con.cursor()
-    cur.execute("""SELECT doctor, slot FROM appointments WHERE dept_code=?""", (dept_code,))
-    s = {(r["doctor"], r["slot"]) for r in cur.fetchall()}
-    con.close()
-    return s
-
-def availability(dept_code: str) -> List[Dict]:
-    """[{doctor, slots:[...]}, ...] döner; DB’deki dolular filtrelenir."""
-    docs = list_doctors(dept_code)
-    all_slots = _generate_slots()
-    booked = booked_set_for_dept(dept_code)
-    rows = []
-    for d in docs:
-        free = [s for s in all_slots if (d, s) not in booked]
-        rows.append({"doctor": d, "slots": free[:5]})
-    return rows
+def availability(dept_code: str, *, start: str | None = None, end: str | None = None,
+                 limit: int = AVAILABILITY_SLOTS_PER_DOCTOR, offset: int = 0) -> List[Dict]:
+    """[{doctor, slots:[...]}, ...] döner; yalnız boş slotlar."""
+    return availability_many([dept_code], start=start, end=end, limit=limit, offset=offset)[dept_code]
+
+def availability_cache_stats() -> dict:
+    return _avail_cache.stats()
+
+class _SlotUnavailable(Exception):
+    pass
+
+def _now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+# boş ya da hold'u süresi dolmuş slot alınabilir
+_CLAIMABLE = "(status = 'free' OR (status = 'held' AND held_until < ?))"
+
+_SQL_CLAIM_SLOT = f"""
+   UPDATE slots SET status = 'booked', appointment_id = ?, hold_token = NULL, held_until = NULL, updated_at = ?
+   WHERE dept_code = ? AND doctor = ? AND start = ? AND start >= ? AND {_CLAIMABLE}
+"""
+_SQL_HOLD_SLOT = f"""
+   UPDATE slots SET status = 'held', hold_token = ?, held_until = ?, updated_at = ?
+   WHERE dept_code = ? AND doctor = ? AND start = ? AND start >= ? AND {_CLAIMABLE}
+"""
+_SQL_CONFIRM_HOLD = """
+   UPDATE slots SET status = 'booked', appointment_id = ?, hold_token = NULL, held_until = NULL, updated_at = ?
+   WHERE hold_token = ? AND status = 'held' AND held_until >= ?
+   RETURNING dept_code, doctor, start
+"""
+
+def _booking_error(con, dept_code: str, doctor: str, slot: str) -> str:
+    """Koşullu güncelleme 0 satır etkilediyse nedenini bul (yalnız hata yolunda)."""
+    if doctor not in set(_list_doctors(con, dept_code)):
+        return "Doktor departmanda bulunamadı."
+    row = con.execute("SELECT status FROM slots WHERE dept_code=? AND doctor=? AND start=? AND start >= ?",
+                      (dept_code, doctor, slot, _current_hour())).fetchone()
+    if row is None:
+        return "Geçersiz saat."
+    return "Slot artık uygun değil."
+
+def _claim(con, dept_code: str, doctor: str, slot: str, patient: str, now: str) -> Dict:
+    """Açık bir yazma transaction'ı içinde: slotu al + randevu kaydı. Alınamazsa _SlotUnavailable."""
+    appt_id = str(uuid.uuid4())[:8]
+    cur = con.execute(_SQL_CLAIM_SLOT, (appt_id, now, dept_code, doctor, slot, _current_hour(), now))
+    if cur.rowcount != 1:
+        raise _SlotUnavailable()
+    con.execute(_SQL_INSERT_APPT, (appt_id, dept_code, doctor, slot, patient or "", now))
+    return {"id": appt_id, "doctor": doctor, "slot": slot}
 
 def book_appointment(dept_code: str, doctor: str, slot: str, patient: str = "") -> Tuple[bool, str, Dict]:
     """Başarılıysa (True, appt_id, {}), değilse (False, hata, {})."""
-    # doğrulamalar
-    docs = set(list_doctors(dept_code))
-    if doctor not in docs:
-        return (False, "Doktor departmanda bulunamadı.", {})
-    if slot not in _generate_slots():
-        return (False, "Geçersiz saat.", {})
+    with _db() as con:
+        try:
+            with _write(con):
+                # doğrulama + rezervasyon tek indeksli koşullu güncelleme
+                appt = _claim(con, dept_code, doctor, slot, patient, _now_iso())
+        except _SlotUnavailable:
+            return (False, _booking_error(con, dept_code, doctor, slot), {})
+        except sqlite3.IntegrityError:
+            return (False, "Slot artık uygun değil.", {})
+    _avail_cache.invalidate(dept_code)
+    return (True, appt["id"], appt)
 
+# ---------------------------
+# İki aşamalı rezervasyon (hold -> confirm)
+# ---------------------------
+def hold_slot(dept_code: str, doctor: str, slot: str, ttl: int = HOLD_TTL_SECONDS) -> Tuple[bool, str, Dict]:
+    """
+    Slotu ttl saniye tutar (tek koşullu güncelleme; yarışı yalnız biri kazanır).
+    Başarılıysa (True, hold_token, {hold_token, doctor, slot, expires_at}), değilse (False, hata, {}).
+    """
+    token = uuid.uuid4().hex
+    now = datetime.now()
+    expires = (now + timedelta(seconds=ttl)).isoformat(timespec="seconds")
+    now_s = now.isoformat(timespec="seconds")
+    with _db() as con:
+        with _write(con):
+            cur = con.execute(_SQL_HOLD_SLOT, (token, expires, now_s, dept_code, doctor, slot,
+                                               _current_hour(), now_s))
+        if cur.rowcount != 1:
+            return (False, _booking_error(con, dept_code, doctor, slot), {})
+    # tutulan slot müsaitlik listesinden düşer
+    _avail_cache.invalidate(dept_code)
+    return (True, token, {"hold_token": token, "doctor": doctor, "slot": slot, "expires_at": expires})
+
+def confirm_hold(hold_token: str, patient: str = "") -> Tuple[bool, str, Dict]:
+    """Hold'u randevuya çevirir; süresi dolmuş/bilinmeyen token'da (False, hata, {})."""
     appt_id = str(uuid.uuid4())[:8]
-    try:
-        con = _conn(); cur = con.cursor()
-        cur.execute("""
-           INSERT INTO appointments(id, dept_code, doctor, slot, patient, created_at)
-           VALUES(?,?,?,?,?,?)
-        """, (appt_id, dept_code, doctor, slot, patient or "", datetime.now().isoformat(timespec="seconds")))
-        con.commit(); con.close()
-        return (True, appt_id, {"id": appt_id, "doctor": doctor, "slot": slot})
-    except sqlite3.IntegrityError:
-        return (False, "Slot artık uygun değil.", {})
\ No newline at end of file
+    now = _now_iso()
+    with _db() as con:
+        try:
+            with _write(con):
+                row = con.execute(_SQL_CONFIRM_HOLD, (appt_id, now, hold_token, now)).fetchone()
+                if row is None:
+                    raise _SlotUnavailable()
+                con.execute(_SQL_INSERT_APPT, (appt_id, row["dept_code"], row["doctor"], row["start"],
+                                               patient or "", now))
+        except _SlotUnavailable:
+            return (False, "Rezervasyon süresi doldu ya da bulunamadı.", {})
+        except sqlite3.IntegrityError:
+            return (False, "Slot artık uygun değil.", {})
+    _avail_cache.invalidate(row["dept_code"])
+    return (True, appt_id, {"id": appt_id, "doctor": row["doctor"], "slot": row["start"],
+                            "department_code": row["dept_code"]})
+
+def release_hold(hold_token: str) -> bool:
+    with _db() as con:
+        with _write(con):
+            row = con.execute("""
+                UPDATE slots SET status = 'free', hold_token = NULL, held_until = NULL, updated_at = ?
+                WHERE hold_token = ? AND status = 'held'
+                RETURNING dept_code
+            """, (_now_iso(), hold_token)).fetchone()
+    if row is None:
+        return False
+    _avail_cache.invalidate(row["dept_code"])
+    return True
+
+def sweep_expired_holds() -> int:
+    """Süresi dolan hold'ları boşa çıkarır (held_until kısmi indeksiyle). return: bırakılan slot sayısı"""
+    with _db() as con:
+        with _write(con):
+            rows = con.execute("""
+                UPDATE slots SET status = 'free', hold_token = NULL, held_until = NULL, updated_at = ?
+                WHERE status = 'held' AND held_until < ?
+                RETURNING dept_code
+            """, (_now_iso(), _now_iso())).fetchall()
+    for code in {r["dept_code"] for r in rows}:
+        _avail_cache.invalidate(code)
+    return len(rows)
+
+# ---------------------------
+# Toplu rezervasyon (tek transaction)
+# ---------------------------
+_BOOK_ITEM_FIELDS = ("dept_code", "doctor", "slot", "patient")
+
+def book_item_error(item) -> str | None:
+    """Kalem alan tipleri; eksik alan kalem hatasıdır, yanlış tip tüm isteği geçersiz kılar."""
+    if not isinstance(item, dict):
+        return "randevu nesnesi bekleniyor."
+    for name in _BOOK_ITEM_FIELDS:
+        value = item.get(name)
+        if value is not None and not isinstance(value, str):
+            return f"{name} metin olmalı."
+    return None
+
+def book_many(items: List[Dict], *, atomic: bool = True) -> Tuple[bool, List[Dict]]:
+    """
+    items: [{dept_code, doctor, slot, patient?}, ...] — hepsi tek BEGIN IMMEDIATE içinde.
+    atomic=True: biri bile alınamazsa hiçbiri yazılmaz.
+    atomic=False: her kalem kendi SAVEPOINT'inde; alınabilenler yazılır.
+    return: (hepsi başarılı mı, kalem sırasıyla [{ok, appointment | error}, ...])
+    Alan tipi yanlış kalem varsa transaction açılmadan ValueError.
+    """
+    for i, it in enumerate(items):
+        err = book_item_error(it)
+        if err:
+            raise ValueError(f"items[{i}]: {err}")
+    results: List[Dict] = []
+    now = _now_iso()
+    touched = set()
+    with _db() as con:
+        try:
+            with _write(con):
+                for it in items:
+                    dept, doctor, slot = it.get("dept_code"), it.get("doctor"), it.get("slot")
+                    con.execute("SAVEPOINT item")
+                    try:
+                        if not (dept and doctor and slot):
+                            raise _SlotUnavailable()
+                        appt = _claim(con, dept, doctor, slot, it.get("patient") or "", now)
+                        con.execute("RELEASE item")
+                        results.append({"ok": True, "appointment": appt})
+                        touched.add(dept)
+                    except (_SlotUnavailable, sqlite3.IntegrityError):
+                        con.execute("ROLLBACK TO item")
+                        con.execute("RELEASE item")
+                        err = (_booking_error(con, dept, doctor, slot) if dept and doctor and slot
+                               else "Eksik bilgi (department/doctor/slot).")
+                        results.append({"ok": False, "error": err})
+                        if atomic:
+                            raise _SlotUnavailable()
+        except _SlotUnavailable:
+            # atomik mod: transaction geri alındı; başarılı görünen kalemler de yazılmadı
+            for r in results:
+                if r["ok"]:
+                    r.update({"ok": False, "error": "Toplu işlem geri alındı."})
+                    r.pop("appointment", None)
+            # denenmeyen kalemler (sonuç listesi istek sırasıyla hizalı kalsın)
+            results.extend({"ok": False, "error": "Toplu işlem geri alındı."}
+                           for _ in range(len(items) - len(results)))
+            return (False, results)
+    for code in touched:
+        _avail_cache.invalidate(code)
+    return (all(r["ok"] for r in results), results)
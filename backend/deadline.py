@@ -0,0 +1,50 @@
+# backend/deadline.py
+# İstek başına gecikme bütçesi (contextvar). İç içe bütçe yalnız küçülebilir:
+#
+#   with budget(60):                      # /chat isteği
+#       ...                               # retrieve, llm_en ... zamanı yer
+#       clamp(OLLAMA_READ_TIMEOUT)        # -> min(90, kalan süre); süre bittiyse DeadlineExceeded
+#
+# Bütçe yoksa (stream, toplu işler, bench) clamp zaman aşımını olduğu gibi döndürür.
+# Stage graph düğümleri ve asyncio görevleri bağlamı kopyaladığı için bütçeyi miras alır.
+import time, contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+
+class DeadlineExceeded(RuntimeError):
+    """İsteğin gecikme bütçesi bitti; yeni bir LLM çağrısı başlatılmadı."""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def budget(seconds: Optional[float]):
+    """Bu blok en fazla `seconds` sürebilir (dıştaki bütçeden uzun olamaz). None/<=0 = değişiklik yok."""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    until = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(until if outer is None else min(outer, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Kalan saniye; bütçe yoksa None."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def clamp(timeout: float, what: str = "call") -> float:
+    """Zaman aşımını kalan bütçeye kırpar; bütçe bittiyse DeadlineExceeded."""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(f"deadline exceeded before {what}")
+    return min(timeout, left)
@@ -0,0 +1,220 @@
+# backend/event_log.py
+# log_event için asenkron, tamponlu JSONL yazıcı:
+# - istek thread'i yalnızca kuyruğa koyar (dolu kuyrukta kayıt düşer, sayaç artar)
+# - arka plan thread'i kayıtları toplu yazar (batch boyutu / süre ile flush)
+# - boyut ya da yaş sınırında dosya döndürülür, eski dosyalar isteğe bağlı gzip'lenir
+
+import os, sys, json, gzip, glob, time, queue, shutil, atexit, threading
+from datetime import datetime
+
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))   # 0 = boyutla döndürme yok
+LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", "86400"))     # 0 = süreyle döndürme yok
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "10"))
+LOG_COMPRESS = os.getenv("LOG_COMPRESS", "1") == "1"
+LOG_STDOUT = os.getenv("LOG_STDOUT", "1") == "1"
+
+_STOP = object()
+
+
+class AsyncLogWriter:
+    """
+    submit(rec) -> kuyruğa koy (bloklamaz). Yazıcı thread'i:
+    - en fazla batch_size kayıt ya da flush_interval saniyede bir tek write + flush
+    - dosya max_bytes'ı ya da rotate_seconds yaşını aşınca chat.log -> chat.log.YYYYmmdd-HHMMSS[.gz]
+    - en yeni backup_count döndürülmüş dosya tutulur
+    """
+
+    def __init__(self, path: str, *, max_queue: int = LOG_QUEUE_MAX, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, max_bytes: int = LOG_MAX_BYTES,
+                 rotate_seconds: float = LOG_ROTATE_SECONDS, backup_count: int = LOG_BACKUPS,
+                 compress: bool = LOG_COMPRESS, echo: bool = LOG_STDOUT):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.echo = echo
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+        self._f = None
+        self._opened_at = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name="event-log-writer")
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- istek yolu ----
+    def submit(self, rec: dict) -> bool:
+        try:
+            self._q.put_nowait(rec)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    # ---- yazıcı thread'i ----
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._q.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._write(batch)
+                self._close_file()
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline) or item is None:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        lines = []
+        for rec in batch:
+            if self.echo:
+                payload = {k: v for k, v in rec.items() if k not in ("ts", "kind")}
+                print(f"[{rec.get('ts')}][{rec.get('kind')}] {payload}", flush=False)
+            lines.append(json.dumps(rec, ensure_ascii=False, default=str))
+        if self.echo:
+            try:
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+        try:
+            self._maybe_rotate()
+            f = self._file()
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            with self._lock:
+                self.written += len(lines)
+                self.flushes += 1
+        except OSError:
+            with self._lock:
+                self.write_errors += len(lines)
+            self._close_file()
+
+    def _file(self):
+        if self._f is None:
+            self._opened_at = self._first_record_time()
+            self._f = open(self.path, "a", encoding="utf-8")
+        return self._f
+
+    def _first_record_time(self) -> float:
+        """Dosyanın yaşı = ilk kaydın ts'i (ctime her yazmada değiştiği için kullanılamaz)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                first = f.readline()
+            return datetime.fromisoformat(json.loads(first)["ts"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def _close_file(self):
+        if self._f is not None:
+            try:
+                self._f.close()
+            except OSError:
+                pass
+            self._f = None
+
+    def _maybe_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if not size:
+            return
+        f = self._file()
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds
+        if not (too_big or too_old):
+            return
+        f.close()
+        self._f = None
+        target = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        n = 1
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            target = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{n}"
+            n += 1
+        os.replace(self.path, target)
+        if self.compress:
+            with open(target, "rb") as src, gzip.open(target + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(target)
+        with self._lock:
+            self.rotations += 1
+        self._prune()
+
+    def _prune(self):
+        olds = _rotated_files(self.path)
+        for p in olds[:-self.backup_count] if self.backup_count > 0 else olds:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    # ---- yönetim ----
+    def close(self, timeout: float = 5.0):
+        """Kuyruktakileri yazıp thread'i durdurur (atexit)."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "queued": self._q.qsize(),
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "rotations": self.rotations,
+                "write_errors": self.write_errors,
+            }
+
+
+def _rotated_files(path: str) -> list:
+    """Döndürülmüş dosyalar, eskiden yeniye (aynı saniyedeki -N ekleri ada göre sıralanamaz)."""
+    out = []
+    for p in glob.glob(path + ".*"):
+        try:
+            out.append((os.path.getmtime(p), p))
+        except OSError:
+            pass
+    return [p for _, p in sorted(out)]
+
+
+def iter_log_files(path: str):
+    """Döndürülmüş dosyalar (eskiden yeniye, .gz dahil) + güncel dosya; satır satır okumak için."""
+    for p in _rotated_files(path) + [path]:
+        if not os.path.exists(p):
+            continue
+        opener = gzip.open if p.endswith(".gz") else open
+        with opener(p, "rt", encoding="utf-8") as f:
+            yield from f
@@ -0,0 +1,248 @@
+# backend/intent_model.py
+# İsteğe bağlı öğrenilmiş intent/branş modeli:
+#   karakter n-gram hashing özellikleri + doğrusal (softmax) model, NumPy ile toplu çıkarım.
+# Acil (urgent) tespiti her zaman kurallardan gelir (kesin öncelik).
+#
+# Eğitim (etiketler mevcut kurallardan; metinler log + sentetik):
+#   python intent_model.py train --log logs/chat.log --synthetic 60000
+import os, sys, json, random, argparse
+from typing import Iterable, List, Dict, Any, Optional
+
+import numpy as np
+
+from ml_intent import DEPTS, normalize, classify, _RULES
+from event_log import iter_log_files
+
+BASE_DIR = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(BASE_DIR, "data", "intent_model.npz")
+
+N_FEATURES = 1 << 18      # hash uzayı; 0 numaralı özellik bias için ayrılmış
+NGRAMS = (2, 3, 4)
+_PRIME = np.uint64(1099511628211)
+
+LAB_CLASSES = ["other", "lab"]
+DEPT_CLASSES = [""] + list(DEPTS)   # "" = branş yok
+
+
+def featurize(texts: List[str], n_features: int = N_FEATURES, *, normalized: bool = False):
+    """
+    Tüm batch tek bayt dizisinde: metinler normalize edilip '\\0' ile birleştirilir,
+    her n için kayan polinom hash vektörel hesaplanır; ayırıcıyı kesen n-gram'lar atılır.
+    return: (idx, owner, counts) -> özellik indeksleri, ait oldukları mesaj, mesaj başı sayı
+    (idx/owner mesaj sırasına göre sıralıdır)
+    """
+    B = len(texts)
+    norm = texts if normalized else [normalize(t) for t in texts]
+    joined = "\0".join(" " + t + " " for t in norm).encode("utf-8")
+    a = np.frombuffer(joined, dtype=np.uint8)
+    sep = a == 0
+    msg_of_byte = np.cumsum(sep)
+    a64 = a.astype(np.uint64)
+
+    idx_parts = [np.zeros(B, dtype=np.int64)]          # bias
+    own_parts = [np.arange(B, dtype=np.int64)]
+    with np.errstate(over="ignore"):
+        for n in NGRAMS:
+            L = len(a) - n + 1
+            if L <= 0:
+                continue
+            h = np.full(L, np.uint64(n), dtype=np.uint64)
+            valid = np.ones(L, dtype=bool)
+            for k in range(n):
+                h = h * _PRIME + a64[k:k + L]
+                valid &= ~sep[k:k + L]
+            idx_parts.append((h[valid] % np.uint64(n_features - 1)).astype(np.int64) + 1)
+            own_parts.append(msg_of_byte[:L][valid].astype(np.int64))
+
+    idx = np.concatenate(idx_parts)
+    owner = np.concatenate(own_parts)
+    order = np.argsort(owner, kind="stable")
+    idx, owner = idx[order], owner[order]
+    counts = np.bincount(owner, minlength=B)
+    return idx, owner, counts
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+_N_LAB = len(LAB_CLASSES)
+
+
+class IntentModel:
+    """
+    İki doğrusal kafa (lab / branş) aynı hashing özelliklerini paylaşır; ağırlıklar tek
+    matriste tutulur: W[:, :2] lab kafası, W[:, 2:] branş kafası (tek gather ile ikisi birden).
+    """
+
+    def __init__(self, n_features: int = N_FEATURES):
+        self.n_features = n_features
+        self.W = np.zeros((n_features, _N_LAB + len(DEPT_CLASSES)), dtype=np.float32)
+
+    # ---- çıkarım ----
+    def _scores(self, norm_texts: List[str]) -> np.ndarray:
+        idx, owner, counts = featurize(norm_texts, self.n_features, normalized=True)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        scale = (1.0 / np.sqrt(counts)).astype(np.float32)[:, None]
+        return np.add.reduceat(self.W[idx], offsets, axis=0) * scale
+
+    def predict(self, texts: List[str], batch_size: int = 4096, *, normalized: bool = False):
+        """return: (lab_pred[int], dept_pred[int]) dizileri"""
+        norm = texts if normalized else [normalize(t) for t in texts]
+        lab_out, dept_out = [], []
+        for i in range(0, len(norm), batch_size):
+            s = self._scores(norm[i:i + batch_size])
+            lab_out.append(s[:, :_N_LAB].argmax(axis=1))
+            dept_out.append(s[:, _N_LAB:].argmax(axis=1))
+        if not lab_out:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(lab_out), np.concatenate(dept_out)
+
+    def classify_batch(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """ml_intent.classify() ile aynı sözlük biçimi; urgent kurallardan gelir."""
+        raws = [t or "" for t in texts]
+        norm = [normalize(t) for t in raws]
+        lab_pred, dept_pred = self.predict(norm, normalized=True)
+        out = []
+        match, scan = _RULES.match, _RULES.scan
+        for raw, t, lp, dp in zip(raws, norm, lab_pred.tolist(), dept_pred.tolist()):
+            urgent = match("urgent", scan(t))
+            lab = LAB_CLASSES[lp] == "lab"
+            code = DEPT_CLASSES[dp] or None
+            if urgent:
+                intent = "urgent"
+            elif lab:
+                intent = "lab"
+            elif code:
+                intent = "route"
+            else:
+                intent = "general"
+            out.append({
+                "raw": raw,
+                "normalized": t,
+                "intent": intent,
+                "urgent": urgent,
+                "lab": lab,
+                "department_code": code,
+                "department_name": DEPTS[code] if code else None,
+            })
+        return out
+
+    # ---- eğitim ----
+    def fit(self, texts: List[str], lab_y: np.ndarray, dept_y: np.ndarray, *,
+            epochs: int = 5, lr: float = 20.0, l2: float = 1e-6, batch_size: int = 256, seed: int = 0):
+        """Mini-batch SGD (softmax çapraz entropi); güncellemeler yalnızca görülen satırlara."""
+        rng = np.random.default_rng(seed)
+        n = len(texts)
+        for _ in range(epochs):
+            order = rng.permutation(n)
+            for i in range(0, n, batch_size):
+                sel = order[i:i + batch_size]
+                batch = [texts[j] for j in sel]
+                idx, owner, counts = featurize(batch, self.n_features)
+                scale = (1.0 / np.sqrt(counts)).astype(np.float32)[:, None]
+                offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                rows = self.W[idx]
+                s = np.add.reduceat(rows, offsets, axis=0) * scale
+                g_lab = _softmax(s[:, :_N_LAB])
+                g_dept = _softmax(s[:, _N_LAB:])
+                r = np.arange(len(sel))
+                g_lab[r, lab_y[sel]] -= 1.0
+                g_dept[r, dept_y[sel]] -= 1.0
+                g = np.hstack([g_lab, g_dept]) * scale / len(sel)
+                np.add.at(self.W, idx, -lr * (g[owner] + l2 * rows))
+
+    # ---- kalıcılık ----
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, W=self.W,
+                            meta=np.array(json.dumps({"n_features": self.n_features,
+                                                      "ngrams": NGRAMS,
+                                                      "dept_classes": DEPT_CLASSES})))
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "IntentModel":
+        data = np.load(path)
+        meta = json.loads(str(data["meta"]))
+        if meta["dept_classes"] != DEPT_CLASSES or tuple(meta["ngrams"]) != NGRAMS:
+            raise ValueError("intent model is stale: class list / n-grams changed, retrain it")
+        m = cls(meta["n_features"])
+        m.W = data["W"]
+        return m
+
+
+# ---------------------------
+# Eğitim verisi (kurallardan önyükleme)
+# ---------------------------
+_FILLER = ["ben", "çok", "iki gündür", "sabah", "biraz", "ve", "ama", "hocam", "doktor", "var",
+           "oluyor", "geçmiyor", "merhaba", "nasıl", "ne yapmalıyım", "bugün", "yine"]
+
+
+def rule_labels(texts: List[str]):
+    """Öğretmen: mevcut kural motoru."""
+    lab_y, dept_y = [], []
+    for c in (classify(t) for t in texts):
+        lab_y.append(1 if c["lab"] else 0)
+        dept_y.append(DEPT_CLASSES.index(c["department_code"] or ""))
+    return np.array(lab_y, dtype=np.int64), np.array(dept_y, dtype=np.int64)
+
+
+def synthetic_messages(n: int, seed: int = 0) -> List[str]:
+    vocab = sorted(_RULES.closure_mask)
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = [rng.choice(vocab) if rng.random() < 0.45 else rng.choice(_FILLER)
+                 for _ in range(rng.randint(1, 7))]
+        out.append(" ".join(parts))
+    return out
+
+
+def logged_messages(log_path: str) -> List[str]:
+    """logs/chat.log (+ döndürülmüş chat.log.*[.gz]) içindeki chat olaylarının kullanıcı mesajları."""
+    out = []
+    if not log_path:
+        return out
+    for line in iter_log_files(log_path):
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if rec.get("kind") in ("chat", "chat_stream") and isinstance(rec.get("req"), str):
+            out.append(rec["req"])
+    return out
+
+
+def train(texts: List[str], **kw) -> IntentModel:
+    lab_y, dept_y = rule_labels(texts)
+    model = IntentModel()
+    model.fit(texts, lab_y, dept_y, **kw)
+    return model
+
+
+_model: Optional[IntentModel] = None
+
+
+def get_model(path: str = MODEL_PATH) -> Optional[IntentModel]:
+    """Kayıtlı model varsa bir kez yükler; yoksa None."""
+    global _model
+    if _model is None and os.path.exists(path):
+        _model = IntentModel.load(path)
+    return _model
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["train"])
+    ap.add_argument("--log", default=os.path.join(BASE_DIR, "logs", "chat.log"))
+    ap.add_argument("--synthetic", type=int, default=60000)
+    ap.add_argument("--epochs", type=int, default=5)
+    ap.add_argument("--out", default=MODEL_PATH)
+    args = ap.parse_args()
+
+    texts = logged_messages(args.log) + synthetic_messages(args.synthetic)
+    model = train(texts, epochs=args.epochs)
+    model.save(args.out)
+    print(f"{len(texts)} mesajla eğitildi -> {args.out}", file=sys.stderr)
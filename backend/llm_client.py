@@ -1,10 +1,32 @@
 # backend/llm_client.py
-import os
+import os, re, json, time, asyncio, threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Iterator, Iterable
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from deadline import clamp, remaining
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://host.docker.internal:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:1b")
 
+# Havuz / eşzamanlılık ayarları
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "2"))     # sn; slot beklerken
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "90"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")                # model bellekte kalsın
+OLLAMA_OPTIONS = json.loads(os.getenv("OLLAMA_OPTIONS", "{}") or "{}")   # örn. {"num_ctx": 2048}
+
+# Devre kesici: art arda bu kadar bağlantı/zaman aşımı/5xx hatasında Ollama'ya istek gönderilmez
+# (0 = kapalı); OLLAMA_BREAKER_RESET sn sonra tek bir deneme isteği geçer
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "5"))
+OLLAMA_BREAKER_RESET = float(os.getenv("OLLAMA_BREAKER_RESET", "15"))
+# istek bütçesine kırpılıp bu süreden (sn) kısa kalan zaman aşımı devreye hata sayılmaz: Ollama'ya
+# anlamlı bir süre tanınmadı. Bundan uzun beklemiş her zaman aşımı (kırpılmış olsa da) hatadır.
+OLLAMA_BREAKER_MIN_WAIT = float(os.getenv("OLLAMA_BREAKER_MIN_WAIT", "2"))
+
 EN_SYSTEM = """
 You are a calm, friendly health support assistant.
 
@@ -30,31 +52,516 @@ KURALLAR (KESİN):
 - İngilizce kelime kullanma.
 """
 
-def _ollama_generate(prompt: str) -> str:
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
-    r = requests.post(OLLAMA_URL, json=payload, timeout=90)
-    r.raise_for_status()
-    data = r.json()
+TR_SENTENCE_SYSTEM = """
+Sen bir çevirmensin. Verilen İngilizce cümleyi doğal, sade bir Türkçeye çevir.
+
+KURALLAR (KESİN):
+- SADECE çeviriyi yaz, açıklama ekleme.
+- Cümle sayısını değiştirme.
+- İngilizce kelime kullanma.
+"""
+
+# "two_pass": EN üret + TR çevir (2 çağrı) | "single_pass": doğrudan TR (1 çağrı)
+GENERATION_MODE = os.getenv("GENERATION_MODE", "two_pass")
+
+# Ollama boş yanıt dönerse kullanıcıya gösterilen yer tutucu; önbelleğe/çeviri belleğine yazılmaz
+EMPTY_REPLY = "Şu anda yanıt üretilemiyor."
+
+class LLMBusyError(RuntimeError):
+    """Tüm üretim slotları dolu; istek kuyrukta beklemeden reddedildi."""
+
+
+class LLMUnavailableError(RuntimeError):
+    """Devre açık: Ollama son çağrılarda art arda başarısız oldu; istek gönderilmeden reddedildi."""
+
+
+class CircuitBreaker:
+    """
+    closed   : çağrılar geçer; art arda failure_threshold arka uç hatası -> open
+    open     : çağrılar LLMUnavailableError ile hemen reddedilir; reset_timeout sonra half_open
+    half_open: tek bir deneme (probe) geçer; başarılıysa closed, hatalıysa yeniden open
+    Yerel sebepli hatalar (slot dolu, bütçe bitti, iptal) sayılmaz; probe ise sıradakine devredilir.
+    """
+    STATE_CODES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = 0
+        self._rejected = 0
+        self._probes = 0
+
+    def rejecting(self) -> bool:
+        """Şu an bir çağrı reddedilir mi (durumu değiştirmez; /chat LLM adımlarını atlamak için)."""
+        with self._lock:
+            if self.state == "open":
+                return time.monotonic() - self._opened_at < self.reset_timeout
+            return self.state == "half_open" and self._probing
+
+    def _enter(self) -> bool:
+        """return: bu çağrı half_open deneme isteği mi"""
+        with self._lock:
+            if self.state == "closed":
+                return False
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                self._probes += 1
+                return True
+            self._rejected += 1
+        raise LLMUnavailableError("LLM unavailable: circuit open after repeated Ollama failures")
+
+    def _exit(self, probe: bool, outcome: str):
+        with self._lock:
+            if probe:
+                self._probing = False
+            if outcome == "success":
+                if probe or self.state == "closed":
+                    self.state = "closed"
+                    self._failures = 0
+            elif outcome == "failure":
+                self._failures += 1
+                tripped = self.state == "closed" and 0 < self.failure_threshold <= self._failures
+                if probe or tripped:
+                    self.state = "open"
+                    self._opened_at = time.monotonic()
+                    self._opened += 1
+
+    @contextmanager
+    def guard(self, is_failure):
+        """Çağrıyı devreden geçirir; is_failure(exc) True ise arka uç hatası sayılır."""
+        probe = self._enter()
+        try:
+            yield
+        except BaseException as e:
+            self._exit(probe, "failure" if is_failure(e) else "ignored")
+            raise
+        self._exit(probe, "success")
+
+    def stats(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == "open":
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": self.state,
+                "state_code": self.STATE_CODES[self.state],
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": round(retry_in, 2),
+                "opened": self._opened,
+                "rejected": self._rejected,
+                "probes": self._probes,
+            }
+
+
+def _backend_failure(e: BaseException) -> bool:
+    """requests hatası Ollama'nın sağlığıyla mı ilgili (bağlantı, zaman aşımı, 5xx)."""
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code >= 500
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+def _async_backend_failure(e: BaseException) -> bool:
+    import aiohttp
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status >= 500
+    return isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def _is_timeout(e: BaseException) -> bool:
+    return isinstance(e, (requests.Timeout, asyncio.TimeoutError))
+
+
+class _OllamaBase:
+    """Senkron ve asenkron istemcinin ortak ayarları, istek gövdesi ve sayaçları."""
+
+    def __init__(self, url: str, model: str, *, max_concurrency: int = 4, queue_timeout: float = 2.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 90.0,
+                 keep_alive: str | None = None, options: dict | None = None,
+                 breaker: CircuitBreaker | None = None):
+        self.url = url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = (connect_timeout, read_timeout)
+        self.keep_alive = keep_alive
+        self.options = dict(options or {})
+        # senkron ve asenkron istemci aynı Ollama'ya gittiği için aynı devreyi paylaşır
+        self.breaker = breaker or CircuitBreaker(failure_threshold=0)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._acquired = 0
+        self._rejected = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._ping_at = float("-inf")
+        self._ping_ok = False
+
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        payload = {"model": self.model, "prompt": prompt, "stream": stream}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        if self.options:
+            payload["options"] = self.options
+        return payload
+
+    def _request_timeout(self, cut: list | None = None) -> tuple[float, float]:
+        """(connect, read) zaman aşımları, isteğin kalan bütçesine kırpılmış; kırpıldıysa cut[0] = read."""
+        connect, read = self.timeout
+        timeout = clamp(connect, "ollama request"), clamp(read, "ollama request")
+        if cut is not None and timeout != self.timeout:
+            cut[0] = timeout[1]
+        return timeout
+
+    @contextmanager
+    def _guard(self, is_failure):
+        """
+        breaker.guard; yield edilen cut listesi _request_timeout'a verilir. Zaman aşımı yalnız
+        bütçe bağlayıcı sınır olup Ollama'ya OLLAMA_BREAKER_MIN_WAIT'ten kısa süre tanındıysa
+        hata sayılmaz (istek zaten bitmek üzereydi); asılı/aşırı yüklü Ollama devreyi açar.
+        """
+        cut = [None]
+
+        def failure(e: BaseException) -> bool:
+            if _is_timeout(e) and cut[0] is not None and cut[0] < OLLAMA_BREAKER_MIN_WAIT:
+                return False
+            return is_failure(e)
+
+        with self.breaker.guard(failure):
+            yield cut
+
+    def _wait_started(self) -> float:
+        with self._lock:
+            self._waiting += 1
+        return time.perf_counter()
+
+    def _wait_finished(self, t0: float, ok: bool):
+        wait_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self._waiting -= 1
+            if not ok:
+                self._rejected += 1
+            else:
+                self._acquired += 1
+                self._in_flight += 1
+                self._wait_ms_total += wait_ms
+                self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+        if not ok:
+            raise LLMBusyError(f"LLM busy: {self.max_concurrency} in flight, waited {wait_ms:.0f} ms")
+
+    def _done(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "rejected": self._rejected,
+                "queue_wait_ms_avg": round(self._wait_ms_total / self._acquired, 2) if self._acquired else 0.0,
+                "queue_wait_ms_max": round(self._wait_ms_max, 2),
+            }
+
+
+class OllamaClient(_OllamaBase):
+    """
+    Ollama için paylaşılan istemci:
+    - requests.Session + HTTPAdapter ile bağlantı havuzu (keep-alive)
+    - BoundedSemaphore ile eşzamanlı üretim sınırı; doluysa queue_timeout sonra LLMBusyError
+    - keep_alive/options her isteğe eklenir (model bellekte kalır)
+    """
+
+    def __init__(self, url: str, model: str, **kw):
+        super().__init__(url, model, **kw)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._sem = threading.BoundedSemaphore(self.max_concurrency)
+
+    @contextmanager
+    def _slot(self):
+        queue_timeout = clamp(self.queue_timeout, "ollama slot")
+        t0 = self._wait_started()
+        ok = self._sem.acquire(timeout=queue_timeout)
+        self._wait_finished(t0, ok)
+        try:
+            yield
+        finally:
+            self._done()
+            self._sem.release()
+
+    def generate_raw(self, prompt: str) -> dict:
+        with self._guard(_backend_failure) as cut, self._slot():
+            r = self.session.post(self.url, json=self._payload(prompt, False), timeout=self._request_timeout(cut))
+            r.raise_for_status()
+            return r.json()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Satır satır JSON akışından token parçaları; slot akış bitene kadar tutulur."""
+        with self._guard(_backend_failure) as cut, self._slot():
+            with self.session.post(self.url, json=self._payload(prompt, True),
+                                   timeout=self._request_timeout(cut), stream=True) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    piece = data.get("response") or ""
+                    if piece:
+                        yield piece
+                    if data.get("done"):
+                        break
+                else:
+                    raise RuntimeError("Ollama stream ended before done")   # yarım yanıt tam sayılmasın
+
+    def ping(self, timeout: float = 2.0, ttl: float = 5.0) -> bool:
+        """Ollama erişilebilir mi (/api/tags). Sonuç ttl saniye önbelleklenir."""
+        now = time.monotonic()
+        if now - self._ping_at < ttl:
+            return self._ping_ok
+        base = self.url.split("/api/")[0].rstrip("/")
+        try:
+            r = self.session.get(f"{base}/api/tags", timeout=timeout)
+            ok = r.ok
+        except requests.RequestException:
+            ok = False
+        self._ping_at, self._ping_ok = now, ok
+        return ok
+
+
+class AsyncOllamaClient(_OllamaBase):
+    """
+    OllamaClient'ın asyncio karşılığı (ASGI modu): aiohttp.ClientSession + asyncio.Semaphore.
+    Model yanıtını bekleyen istek thread tutmaz; slot sınırı ve sayaçlar senkron istemciyle aynı.
+    Oluşturulduğu event loop'a bağlıdır (ilk async çağrıda kurulur).
+    """
+
+    def __init__(self, url: str, model: str, **kw):
+        import aiohttp   # yalnız ASGI modunda gerekir
+        super().__init__(url, model, **kw)
+        connect_timeout, read_timeout = self.timeout
+        self._http = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+        )
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+
+    def _client_timeout(self, cut: list | None = None):
+        import aiohttp
+        connect, read = self._request_timeout(cut)
+        return aiohttp.ClientTimeout(total=remaining(), sock_connect=connect, sock_read=read)
+
+    @asynccontextmanager
+    async def _slot(self):
+        queue_timeout = clamp(self.queue_timeout, "ollama slot")
+        t0 = self._wait_started()
+        try:
+            async with asyncio.timeout(queue_timeout):
+                await self._sem.acquire()
+            ok = True
+        except TimeoutError:
+            ok = False
+        except BaseException:
+            self._wait_finished(t0, False)
+            raise
+        self._wait_finished(t0, ok)
+        try:
+            yield
+        finally:
+            self._done()
+            self._sem.release()
+
+    async def generate_raw(self, prompt: str) -> dict:
+        with self._guard(_async_backend_failure) as cut:
+            async with self._slot():
+                async with self._http.post(self.url, json=self._payload(prompt, False),
+                                           timeout=self._client_timeout(cut)) as r:
+                    r.raise_for_status()
+                    return await r.json(content_type=None)
+
+    async def stream(self, prompt: str):
+        with self._guard(_async_backend_failure) as cut:
+            async with self._slot():
+                async with self._http.post(self.url, json=self._payload(prompt, True),
+                                           timeout=self._client_timeout(cut)) as r:
+                    r.raise_for_status()
+                    async for line in r.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        piece = data.get("response") or ""
+                        if piece:
+                            yield piece
+                        if data.get("done"):
+                            break
+                    else:
+                        raise RuntimeError("Ollama stream ended before done")
+
+    async def aclose(self):
+        await self._http.close()
+
+
+_CLIENT_KW = dict(
+    max_concurrency=OLLAMA_MAX_CONCURRENCY,
+    queue_timeout=OLLAMA_QUEUE_TIMEOUT,
+    connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+    read_timeout=OLLAMA_READ_TIMEOUT,
+    keep_alive=OLLAMA_KEEP_ALIVE,
+    options=OLLAMA_OPTIONS,
+)
+
+breaker = CircuitBreaker(OLLAMA_BREAKER_FAILURES, OLLAMA_BREAKER_RESET)
+
+client = OllamaClient(OLLAMA_URL, OLLAMA_MODEL, breaker=breaker, **_CLIENT_KW)
+
+# ASGI modunda ilk async çağrıda (uvicorn'un event loop'unda) kurulur
+_async_client: AsyncOllamaClient | None = None
+
+def get_async_client() -> AsyncOllamaClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOllamaClient(OLLAMA_URL, OLLAMA_MODEL, breaker=breaker, **_CLIENT_KW)
+    return _async_client
+
+def async_client_stats() -> dict | None:
+    return _async_client.stats() if _async_client is not None else None
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def _response_text(data: dict) -> str:
     text = (data.get("response") or "").strip()
     if not text:
-        return "Şu anda yanıt üretilemiyor."
+        return EMPTY_REPLY
     return text
 
-def llm_reply_en(user_message: str, context: dict | None = None) -> str:
+def _ollama_generate_raw(prompt: str) -> dict:
+    """Ollama'nın ham yanıtı (response + eval_count/prompt_eval_count/süreler)."""
+    return client.generate_raw(prompt)
+
+def _ollama_generate(prompt: str) -> str:
+    return _response_text(_ollama_generate_raw(prompt))
+
+async def _ollama_generate_async(prompt: str) -> str:
+    return _response_text(await get_async_client().generate_raw(prompt))
+
+def _ollama_stream(prompt: str) -> Iterator[str]:
+    """Ollama'nın satır satır JSON akışından token parçalarını yield eder."""
+    return client.stream(prompt)
+
+# cümle sonu: . ! ? … ardından boşluk
+_SENT_END = re.compile(r"(?<=[.!?…])\s+")
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    """Token akışını tamamlanmış cümlelere böler; son parça akış bitince gelir."""
+    buf = ""
+    for piece in pieces:
+        buf += piece
+        parts = _SENT_END.split(buf)
+        for s in parts[:-1]:
+            s = s.strip()
+            if s:
+                yield s
+        buf = parts[-1]
+    if buf.strip():
+        yield buf.strip()
+
+def split_sentences(text: str) -> list[str]:
+    return list(iter_sentences([text or ""]))
+
+def _en_prompt(user_message: str, context: dict | None = None) -> str:
     ctx = ""
     if context:
         ctx = f"\n\n[CONTEXT]\n{context}\n"
-    prompt = f"{EN_SYSTEM}\n{ctx}\nUser message:\n{user_message}\n\nAnswer:"
-    return _ollama_generate(prompt)
+    return f"{EN_SYSTEM}\n{ctx}\nUser message:\n{user_message}\n\nAnswer:"
 
-def translate_to_tr(english_text: str) -> str:
-    prompt = (
+def llm_reply_en(user_message: str, context: dict | None = None) -> str:
+    return _ollama_generate(_en_prompt(user_message, context))
+
+async def llm_reply_en_async(user_message: str, context: dict | None = None) -> str:
+    return await _ollama_generate_async(_en_prompt(user_message, context))
+
+def llm_reply_en_stream(user_message: str, context: dict | None = None) -> Iterator[str]:
+    """llm_reply_en'in akış hali: token parçalarını geldikçe yield eder."""
+    return _ollama_stream(_en_prompt(user_message, context))
+
+def _translate_prompt(english_text: str) -> str:
+    return (
         f"{TR_TRANSLATE_SYSTEM}\n\n"
         f"Aşağıdaki metni kurallara uyarak Türkçeye çevir:\n"
         f"{english_text}\n\nTürkçe yanıt:"
     )
+
+def translate_to_tr(english_text: str) -> str:
+    return _ollama_generate(_translate_prompt(english_text))
+
+async def translate_to_tr_async(english_text: str) -> str:
+    return await _ollama_generate_async(_translate_prompt(english_text))
+
+def _tr_prompt(user_message: str, context: dict | None = None) -> str:
+    ctx = ""
+    if context:
+        ctx = f"\n\n[BAĞLAM]\n{context}\n"
+    return f"{TR_TRANSLATE_SYSTEM}\n{ctx}\nKullanıcı mesajı:\n{user_message}\n\nTürkçe yanıt:"
+
+def llm_reply_tr(user_message: str, context: dict | None = None) -> str:
+    """Tek geçiş: TR_TRANSLATE_SYSTEM kurallarıyla doğrudan Türkçe yanıt üretir."""
+    return _ollama_generate(_tr_prompt(user_message, context))
+
+async def llm_reply_tr_async(user_message: str, context: dict | None = None) -> str:
+    return await _ollama_generate_async(_tr_prompt(user_message, context))
+
+def llm_reply_tr_stream(user_message: str, context: dict | None = None) -> Iterator[str]:
+    return _ollama_stream(_tr_prompt(user_message, context))
+
+def translate_sentence_to_tr(english_sentence: str) -> str:
+    """Akış modunda tek cümle çevirisi (2–4 cümle kuralı burada uygulanmaz)."""
+    prompt = (
+        f"{TR_SENTENCE_SYSTEM}\n\n"
+        f"İngilizce cümle:\n{english_sentence}\n\nTürkçe çeviri:"
+    )
     return _ollama_generate(prompt)
+
+_NUMBERED = re.compile(r"^\s*(\d+)[.)]\s*(.+?)\s*$")
+
+def translate_batch_to_tr(english_sentences: list[str]) -> list[str] | None:
+    """
+    Birden çok cümleyi tek çağrıda çevirir (numaralı satırlar).
+    Çıktı numaraları eşleşmezse None döner; çağıran bütün metni çevirmeye düşer.
+    """
+    if not english_sentences:
+        return []
+    if len(english_sentences) == 1:
+        return [translate_sentence_to_tr(english_sentences[0])]
+    numbered = "\n".join(f"{i}. {s}" for i, s in enumerate(english_sentences, 1))
+    prompt = (
+        f"{TR_SENTENCE_SYSTEM}\n\n"
+        f"Aşağıdaki numaralı cümleleri aynı numaralarla, her satıra bir cümle olacak şekilde çevir:\n"
+        f"{numbered}\n\nTürkçe çeviriler:"
+    )
+    out: dict[int, str] = {}
+    for line in _ollama_generate(prompt).splitlines():
+        m = _NUMBERED.match(line)
+        if m:
+            out[int(m.group(1))] = m.group(2)
+    if sorted(out) != list(range(1, len(english_sentences) + 1)):
+        return None
+    return [out[i] for i in range(1, len(english_sentences) + 1)]
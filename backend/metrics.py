@@ -0,0 +1,237 @@
+# backend/metrics.py
+# Süreç içi metrikler (Prometheus metin formatı) + aşama süre ölçümü (span).
+#
+#   with span("retrieve"):
+#       ...
+# -> chat_stage_seconds{stage="retrieve",intent="route",outcome="ok"} histogramı
+#    (+ istek içindeysek o isteğin süre dökümüne bir satır)
+import os, time, asyncio, threading, contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional
+
+# saniye; LLM çağrıları onlarca saniye sürebildiği için üst kovalar geniş
+DEFAULT_BUCKETS = tuple(
+    float(x) for x in os.getenv(
+        "METRICS_BUCKETS", "0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120"
+    ).split(",")
+)
+
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    """Anlık değer; /metrics okunurken mevcut stats() çıktılarından doldurulur."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # etiket -> [kova sayaçları (kümülatif değil), toplam, adet]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        k = self._key(labels)
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, ([*s[0]], s[1], s[2])) for k, s in self._series.items())
+        out = []
+        for k, (counts, total, n) in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le_label = 'le="%s"' % _fmt(le)
+                out.append(f"{self.name}_bucket{_labels(self.label_names, k, le_label)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, k)} {total:.6f}")
+            out.append(f"{self.name}_count{_labels(self.label_names, k)} {n}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, m: _Metric) -> _Metric:
+        self._metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "chat_stage_seconds", "Duration of a single /chat pipeline stage.", ("stage", "intent", "outcome")))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "chat_stage_errors_total", "Stage failures (each one triggers the next fallback).", ("stage", "intent")))
+STAGE_CANCELLED = REGISTRY.register(Counter(
+    "chat_stage_cancelled_total", "Stages cancelled before finishing (e.g. unneeded speculative fallbacks).",
+    ("stage", "intent")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "chat_request_seconds", "End-to-end chat request duration.", ("endpoint", "intent", "source", "path")))
+REQUESTS = REGISTRY.register(Counter(
+    "chat_requests_total", "Chat requests by intent, answer source and fallback path.",
+    ("endpoint", "intent", "source", "path")))
+
+
+# ---------------------------
+# İstek bağlamı (süre dökümü)
+# ---------------------------
+class RequestTimings:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.intent = ""
+        self.spans: List[Tuple[str, float, float, str]] = []   # (stage, start_ms, ms, outcome)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def breakdown(self) -> dict:
+        """
+        Yanıta eklenecek döküm: aşamalar başlangıç sırasıyla (başlangıç ofseti + süre, ms) + toplam.
+        serial_ms: aşamalar art arda çalışsaydı geçecek süre; total_ms ile farkı paralellikten kazanç.
+        """
+        spans = sorted(self.spans, key=lambda x: x[1])
+        return {
+            "stages": [{"stage": s, "start_ms": round(st, 2), "ms": round(ms, 2), "outcome": o}
+                       for s, st, ms, o in spans],
+            "serial_ms": round(sum(ms for _s, _st, ms, o in spans if o != "cancelled"), 2),
+            "total_ms": round(self.elapsed() * 1000, 2),
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def request_timings():
+    """İstek süresince span'ların toplanacağı bağlam."""
+    rt = RequestTimings()
+    token = _current.set(rt)
+    try:
+        yield rt
+    finally:
+        _current.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Aşama süresini histogram'a (ve varsa istek dökümüne) yazar; hata yeniden fırlatılır."""
+    rt = _current.get()
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except (asyncio.CancelledError, GeneratorExit):
+        # ASGI modunda gereksiz kalan spekülatif görev iptal edildi / akış istemcisi bağlantıyı bıraktı
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        dt = time.perf_counter() - t0
+        if outcome == "cancelled":
+            note_cancelled(stage, rt)
+        else:
+            intent = rt.intent if rt is not None else ""
+            STAGE_SECONDS.observe(dt, stage=stage, intent=intent, outcome=outcome)
+            if outcome == "error":
+                STAGE_ERRORS.inc(stage=stage, intent=intent)
+            if rt is not None:
+                rt.spans.append((stage, (t0 - rt.t0) * 1000, dt * 1000, outcome))
+
+
+def note_cancelled(stage: str, rt: Optional[RequestTimings] = None):
+    """Bitmeden iptal edilen aşama: süre histogramına girmez, sayaç + dökümde "cancelled" satırı."""
+    rt = rt if rt is not None else _current.get()
+    STAGE_CANCELLED.inc(stage=stage, intent=rt.intent if rt is not None else "")
+    if rt is not None:
+        rt.spans.append((stage, rt.elapsed() * 1000, 0.0, "cancelled"))
+
+
+def observe_request(endpoint: str, rt: RequestTimings, *, intent: str, source: str, path: str):
+    labels = {"endpoint": endpoint, "intent": intent, "source": source, "path": path}
+    REQUEST_SECONDS.observe(rt.elapsed(), **labels)
+    REQUESTS.inc(**labels)
@@ -1,28 +1,23 @@
 # backend/ml_intent.py
 # Intent + branş tespiti (kombinasyon mantığı, Türkçe karakter normalizasyonu)
 
-from typing import Optional, Tuple, Dict, Any
+import os
+import re
+from typing import Optional, Tuple, Dict, Any, List, FrozenSet, Iterable, Iterator
+
+_TR_FOLD = [("ç", "c"), ("ğ", "g"), ("ı", "i"), ("ö", "o"), ("ş", "s"), ("ü", "u"),
+            ("â", "a"), ("î", "i"), ("û", "u"), ("é", "e")]
+_PUNCT_RE = re.compile(r"[,.;:!?()\[\]{}'\"]")
 
 
 def normalize(s: str) -> str:
+    # ASCII metinde harf sadeleştirme atlanır; noktalama tek regex geçişiyle boşluk olur
     t = (s or "").casefold()
-    tr = {"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u",
-          "â": "a", "î": "i", "û": "u", "é": "e"}
-    for k, v in tr.items():
-        t = t.replace(k, v)
-    # noktalama/çift boşlukları sadeleştirme
-    for ch in ",.;:!?()[]{}'\"":
-        t = t.replace(ch, " ")
-    t = " ".join(t.split())
-    return t
-
-
-def contains_any(t: str, words) -> bool:
-    return any(w in t for w in words)
-
-
-def contains_all(t: str, words) -> bool:
-    return all(w in t for w in words)
+    if not t.isascii():
+        for k, v in _TR_FOLD:
+            if k in t:
+                t = t.replace(k, v)
+    return " ".join(_PUNCT_RE.sub(" ", t).split())
 
 
 DEPTS = {
@@ -37,120 +32,199 @@ DEPTS = {
 }
 
 
-# --- intent desenleri ---
-def is_urgent(t: str) -> bool:
-    # göğüs + (ağrı|baskı|sıkışma)
-    if (("gogus" in t or "gogsum" in t or "gogsumde" in t) and contains_any(t, ["agri", "baski", "sikisma"])):
-        return True
-
-    # nefes darlığı / nefes almakta zorlanma varyantları
-    if ("nefes" in t and contains_any(t, [
-        "darl",          # nefes darligi, daraliyor
-        "zor",           # nefes zor
-        "zorlan",        # nefes almakta zorlaniyorum
-        "alam",          # nefes alamiyorum
-        "yetmiyor",      # nefes yetmiyor
-        "tikan"          # tikanir gibi
-    ])):
-        return True
-
-    if contains_any(t, ["bayil", "suur kayb", "felc"]):
-        return True
-    if contains_any(t, ["ani gorme kaybi", "ani gorme bozuklugu"]):
-        return True
-    return False
+ROUTE_TRIG = ["poliklinik oner", "hangi brans", "hangi doktora", "brans oner", "yonlendir", "poliklinik hangisi"]
 
 
-def looks_like_lab(t: str) -> bool:
+# ---------------------------------------------------------------------------
+# Derlenmiş kural seti: tek normalize + tek tarama
+# ---------------------------------------------------------------------------
+# Kural = cümlecik listesi (VEYA); cümlecik = grup listesi (VE); grup = alternatifler (VEYA).
+# Yani bir kural, cümleciklerinden biri sağlanırsa tutar; cümlecik için her gruptan
+# en az bir kelime metinde (alt dizge olarak) geçmelidir. Sıra, referans zincirle
+# (bench/intent_reference.py) aynıdır.
+_GOGUS = ["gogus", "gogsum", "gogsumde"]
+_GOGUS_AGRI = ["agri", "baski", "sikisma"]
+_NEFES_ZOR = ["darl", "zor", "zorlan", "alam", "yetmiyor", "tikan"]
+
+URGENT_RULE = [
+    [_GOGUS, _GOGUS_AGRI],
+    [["nefes"], _NEFES_ZOR],
+    [["bayil", "suur kayb", "felc"]],
+    [["ani gorme kaybi", "ani gorme bozuklugu"]],
+]
+
+LAB_RULE = [
+    [["tahlil", "sonuc", "sonuç", "test", "deger", "değer",
+      "kan", "kolesterol", "seker", "şeker", "glukoz",
+      "trigliserid", "vitamin", "hemogram"]],
+]
+
+DEPT_RULES = [
+    ("kardiyoloji", [
+        [_GOGUS, _GOGUS_AGRI],
+        [["kalp carpinti"]],
+        [["nefes"], _NEFES_ZOR],
+    ]),
+    ("kbb", [
+        [["bogaz"], ["agri", "yan"]],
+        [["kulak"], ["agri", "akinti", "tikan"]],
+        [["burun"], ["tikan"]],
+        [["sinuzit", "geniz akinti", "ses kisik"]],
+    ]),
+    ("gastro", [
+        [["mide"], ["agri", "bulant", "eksime", "ekşime", "yanma"]],
+        [["karin"], ["agri", "siskin", "siskinlik"]],
+        [["ishal", "kabiz", "reflu", "gaz sanci", "gaz sancisi"]],
+    ]),
+    ("dermatoloji", [
+        [["dokuntu", "kizin", "kasin", "egzama", "akne", "sivilce", "kurdesen", "mant"]],
+    ]),
+    ("uroloji", [
+        [["idrar"], ["yan", "yanma", "yaniyor", "yakarak", "zor", "kanli"]],
+        [["bobrek"], ["agri", "tas", "tasi"]],
+    ]),
+    ("noroloji", [
+        [["migren"]],
+        [["bas"], ["agri", "don"]],
+        [["uyusma", "nobet", "kasilma", "titreme"]],
+    ]),
+    ("ortopedi", [
+        [["diz", "omuz", "dirsek", "bilek", "ayak bilegi"]],
+        [["bel", "boyun"], ["agri"]],
+        [["kirilma", "cikik", "burkul", "kas yirt", "kas zorlan"]],
+    ]),
+    ("dahiliye", [
+        [["ates", "halsiz", "yorgunluk", "usume titreme", "soguk algin", "grip"]],
+    ]),
+]
+
+
+def _rule_words(rule) -> List[str]:
+    return [w for clause in rule for group in clause for w in group]
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Kelime listesinden trie biçimli regex; her düğümde önce en uzun devam denenir."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if terminal:
+            return body + "?" if len(alts) == 1 and len(body) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class _CompiledRules:
     """
-    Basit laboratuvar cümlelerini tespit eder:
-    örnek: 'tahlil', 'sonuç', 'kolesterol', 'şeker', 'kan değeri' vb.
+    Tüm kural setinin derlenmiş hali (import'ta bir kez kurulur).
+
+    - Tarama: bütün anahtar kelimeler tek trie-regex'te (Aho-Corasick goto ağacının
+      karşılığı). Her konumda (lookahead ile) o konumda başlayan EN UZUN kelime
+      yakalanır; aynı konumda başlayan kısa kelimeler ve kelime içinde geçen diğer
+      kelimeler önceden hesaplanan kapanışla (AC çıktı/sözlük bağları gibi) eklenir.
+      Böylece metinde geçen kelimelerin tam kümesi C tarafında tek geçişte bulunur.
+    - Değerlendirme: her (VEYA-)grup bir bit; kelime -> karşıladığı grupların maskesi.
+      Cümlecik, tüm grup bitleri set edilmişse sağlanır.
     """
-    keywords = [
-        "tahlil", "sonuc", "sonuç", "test", "deger", "değer",
-        "kan", "kolesterol", "seker", "şeker", "glukoz",
-        "trigliserid", "vitamin", "hemogram"
-    ]
-    return any(k in t for k in keywords)
-
 
-# --- branş kombinasyonları ---
-def predict_department(text: str) -> Tuple[Optional[str], Optional[str]]:
-    t = normalize(text)
-
-    # Kardiyoloji
-    if (("gogus" in t or "gogsum" in t or "gogsumde" in t) and contains_any(t, ["agri", "baski", "sikisma"])) \
-       or contains_any(t, ["kalp carpinti"]) \
-       or ("nefes" in t and contains_any(t, ["darl", "zor", "zorlan", "alam", "yetmiyor", "tikan"])):
-        return ("kardiyoloji", DEPTS["kardiyoloji"])
-
-    # KBB
-    if ("bogaz" in t and contains_any(t, ["agri", "yan"])) \
-       or ("kulak" in t and contains_any(t, ["agri", "akinti", "tikan"])) \
-       or ("burun" in t and "tikan" in t) \
-       or contains_any(t, ["sinuzit", "geniz akinti", "ses kisik"]):
-        return ("kbb", DEPTS["kbb"])
-
-    # Gastro
-    if ("mide" in t and contains_any(t, ["agri", "bulant", "eksime", "ekşime", "yanma"])) \
-       or ("karin" in t and contains_any(t, ["agri", "siskin", "siskinlik"])) \
-       or contains_any(t, ["ishal", "kabiz", "reflu", "gaz sanci", "gaz sancisi"]):
-        return ("gastro", DEPTS["gastro"])
-
-    # Dermatoloji
-    if contains_any(t, ["dokuntu", "kizin", "kasin", "egzama", "akne", "sivilce", "kurdesen", "mant"]):
-        return ("dermatoloji", DEPTS["dermatoloji"])
-
-    # Üroloji
-    if ("idrar" in t and contains_any(t, ["yan", "yanma", "yaniyor", "yakarak", "zor", "kanli"])) \
-       or ("bobrek" in t and contains_any(t, ["agri", "tas", "tasi"])):
-        return ("uroloji", DEPTS["uroloji"])
-
-    # Nöroloji
-    if contains_any(t, ["migren"]) \
-       or (("bas" in t) and contains_any(t, ["agri", "don"])) \
-       or contains_any(t, ["uyusma", "nobet", "kasilma", "titreme"]):
-        return ("noroloji", DEPTS["noroloji"])
-
-    # Ortopedi / FTR
-    if contains_any(t, ["diz", "omuz", "dirsek", "bilek", "ayak bilegi"]) \
-       or (contains_any(t, ["bel", "boyun"]) and "agri" in t) \
-       or contains_any(t, ["kirilma", "cikik", "burkul", "kas yirt", "kas zorlan"]):
-        return ("ortopedi", DEPTS["ortopedi"])
-
-    # Dahiliye – genel semptomlar
-    if contains_any(t, ["ates", "halsiz", "yorgunluk", "usume titreme", "soguk algin", "grip"]):
-        return ("dahiliye", DEPTS["dahiliye"])
-
-    return (None, None)
+    def __init__(self, named_rules: List[Tuple[str, list]]):
+        group_bits: Dict[FrozenSet[str], int] = {}
+        self.rules: Dict[str, List[int]] = {}
+        for name, rule in named_rules:
+            masks = []
+            for clause in rule:
+                m = 0
+                for group in clause:
+                    key = frozenset(group)
+                    if key not in group_bits:
+                        group_bits[key] = 1 << len(group_bits)
+                    m |= group_bits[key]
+                masks.append(m)
+            self.rules[name] = masks
+
+        words = sorted({w for _, rule in named_rules for w in _rule_words(rule)})
+        word_mask = {w: 0 for w in words}
+        for group, bit in group_bits.items():
+            for w in group:
+                word_mask[w] |= bit
+        # kapanış: w eşleşince içinde geçen tüm kelimeler de eşleşmiş sayılır
+        self.closure_mask = {
+            w: _or_all(word_mask[x] for x in words if x in w) for w in words
+        }
+        self.scan_re = re.compile("(?=(" + _trie_regex(words) + "))")
+
+    def scan(self, t: str) -> int:
+        """Normalize edilmiş metin -> sağlanan grupların bit maskesi."""
+        found = 0
+        cm = self.closure_mask
+        for w in self.scan_re.findall(t):
+            found |= cm[w]
+        return found
+
+    def match(self, name: str, found: int) -> bool:
+        for m in self.rules[name]:
+            if found & m == m:
+                return True
+        return False
+
+
+def _or_all(masks) -> int:
+    out = 0
+    for m in masks:
+        out |= m
+    return out
+
+
+_RULES = _CompiledRules(
+    [("urgent", URGENT_RULE), ("lab", LAB_RULE)]
+    + [(code, rule) for code, rule in DEPT_RULES]
+)
+_DEPT_ORDER = [code for code, _ in DEPT_RULES]
+
+
+def _classify_found(found: int) -> Tuple[bool, bool, Optional[str]]:
+    match = _RULES.match
+    dept = None
+    for code in _DEPT_ORDER:
+        if match(code, found):
+            dept = code
+            break
+    return match("urgent", found), match("lab", found), dept
 
 
-ROUTE_TRIG = ["poliklinik oner", "hangi brans", "hangi doktora", "brans oner", "yonlendir", "poliklinik hangisi"]
+def is_urgent(t: str) -> bool:
+    """Normalize edilmiş metin acil desenlerinden birini içeriyor mu."""
+    return _RULES.match("urgent", _RULES.scan(t))
 
 
-def predict_intent(text: str) -> str:
-    t = normalize(text)
+def looks_like_lab(t: str) -> bool:
+    """Normalize edilmiş metin laboratuvar/tahlil cümlesine benziyor mu."""
+    return _RULES.match("lab", _RULES.scan(t))
 
-    # 1) Acil
-    if is_urgent(t):
-        return "urgent"
 
-    # 2) Lab/tahlil
-    if looks_like_lab(t):
-        return "lab"
+def predict_department(text: str) -> Tuple[Optional[str], Optional[str]]:
+    _, _, code = _classify_found(_RULES.scan(normalize(text)))
+    return (code, DEPTS[code]) if code else (None, None)
 
-    # 3) Branş (route) — code varsa
-    code, _ = predict_department(text)
-    if code:
-        return "route"
 
-    # 4) Diğer
-    return "general"
+def predict_intent(text: str) -> str:
+    return classify(text)["intent"]
 
 
 def classify(text: str) -> Dict[str, Any]:
     """
-    Debug/test amaçlı tek fonksiyon:
+    Tek normalize + tek tarama ile:
     - intent (urgent/lab/route/general)
     - urgent flag
     - lab flag
@@ -158,21 +232,49 @@ def classify(text: str) -> Dict[str, Any]:
     """
     raw = text or ""
     t = normalize(raw)
+    urgent, lab, code = _classify_found(_RULES.scan(t))
 
-    urgent_flag = is_urgent(t)
-    lab_flag = looks_like_lab(t)
-
-    intent = predict_intent(raw)
-
-    # ✅ Güncelleme: acil durumda da branş tahmini yap
-    dept_code, dept_name = predict_department(raw)
+    if urgent:
+        intent = "urgent"
+    elif lab:
+        intent = "lab"
+    elif code:
+        intent = "route"
+    else:
+        intent = "general"
 
     return {
         "raw": raw,
         "normalized": t,
         "intent": intent,
-        "urgent": urgent_flag,
-        "lab": lab_flag,
-        "department_code": dept_code,
-        "department_name": dept_name,
+        "urgent": urgent,
+        "lab": lab,
+        "department_code": code,
+        "department_name": DEPTS[code] if code else None,
     }
+
+
+def iter_classify(texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """classify()'ı akış halinde uygular; girdi ne kadar büyük olursa olsun bellek sabit kalır."""
+    for text in texts:
+        yield classify(text)
+
+
+# "rules": derlenmiş kural motoru | "model": intent_model.py (NumPy, eğitilmiş model gerekir)
+CLASSIFIER_ENGINE = os.getenv("CLASSIFIER_ENGINE", "rules")
+
+
+def classify_batch(texts: Iterable[str], engine: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Toplu sınıflandırma; sonuçlar girdiyle aynı sırada.
+    engine="model" seçilip kayıtlı model yoksa (ya da numpy kurulu değilse) kurallara düşer.
+    """
+    if (engine or CLASSIFIER_ENGINE) == "model":
+        try:
+            from intent_model import get_model
+            model = get_model()
+        except ImportError:
+            model = None
+        if model is not None:
+            return model.classify_batch(texts)
+    return list(iter_classify(texts))
@@ -0,0 +1,107 @@
+# backend/rag/embedder.py
+# Süreç genelinde tek, tembel yüklenen embedding modeli + sorgu embedding LRU önbelleği.
+# Tüm koleksiyonlar aynı servisi paylaşır (model bellekte bir kez durur).
+import os, time, threading
+from collections import OrderedDict
+from typing import List, Optional
+
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "all-MiniLM-L6-v2")
+QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE_SIZE", "2048"))
+
+
+def _query_key(text: str) -> str:
+    # MiniLM tokenizer'ı küçük harfe çevirir ve boşlukları yutar; bu anahtar
+    # aynı embedding'i üreten yazımları birleştirir (Türkçe harfler korunur).
+    return " ".join((text or "").split()).lower()
+
+
+class EmbeddingService:
+    """
+    - Model ilk kullanımda yüklenir (import maliyeti uygulama açılışına binmez)
+    - embed_many: toplu embedding (indeksleme)
+    - embed_query: LRU önbellekli tek sorgu embedding'i
+    """
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, cache_size: int = QUERY_CACHE_SIZE):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self._embed_ms_total = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    t0 = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                    self.load_seconds = time.perf_counter() - t0
+        return self._model
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # chromadb'nin SentenceTransformerEmbeddingFunction'ı ile aynı ayarlar
+        # (mevcut kalıcı vektörlerle uyumlu kalsın)
+        vecs = self.model().encode(list(texts), convert_to_numpy=True, normalize_embeddings=False)
+        return [v.tolist() for v in vecs]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = _query_key(text)
+        with self._cache_lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vec
+
+        t0 = time.perf_counter()
+        vec = self.embed_many([text])[0]
+        ms = (time.perf_counter() - t0) * 1000
+
+        with self._cache_lock:
+            self.misses += 1
+            self._embed_ms_total += ms
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vec
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            total = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "loaded": self.loaded,
+                "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+                "cache_size": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "embed_ms_avg": round(self._embed_ms_total / self.misses, 2) if self.misses else 0.0,
+            }
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedder() -> EmbeddingService:
+    """Süreç genelindeki tek servis."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EmbeddingService()
+    return _service
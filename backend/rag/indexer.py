@@ -0,0 +1,143 @@
+# backend/rag/indexer.py
+# Artımlı bilgi tabanı indeksleme:
+# - markdown dosyaları başlık + boyuta göre parçalanır (chunk)
+# - her chunk'ın id'si kaynak yolu + içerik hash'inden türetilir
+# - yalnızca yeni/değişen chunk'lar embed edilir, artık olmayan id'ler silinir
+import os, glob, hashlib, threading
+from typing import List, Dict, Tuple, Callable, Optional
+
+KNOWLEDGE_PATTERNS = ("*.md", "*.txt")
+CHUNK_MAX_CHARS = int(os.getenv("RAG_CHUNK_MAX_CHARS", "800"))
+
+
+def _split_by_size(block: str, max_chars: int) -> List[str]:
+    """Paragraf/madde sınırlarında böl; tek satır bile uzunsa olduğu gibi bırak."""
+    if len(block) <= max_chars:
+        return [block]
+    out, cur = [], ""
+    for line in block.splitlines():
+        if cur and len(cur) + 1 + len(line) > max_chars:
+            out.append(cur.strip())
+            cur = ""
+        cur = f"{cur}\n{line}" if cur else line
+    if cur.strip():
+        out.append(cur.strip())
+    return out
+
+
+def chunk_markdown(text: str, max_chars: int = CHUNK_MAX_CHARS) -> List[str]:
+    """
+    Başlıklara (#, ##, ...) göre bölümler; bölüm max_chars'ı aşarsa satır sınırından bölünür.
+    Başlık, bölümün her parçasının başına eklenir (bağlam kaybolmasın).
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in (text or "").splitlines():
+        if line.lstrip().startswith("#"):
+            sections.append((line.strip(), []))
+        else:
+            sections[-1][1].append(line)
+
+    chunks = []
+    for heading, lines in sections:
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+        budget = max(max_chars - len(heading) - 1, 1) if heading else max_chars
+        for part in _split_by_size(body, budget):
+            chunks.append(f"{heading}\n{part}" if heading else part)
+    return chunks
+
+
+def _chunk_id(source: str, text: str) -> str:
+    return hashlib.sha1(f"{source}\n{text}".encode("utf-8")).hexdigest()[:20]
+
+
+def scan_knowledge(knowledge_dir: str) -> Dict[str, Tuple[str, dict]]:
+    """{chunk_id: (metin, metadata)} — klasördeki bilgi tabanının istenen hali."""
+    out: Dict[str, Tuple[str, dict]] = {}
+    if not knowledge_dir or not os.path.isdir(knowledge_dir):
+        return out
+    paths = sorted({p for pat in KNOWLEDGE_PATTERNS for p in glob.glob(os.path.join(knowledge_dir, pat))})
+    for p in paths:
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            continue
+        source = os.path.basename(p)
+        for i, chunk in enumerate(chunk_markdown(text)):
+            cid = _chunk_id(source, chunk)
+            out[cid] = (chunk, {"source": source, "chunk": i})
+    return out
+
+
+def sync_collection(col, knowledge_dir: str,
+                    embed_many: Optional[Callable[[List[str]], List[List[float]]]] = None) -> dict:
+    """
+    Koleksiyonu klasörle eşitler: yeni/değişen chunk'lar eklenir (embed edilir),
+    klasörde artık olmayanlar silinir. Değişmeyenlere dokunulmaz.
+    embed_many verilirse vektörler onunla (toplu) üretilir; yoksa koleksiyonun kendi
+    embedding fonksiyonu kullanılır.
+    """
+    desired = scan_knowledge(knowledge_dir)
+    existing = set(col.get(include=[])["ids"])
+
+    to_add = [cid for cid in desired if cid not in existing]
+    to_delete = [cid for cid in existing if cid not in desired]
+
+    if to_delete:
+        col.delete(ids=to_delete)
+    if to_add:
+        docs = [desired[c][0] for c in to_add]
+        col.add(
+            ids=to_add,
+            documents=docs,
+            metadatas=[desired[c][1] for c in to_add],
+            embeddings=embed_many(docs) if embed_many else None,
+        )
+    return {"added": len(to_add), "deleted": len(to_delete), "unchanged": len(desired) - len(to_add)}
+
+
+def dir_signature(knowledge_dir: str) -> Tuple:
+    """Dosya adı + mtime + boyut; değişiklik tespiti için ucuz imza."""
+    if not knowledge_dir or not os.path.isdir(knowledge_dir):
+        return ()
+    sig = []
+    for pat in KNOWLEDGE_PATTERNS:
+        for p in glob.glob(os.path.join(knowledge_dir, pat)):
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            sig.append((os.path.basename(p), st.st_mtime_ns, st.st_size))
+    return tuple(sorted(sig))
+
+
+class KnowledgeWatcher(threading.Thread):
+    """
+    Bilgi klasörlerini belirli aralıkla yoklar (polling; ek bağımlılık yok).
+    İmza değişince on_change(knowledge_dir) çağrılır.
+    """
+
+    def __init__(self, dirs: List[str], on_change: Callable[[str], None], interval: float = 5.0):
+        super().__init__(daemon=True, name="knowledge-watcher")
+        self.dirs = list(dirs)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._sigs = {d: dir_signature(d) for d in self.dirs}
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for d in self.dirs:
+                sig = dir_signature(d)
+                if sig != self._sigs[d]:
+                    self._sigs[d] = sig
+                    try:
+                        self.on_change(d)
+                    except Exception:
+                        # bir sonraki değişiklikte yeniden denenir
+                        pass
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,97 @@
+# backend/rag/lexical.py
+# Türkçe-normalize BM25 ters indeksi + reciprocal-rank fusion (RRF).
+#
+# MiniLM İngilizce bir model; "baş ağrısı" gibi bariz anahtar kelime eşleşmelerini kaçırabiliyor.
+# Sözcüksel yol embedding gerektirmez: model henüz yüklenmemişken tek başına da kullanılır.
+import os, math, heapq
+from collections import Counter, defaultdict
+from typing import List, Tuple, Dict, Iterable, Hashable
+
+from ml_intent import normalize
+
+BM25_K1 = float(os.getenv("RAG_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("RAG_BM25_B", "0.75"))
+# Türkçe eklemeli bir dil: her kelime 3..N harflik önekleriyle indekslenir
+# (baş/başım -> "bas", ağrısı/ağrıyor -> "agri"); 0 = kelimenin tamamı
+BM25_PREFIX = int(os.getenv("RAG_BM25_PREFIX", "5"))
+_MIN_PREFIX = 3
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+
+def tokenize(text: str, prefix: int = BM25_PREFIX) -> List[str]:
+    toks = normalize(text).split()
+    if prefix <= 0:
+        return toks
+    out = []
+    for t in toks:
+        if len(t) <= _MIN_PREFIX:
+            out.append(t)
+        else:
+            out.extend(t[:n] for n in range(_MIN_PREFIX, min(len(t), prefix) + 1))
+    return out
+
+
+class BM25Index:
+    """
+    Ters indeks; BM25'in belgeye bağlı kısmı (idf * tf doygunluğu) indeksleme anında
+    hesaplanır. Sorgu = terim başına bir sözlük araması + ağırlık toplama.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, str]], k1: float = BM25_K1, b: float = BM25_B,
+                 prefix: int = BM25_PREFIX):
+        self.prefix = prefix
+        self.ids: List[str] = []
+        self.docs: List[str] = []
+        toks_per_doc: List[Counter] = []
+        lengths: List[int] = []
+        for cid, text in items:
+            toks = tokenize(text, prefix)
+            self.ids.append(cid)
+            self.docs.append(text)
+            toks_per_doc.append(Counter(toks))
+            lengths.append(len(toks))
+
+        n = len(self.ids)
+        avgdl = (sum(lengths) / n) if n else 0.0
+        df: Counter = Counter()
+        for tf in toks_per_doc:
+            df.update(tf.keys())
+
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for i, tf in enumerate(toks_per_doc):
+            norm = k1 * (1 - b + b * lengths[i] / avgdl) if avgdl else k1
+            for term, f in tf.items():
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                self.postings[term].append((i, idf * f * (k1 + 1) / (f + norm)))
+        self.postings = dict(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[str, str, float]]:
+        """[(chunk_id, metin, skor), ...] skor azalan; eşleşmeyen belgeler dönmez."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query, self.prefix)):
+            for i, w in self.postings.get(term, ()):
+                scores[i] += w
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(self.ids[i], self.docs[i], s) for i, s in top]
+
+
+def rrf_fuse(ranked: List[Tuple[List[Tuple[Hashable, str]], float]], k: int = 3,
+             rrf_k: int = RRF_K, *, with_scores: bool = False) -> list:
+    """
+    ranked: [(hits, ağırlık), ...]; hits = sıralı [(chunk_id, metin)].
+    skor(d) = Σ ağırlık / (rrf_k + sıra); ilk k sonucu döner
+    ([(chunk_id, metin)] ya da with_scores ile [(chunk_id, metin, skor)]).
+    """
+    score: Dict[str, float] = defaultdict(float)
+    text: Dict[str, str] = {}
+    for hits, weight in ranked:
+        for rank, (cid, doc) in enumerate(hits, start=1):
+            score[cid] += weight / (rrf_k + rank)
+            text.setdefault(cid, doc)
+    best = sorted(score, key=lambda c: -score[c])[:k]
+    if with_scores:
+        return [(c, text[c], score[c]) for c in best]
+    return [(c, text[c]) for c in best]
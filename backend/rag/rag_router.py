@@ -0,0 +1,95 @@
+# backend/rag/rag_router.py
+# Çok koleksiyonlu retrieval: sorgu bir kez embed edilir, tüm koleksiyonlarda tek çağrıyla
+# (vector_store.query_many) aranır; skorlar sonra koleksiyon bazında kalibre edilip tek
+# sıralamada birleşir ve sonuç bir token bütçesine sığdırılır. (Belirsiz mesajlarda daily + lab
+# birlikte aranır.)
+import os, json, math
+from typing import Dict, List, Tuple, Any
+
+from rag.embedder import get_embedder
+from rag.lexical import rrf_fuse
+from rag.vector_store import query_many
+from rag.rag_store import (RETRIEVAL_MODE, VECTOR_TOP_K, LEXICAL_TOP_K, VECTOR_WEIGHT,
+                           LEXICAL_WEIGHT, lexical_index)
+
+# Prompt'a girecek RAG bağlamı için yaklaşık token bütçesi
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "600"))
+CHARS_PER_TOKEN = float(os.getenv("RAG_CHARS_PER_TOKEN", "4"))
+# Koleksiyon başına doğrusal kalibrasyon: {"lab": [ölçek, kayma], ...}
+# Farklı bilgi tabanları sistematik olarak farklı benzerlik seviyeleri üretir
+# (ör. kısa/teknik lab metinleri); kayma bu farkı dengeler.
+CALIBRATION: Dict[str, Tuple[float, float]] = {
+    name: (float(v[0]), float(v[1]))
+    for name, v in json.loads(os.getenv("RAG_COLLECTION_CALIBRATION", "{}") or "{}").items()
+}
+
+Hit = Tuple[str, str, str, float]   # (koleksiyon, chunk_id, metin, skor)
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _calibrate(name: str, sim: float) -> float:
+    scale, bias = CALIBRATION.get(name, (1.0, 0.0))
+    return scale * sim + bias
+
+
+def _vector_ranking(collections: Dict[str, Any], query: str, k: int) -> List[Hit]:
+    qv = get_embedder().embed_query(query)   # tüm koleksiyonlar için tek embedding
+    out: List[Hit] = []
+    for name, res in query_many(collections, qv, n_results=k).items():
+        for cid, doc, d in zip(res["ids"], res["documents"], res["distances"]):
+            if isinstance(doc, str) and doc.strip():
+                # l2 mesafesi (birim vektörler): d = 2 - 2cos -> cos = 1 - d/2
+                out.append((name, cid, doc, _calibrate(name, 1.0 - float(d) / 2.0)))
+    return sorted(out, key=lambda h: -h[3])
+
+
+def _lexical_ranking(collections: Dict[str, Any], query: str, k: int) -> List[Hit]:
+    out: List[Hit] = []
+    for name in collections:
+        idx = lexical_index(name)
+        if idx is None:
+            continue
+        out.extend((name, cid, doc, score) for cid, doc, score in idx.search(query, k=k))
+    return sorted(out, key=lambda h: -h[3])
+
+
+def pack_budget(hits: List[Hit], k: int, token_budget: int) -> List[Hit]:
+    """Sıralı hit'lerden bütçeye sığanları seçer (sığmayan atlanır, en az bir chunk girer)."""
+    chosen, used = [], 0
+    for h in hits:
+        t = approx_tokens(h[2])
+        if chosen and used + t > token_budget:
+            continue
+        chosen.append(h)
+        used += t
+        if len(chosen) >= k:
+            break
+    return chosen
+
+
+def retrieve_multi(collections: Dict[str, Any], query: str, k: int = 3, *,
+                   token_budget: int = CONTEXT_TOKEN_BUDGET, mode: str = RETRIEVAL_MODE) -> List[Hit]:
+    """
+    collections: {"daily": col, "lab": col, ...} (None olan koleksiyon yalnız BM25 ile katılır)
+    return: [(koleksiyon, chunk_id, metin, skor), ...] birleşik sıralamada, bütçeye sığmış
+    """
+    if not query:
+        return []
+    have_vector = mode != "lexical" and get_embedder().loaded and any(c is not None for c in collections.values())
+    vec = _vector_ranking(collections, query, VECTOR_TOP_K) if have_vector else []
+    lex = _lexical_ranking(collections, query, LEXICAL_TOP_K) if mode != "vector" or not have_vector else []
+
+    if vec and lex:
+        # ölçekleri farklı iki sıralama (kalibre benzerlik / BM25) RRF ile birleşir;
+        # anahtar (koleksiyon, chunk_id)
+        fused = rrf_fuse([
+            ([((h[0], h[1]), h[2]) for h in vec], VECTOR_WEIGHT),
+            ([((h[0], h[1]), h[2]) for h in lex], LEXICAL_WEIGHT),
+        ], k=len(vec) + len(lex), with_scores=True)
+        ranked = [(name, cid, doc, score) for (name, cid), doc, score in fused]
+    else:
+        ranked = vec or lex
+    return pack_budget(ranked, k, token_budget)
@@ -1,52 +1,105 @@
 # backend/rag/rag_store.py
 import os
-from typing import List
-import glob
+import threading
+from typing import List, Tuple, Dict, Optional
 
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from rag.indexer import sync_collection, scan_knowledge
+from rag.embedder import get_embedder
+from rag.lexical import BM25Index, rrf_fuse
+from rag.vector_store import VECTOR_BACKEND, VECTOR_DTYPE, NumpyVectorStore
 
-def _read_all_txt(folder: str) -> List[str]:
-    if not folder or not os.path.isdir(folder):
-        return []
-    paths = sorted(glob.glob(os.path.join(folder, "*.txt")))
-    docs = []
-    for p in paths:
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                t = f.read().strip()
-                if t:
-                    docs.append(t)
-        except Exception:
-            continue
-    return docs
-
-def build_or_load_collection(persist_dir: str, name: str, knowledge_dir: str):
-    os.makedirs(persist_dir, exist_ok=True)
+# "hybrid": BM25 + vektör (RRF) | "vector": yalnız vektör | "lexical": yalnız BM25
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL", "hybrid")
+VECTOR_TOP_K = int(os.getenv("RAG_VECTOR_TOP_K", "8"))
+LEXICAL_TOP_K = int(os.getenv("RAG_LEXICAL_TOP_K", "8"))
+VECTOR_WEIGHT = float(os.getenv("RAG_VECTOR_WEIGHT", "1.0"))
+LEXICAL_WEIGHT = float(os.getenv("RAG_LEXICAL_WEIGHT", "1.0"))
+
+# koleksiyon adı -> BM25 indeksi (embedding gerektirmez; model yüklenmeden kurulabilir)
+_lexical: Dict[str, BM25Index] = {}
+_lexical_lock = threading.Lock()
+
+def build_lexical(name: str, knowledge_dir: str) -> BM25Index:
+    """Knowledge klasöründen BM25 indeksi; chunk id'leri koleksiyondakilerle aynıdır."""
+    idx = BM25Index((cid, text) for cid, (text, _meta) in scan_knowledge(knowledge_dir).items())
+    with _lexical_lock:
+        _lexical[name] = idx
+    return idx
+
+def lexical_index(name: str) -> Optional[BM25Index]:
+    return _lexical.get(name)
 
+def _open_store(persist_dir: str, name: str, backend: str):
+    """VECTOR_BACKEND=chroma (varsayılan) | numpy; ikisi de VectorStore arayüzünü karşılar."""
+    if backend == "numpy":
+        return NumpyVectorStore(persist_dir, name, dtype=VECTOR_DTYPE)
+    if backend != "chroma":
+        raise ValueError(f"unknown vector backend: {backend}")
+
+    import chromadb
     client = chromadb.PersistentClient(path=persist_dir)
-    embed_fn = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
 
-    col = client.get_or_create_collection(
+    # Embedding'leri koleksiyon başına ayrı model yerine paylaşılan servis üretir;
+    # chroma'ya hazır vektör verilir (embedding_function=None).
+    return client.get_or_create_collection(
         name=name,
-        embedding_function=embed_fn
+        embedding_function=None
     )
 
-    # Koleksiyon boşsa knowledge dosyalarını yükle
-    if col.count() == 0:
-        docs = _read_all_txt(knowledge_dir)
-        if docs:
-            ids = [f"{name}-{i}" for i in range(len(docs))]
-            metas = [{"source": "knowledge", "index": i} for i in range(len(docs))]
-            col.add(documents=docs, ids=ids, metadatas=metas)
+def build_or_load_collection(persist_dir: str, name: str, knowledge_dir: str, backend: str = VECTOR_BACKEND):
+    os.makedirs(persist_dir, exist_ok=True)
+
+    col = _open_store(persist_dir, name, backend)
+
+    # Knowledge klasörüyle artımlı eşitle: sadece yeni/değişen chunk'lar embed edilir
+    sync_collection(col, knowledge_dir, embed_many=get_embedder().embed_many)
+    build_lexical(name, knowledge_dir)
 
     return col
 
-def retrieve(collection, query: str, k: int = 3) -> List[str]:
+def sync_knowledge(col, name: str, knowledge_dir: str) -> dict:
+    """Koleksiyon + BM25 indeksini birlikte günceller (reindex/watcher)."""
+    out = sync_collection(col, knowledge_dir, embed_many=get_embedder().embed_many)
+    build_lexical(name, knowledge_dir)
+    return out
+
+def vector_hits(collection, query: str, k: int = 3) -> List[Tuple[str, str]]:
     if not query:
         return []
-    res = collection.query(query_texts=[query], n_results=k)
+    res = collection.query(query_embeddings=[get_embedder().embed_query(query)], n_results=k)
     docs = res.get("documents") or [[]]
-    # docs: List[List[str]]
+    ids = res.get("ids") or [[]]
+    # docs/ids: List[List[str]]
     out = docs[0] if docs and len(docs) > 0 else []
-    return [d for d in out if isinstance(d, str) and d.strip()]
+    out_ids = ids[0] if ids and len(ids) > 0 else []
+    return [(i, d) for i, d in zip(out_ids, out) if isinstance(d, str) and d.strip()]
+
+def retrieve_hits(collection, query: str, k: int = 3, *, name: Optional[str] = None,
+                  mode: str = RETRIEVAL_MODE) -> List[Tuple[str, str]]:
+    """
+    [(chunk_id, text), ...] döner; id'ler cache anahtarı vb. için gerekir.
+    hybrid: vektör ve BM25 sonuçları RRF ile birleşir. Koleksiyon yoksa ya da embedding
+    modeli henüz yüklenmemişse yalnız BM25 kullanılır (sıfır embedding yedeği).
+    """
+    if not query:
+        return []
+    lex = lexical_index(name or getattr(collection, "name", ""))
+
+    def lexical(n: int) -> List[Tuple[str, str]]:
+        return [(cid, doc) for cid, doc, _ in lex.search(query, k=n)] if lex is not None else []
+
+    if collection is None or mode == "lexical":
+        return lexical(k)
+    if mode == "vector" or lex is None:
+        return vector_hits(collection, query, k=k)
+    if not get_embedder().loaded:
+        return lexical(k)
+
+    ranked = [
+        (vector_hits(collection, query, k=VECTOR_TOP_K), VECTOR_WEIGHT),
+        (lexical(LEXICAL_TOP_K), LEXICAL_WEIGHT),
+    ]
+    return rrf_fuse(ranked, k=k)
+
+def retrieve(collection, query: str, k: int = 3) -> List[str]:
+    return [d for _, d in retrieve_hits(collection, query, k=k)]
@@ -0,0 +1,217 @@
+# backend/rag/vector_store.py
+# Vektör deposu arayüzü + saf NumPy (memory-mapped) arka uç.
+#
+# Arayüz, chromadb Collection'ının bizim kullandığımız alt kümesidir; böylece
+# rag_store.retrieve_hits ve indexer.sync_collection iki arka uçla da aynı çalışır.
+import os, json, threading
+from typing import Protocol, List, Optional, Dict, Any
+
+import numpy as np
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")   # "chroma" | "numpy"
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")      # numpy: "float32" | "float16" | "int8"
+
+
+class VectorStore(Protocol):
+    def count(self) -> int: ...
+    def get(self, include: Optional[list] = None) -> Dict[str, Any]: ...
+    def add(self, ids: List[str], documents: List[str], metadatas: List[dict],
+            embeddings: Optional[List[List[float]]] = None) -> None: ...
+    def delete(self, ids: List[str]) -> None: ...
+    def query(self, query_embeddings: List[List[float]], n_results: int = 3) -> Dict[str, Any]: ...
+
+
+_QUERY_BLOCK_ROWS = 8192   # float16/int8 satırları bu bloklarla float32'ye açılır (BLAS + sınırlı bellek)
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Skor vektöründe en büyük k indeks, azalan sırada (argpartition; tam sıralama yok)."""
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+class NumpyVectorStore:
+    """
+    Küçük, çoğunlukla okunan bilgi tabanları için:
+    - L2-normalize edilmiş embedding'ler {name}.vec.npy içinde (mmap ile okunur)
+    - id/metin/metadata {name}.meta.json yan dosyasında
+    - sorgu = tek matris-vektör çarpımı (kosinüs) + argpartition ile top-k;
+      distances chroma'daki gibi kare l2 (2 - 2cos)
+    - dtype: float32 | float16 | int8 (int8: satır başı ölçek {name}.scale.npy içinde)
+    Yazma işlemleri matrisi baştan yazar (atomik os.replace); okuma yoğun iş yükü için yeterli.
+    """
+
+    def __init__(self, persist_dir: str, name: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16", "int8"):
+            raise ValueError(f"unsupported vector dtype: {dtype}")
+        os.makedirs(persist_dir, exist_ok=True)
+        self.name = name
+        self.dtype = dtype
+        self._vec_path = os.path.join(persist_dir, f"{name}.vec.npy")
+        self._meta_path = os.path.join(persist_dir, f"{name}.meta.json")
+        self._scale_path = os.path.join(persist_dir, f"{name}.scale.npy")
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._docs: List[str] = []
+        self._metas: List[dict] = []
+        self._mat: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None   # yalnızca int8
+        self._load()
+
+    # ---- dosya ----
+    def _load(self):
+        if not (os.path.exists(self._meta_path) and os.path.exists(self._vec_path)):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("dtype") != self.dtype:
+            # farklı dtype ile yazılmış; yeniden eklenmesi için boş başla
+            return
+        self._ids, self._docs, self._metas = meta["ids"], meta["documents"], meta["metadatas"]
+        self._mat = np.load(self._vec_path, mmap_mode="r")
+        if self.dtype == "int8":
+            self._scale = np.load(self._scale_path)
+
+    def _persist(self, mat: np.ndarray, scale: Optional[np.ndarray]):
+        tmp_vec = self._vec_path + ".tmp.npy"
+        tmp_meta = self._meta_path + ".tmp"
+        np.save(tmp_vec, mat)
+        if scale is not None:
+            np.save(self._scale_path + ".tmp.npy", scale)
+            os.replace(self._scale_path + ".tmp.npy", self._scale_path)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"dtype": self.dtype, "ids": self._ids, "documents": self._docs,
+                       "metadatas": self._metas}, f, ensure_ascii=False)
+        os.replace(tmp_vec, self._vec_path)
+        os.replace(tmp_meta, self._meta_path)
+        self._mat = np.load(self._vec_path, mmap_mode="r")
+        self._scale = scale
+
+    def _encode(self, vecs: np.ndarray):
+        """return: (saklanacak matris, int8 ise satır ölçekleri yoksa None)"""
+        vecs = _normalize_rows(vecs.astype(np.float32))
+        if self.dtype == "int8":
+            # satırın en büyük bileşeni 127'ye eşlenir; skor = (q · satır_int8) * ölçek
+            amax = np.abs(vecs).max(axis=1)
+            amax[amax == 0] = 1.0
+            return np.rint(vecs * (127.0 / amax)[:, None]).astype(np.int8), (amax / 127.0).astype(np.float32)
+        return vecs.astype(self.dtype), None
+
+    def _scores(self, mat: np.ndarray, scale: Optional[np.ndarray], q: np.ndarray) -> np.ndarray:
+        """(N, Q) kosinüs skorları; float32 dışı satırlar bloklar halinde açılır."""
+        if mat.dtype == np.float32:
+            return mat @ q.T
+        out = np.empty((mat.shape[0], q.shape[0]), dtype=np.float32)
+        for i in range(0, mat.shape[0], _QUERY_BLOCK_ROWS):
+            out[i:i + _QUERY_BLOCK_ROWS] = mat[i:i + _QUERY_BLOCK_ROWS].astype(np.float32) @ q.T
+        if scale is not None:
+            out *= scale[:, None]
+        return out
+
+    def _snapshot(self):
+        with self._lock:
+            return self._mat, self._scale, self._ids, self._docs, self._metas
+
+    # ---- VectorStore ----
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, include: Optional[list] = None) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {"ids": list(self._ids)}
+            if include and "documents" in include:
+                out["documents"] = list(self._docs)
+            if include and "metadatas" in include:
+                out["metadatas"] = list(self._metas)
+            return out
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[dict],
+            embeddings: Optional[List[List[float]]] = None) -> None:
+        if embeddings is None:
+            raise ValueError("NumpyVectorStore needs precomputed embeddings")
+        if not ids:
+            return
+        new, new_scale = self._encode(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            if self._mat is None or not len(self._ids):
+                mat, scale = new, new_scale
+            else:
+                mat = np.concatenate([np.asarray(self._mat), new])
+                scale = np.concatenate([self._scale, new_scale]) if new_scale is not None else None
+            self._ids = self._ids + list(ids)
+            self._docs = self._docs + list(documents)
+            self._metas = self._metas + [dict(m or {}) for m in metadatas]
+            self._persist(mat, scale)
+
+    def delete(self, ids: List[str]) -> None:
+        drop = set(ids)
+        with self._lock:
+            keep = [i for i, cid in enumerate(self._ids) if cid not in drop]
+            if len(keep) == len(self._ids):
+                return
+            mat = np.asarray(self._mat)[keep]
+            scale = self._scale[keep] if self._scale is not None else None
+            self._ids = [self._ids[i] for i in keep]
+            self._docs = [self._docs[i] for i in keep]
+            self._metas = [self._metas[i] for i in keep]
+            self._persist(mat, scale)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 3) -> Dict[str, Any]:
+        mat, scale, ids, docs, metas = self._snapshot()
+        empty = {"ids": [[] for _ in query_embeddings], "documents": [[] for _ in query_embeddings],
+                 "metadatas": [[] for _ in query_embeddings], "distances": [[] for _ in query_embeddings]}
+        if mat is None or not ids:
+            return empty
+
+        q = _normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        scores = self._scores(mat, scale, q)
+
+        k = min(n_results, len(ids))
+        out: Dict[str, Any] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for j in range(scores.shape[1]):
+            col = scores[:, j]
+            top = _top_k(col, k)
+            out["ids"].append([ids[i] for i in top])
+            out["documents"].append([docs[i] for i in top])
+            out["metadatas"].append([metas[i] for i in top])
+            # chroma'nın varsayılan l2 uzayıyla aynı ölçek (birim vektörler): d = 2 - 2cos
+            out["distances"].append([float(2.0 - 2.0 * col[i]) for i in top])
+        return out
+
+
+def query_many(stores: Dict[str, Any], query_embedding: List[float], n_results: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    Tek sorgu vektörüyle birden çok koleksiyonda tek çağrılık arama.
+    NumpyVectorStore'larda sorgu bir kez normalize edilir; her mmap matris aynı geçişte skorlanıp
+    koleksiyon başına top-k seçilir (matrisler birleştirilmez: her sorguda kopya gerekirdi).
+    chroma'da koleksiyonlar arası sorgu yok; o arka uçta koleksiyonun kendi query()'si kullanılır.
+    None olan koleksiyonlar atlanır.
+    return: {ad: {"ids": [...], "documents": [...], "distances": [...]}} (chroma ölçeği: 2 - 2cos)
+    """
+    q = _normalize_rows(np.asarray([query_embedding], dtype=np.float32))
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, store in stores.items():
+        if store is None:
+            continue
+        if not isinstance(store, NumpyVectorStore):
+            res = store.query(query_embeddings=[query_embedding], n_results=n_results)
+            out[name] = {key: (res.get(key) or [[]])[0] for key in ("ids", "documents", "distances")}
+            continue
+        mat, scale, ids, docs, _metas = store._snapshot()
+        if mat is None or not ids:
+            out[name] = {"ids": [], "documents": [], "distances": []}
+            continue
+        scores = store._scores(mat, scale, q)[:, 0]
+        top = _top_k(scores, min(n_results, len(ids)))
+        out[name] = {
+            "ids": [ids[i] for i in top],
+            "documents": [docs[i] for i in top],
+            "distances": (2.0 - 2.0 * scores[top]).astype(float).tolist(),
+        }
+    return out
@@ -0,0 +1,147 @@
+# backend/singleflight.py
+# Aynı anahtarlı eşzamanlı işlerin birleştirilmesi (singleflight).
+#
+#   tr, en = flights.do(key, lambda: generate_reply_tr(prompt))
+#
+# İlk gelen (lider) işi yapar; o sürerken aynı anahtarla gelenler (takipçi) kendi LLM çağrısını
+# yapmak yerine liderin sonucunu bekler. Lider hata verirse takipçiler aynı hatayı alır (kendi
+# fallback zincirlerine geçerler). Bekleme sınırlıdır: wait_timeout aşılırsa CoalesceTimeout.
+# Sync (thread) ve async (ASGI) çağıranlar aynı tabloyu paylaşır; sonuç concurrent Future'dadır.
+import asyncio, threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Hashable, Awaitable, Any
+
+
+class CoalesceTimeout(RuntimeError):
+    """Takipçi, liderin sonucunu wait_timeout içinde alamadı."""
+
+
+class _LeaderGone(Exception):
+    """Lider kendi isteğiyle ilgili bir sebeple (iptal) bitti; takipçi işi kendisi yapmalı."""
+
+
+class SingleFlight:
+    def __init__(self, wait_timeout: float = 120.0, *, leader_only: tuple = (), enabled: bool = True):
+        """
+        leader_only: yalnız liderin isteğine ait hata tipleri (ör. StageCancelled). Takipçilere
+        yayılmaz; takipçi yeniden dener ve gerekirse kendisi lider olur.
+        """
+        self.wait_timeout = wait_timeout
+        self.leader_only = tuple(leader_only)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.shared = 0       # liderin sonucunu alan takipçi
+        self.shared_errors = 0
+        self.timeouts = 0
+
+    # ---- lider / takipçi seçimi ----
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            fut = self._flights.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            fut.set_running_or_notify_cancel()   # bekleyenlerin iptali lideri etkilemesin
+            self._flights[key] = fut
+            self.leaders += 1
+            return fut, True
+
+    def _finish(self, key: Hashable, fut: Future, result: Any = None, error: BaseException | None = None):
+        with self._lock:
+            if self._flights.get(key) is fut:
+                del self._flights[key]
+        if error is None:
+            fut.set_result(result)
+        elif isinstance(error, self.leader_only) or isinstance(error, asyncio.CancelledError):
+            fut.set_exception(_LeaderGone())
+        else:
+            fut.set_exception(error)
+
+    def _shared(self, fut: Future) -> Any:
+        """Tamamlanmış lider sonucunu takipçiye döndürür (hata ise yeniden fırlatır)."""
+        err = fut.exception()
+        if isinstance(err, _LeaderGone):
+            raise err
+        with self._lock:
+            if err is None:
+                self.shared += 1
+            else:
+                self.shared_errors += 1
+        return fut.result()
+
+    def _timed_out(self, wait: float) -> CoalesceTimeout:
+        with self._lock:
+            self.timeouts += 1
+        return CoalesceTimeout(f"coalesced request still running after {wait:.1f}s")
+
+    # ---- sync ----
+    def do(self, key: Hashable, fn: Callable[[], Any], *, timeout: float | None = None) -> tuple[Any, bool]:
+        """
+        timeout: bu takipçinin en fazla bekleyeceği süre (varsayılan wait_timeout; ör. kalan istek bütçesi).
+        return: (sonuç, takipçi miydi)
+        """
+        wait = self.wait_timeout if timeout is None else min(timeout, self.wait_timeout)
+        if not self.enabled:
+            return fn(), False
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self._finish(key, fut, error=e)
+                    raise
+                self._finish(key, fut, result)
+                return result, False
+            try:
+                fut.result(timeout=wait)
+            except FutureTimeout:
+                raise self._timed_out(wait) from None
+            except Exception:
+                pass
+            try:
+                return self._shared(fut), True
+            except _LeaderGone:
+                continue
+
+    # ---- async ----
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]], *,
+                       timeout: float | None = None) -> tuple[Any, bool]:
+        wait = self.wait_timeout if timeout is None else min(timeout, self.wait_timeout)
+        if not self.enabled:
+            return await fn(), False
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self._finish(key, fut, error=e)
+                    raise
+                self._finish(key, fut, result)
+                return result, False
+            try:
+                # shield: bekleyenin zaman aşımı/iptali paylaşılan sonucu iptal etmez
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), wait)
+            except asyncio.TimeoutError:
+                raise self._timed_out(wait) from None
+            except Exception:
+                pass
+            try:
+                return self._shared(fut), True
+            except _LeaderGone:
+                continue
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.shared,
+                "coalesced_errors": self.shared_errors,
+                "timeouts": self.timeouts,
+                "wait_timeout": self.wait_timeout,
+            }
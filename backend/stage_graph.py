@@ -0,0 +1,116 @@
+# backend/stage_graph.py
+# /chat aşamalarını küçük bir bağımlılık grafiği olarak paylaşılan executor'da çalıştırır.
+#
+#   g = StageGraph()
+#   avail = g.submit("availability", availability, dept_code)
+#   prep = g.submit("retrieve", rag_prepare, user, mode="daily")      # avail ile aynı anda
+#   ans = g.submit("rag_answer", answer_from_prep, after=[prep])      # prep'in sonucuyla çağrılır
+#   ...
+#   g.cancel()   # başlamamış düğümler iptal; çalışanlar raise_if_cancelled() ile erken çıkar
+#
+# Düğümler bağımlılıklarını thread içinde beklemez: bağımlılıklar bitince done-callback ile
+# kuyruğa girer; böylece sınırlı havuzda birbirini bekleyip kilitlenme olmaz.
+# Her düğüm, gönderildiği andaki contextvars kopyasıyla çalışır (span'lar aynı isteğe yazılır).
+import os, threading, contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from metrics import current_timings, note_cancelled
+
+# tüm isteklerin paylaştığı havuz; düğümler çoğunlukla Ollama/DB beklediği için geniş
+CHAT_STAGE_WORKERS = int(os.getenv("CHAT_STAGE_WORKERS", "64"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def stage_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CHAT_STAGE_WORKERS, thread_name_prefix="chat-stage")
+    return _executor
+
+
+class StageCancelled(RuntimeError):
+    """Grafik iptal edildi (ör. birincil yol başarılı oldu, spekülatif yedeğe gerek kalmadı)."""
+
+
+_current: contextvars.ContextVar[Optional["StageGraph"]] = contextvars.ContextVar("stage_graph", default=None)
+
+
+def raise_if_cancelled(stage: str):
+    """Uzun düğümlerin adım aralarında çağırdığı iptal noktası (grafik dışında etkisiz)."""
+    g = _current.get()
+    if g is not None and g.stopped.is_set():
+        raise StageCancelled(stage)
+
+
+class StageGraph:
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self._executor = executor or stage_executor()
+        self._futures: list[Future] = []
+        self.stopped = threading.Event()
+
+    def submit(self, name: str, fn: Callable, *args, after: Iterable[Future] = (), **kwargs) -> Future:
+        """
+        fn(*[bağımlılık sonuçları], *args, **kwargs) bağımlılıklar bitince çalışır.
+        Bağımlılıklardan biri hata verirse düğüm çalışmadan aynı hatayla biter.
+        """
+        fut: Future = Future()
+        deps = list(after)
+        ctx = contextvars.copy_context()
+        rt = current_timings()
+        remaining = [len(deps)]
+        lock = threading.Lock()
+
+        def call():
+            _current.set(self)
+            return fn(*[d.result() for d in deps], *args, **kwargs)
+
+        def run():
+            if not fut.set_running_or_notify_cancel():
+                return
+            if self.stopped.is_set():
+                fut.set_exception(StageCancelled(name))
+                return
+            try:
+                fut.set_result(ctx.run(call))
+            except BaseException as e:
+                fut.set_exception(e)
+
+        def schedule():
+            for d in deps:
+                err = StageCancelled(name) if d.cancelled() else d.exception()
+                if err is not None:
+                    if fut.set_running_or_notify_cancel():
+                        fut.set_exception(err)
+                    return
+            self._executor.submit(run)
+
+        def dep_done(_f):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                schedule()
+
+        def noted(f: Future):
+            if f.cancelled() or isinstance(f.exception(), StageCancelled):
+                note_cancelled(name, rt)
+
+        fut.add_done_callback(noted)
+        self._futures.append(fut)
+        if deps:
+            for d in deps:
+                d.add_done_callback(dep_done)
+        else:
+            schedule()
+        return fut
+
+    def cancel(self):
+        """Başlamamış düğümleri iptal eder; çalışanlar bir sonraki raise_if_cancelled()'da durur."""
+        self.stopped.set()
+        for f in self._futures:
+            f.cancel()
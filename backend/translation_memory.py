@@ -0,0 +1,195 @@
+# backend/translation_memory.py
+# Cümle bazlı EN -> TR çeviri belleği (SQLite kalıcı, boyut sınırlı LRU)
+#
+# Dışa/içe aktarma (JSONL, satır başına {"en": ..., "tr": ...}):
+#   python translation_memory.py export tm_seed.jsonl
+#   python translation_memory.py import tm_seed.jsonl
+
+import os, sys, json, time, sqlite3, threading
+from collections import OrderedDict
+from typing import Optional
+
+from llm_client import (split_sentences, translate_to_tr, translate_batch_to_tr, translate_sentence_to_tr,
+                        EMPTY_REPLY)
+
+BASE_DIR = os.path.dirname(__file__)
+TM_DB_PATH = os.path.join(BASE_DIR, "data", "translation_memory.db")
+TM_MAX_ITEMS = int(os.getenv("TM_MAX_ITEMS", "5000"))
+# bellekten okunan kayıtların last_used'ı bu kadar isabette bir toplu yazılır
+TM_TOUCH_BATCH = int(os.getenv("TM_TOUCH_BATCH", "64"))
+
+
+def _src_key(sentence: str) -> str:
+    return " ".join((sentence or "").split())
+
+
+def _usable(tr: str) -> bool:
+    """Boş çıktı ya da Ollama'nın boş yanıt yer tutucusu çeviri olarak saklanmaz."""
+    tr = (tr or "").strip()
+    return bool(tr) and tr != EMPTY_REPLY
+
+
+class TranslationMemory:
+    """
+    Bellekte OrderedDict (LRU sırası), SQLite'a write-through.
+    Açılışta en son kullanılanlar yüklenir; max_items aşılınca en eskisi silinir.
+    İsabetlerin last_used'ı TM_TOUCH_BATCH'te bir (ya da sonraki yazımda) DB'ye işlenir.
+    """
+
+    def __init__(self, max_items: int = 5000, db_path: Optional[str] = None):
+        self.max_items = max_items
+        self.db_path = db_path
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}   # DB'ye henüz yazılmamış isabetler: src -> zaman
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            con = self._conn()
+            con.execute("""
+              CREATE TABLE IF NOT EXISTS tm(
+                src TEXT PRIMARY KEY,
+                tr TEXT NOT NULL,
+                last_used REAL NOT NULL
+              )
+            """)
+            rows = con.execute("SELECT src, tr FROM tm ORDER BY last_used DESC LIMIT ?",
+                               (max_items,)).fetchall()
+            con.close()
+            for src, tr in reversed(rows):
+                self._mem[src] = tr
+
+    def _conn(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def get(self, sentence: str) -> Optional[str]:
+        key = _src_key(sentence)
+        with self._lock:
+            tr = self._mem.get(key)
+            if tr is None:
+                self.misses += 1
+                return None
+            self._mem.move_to_end(key)
+            self.hits += 1
+            if self.db_path:
+                self._touched[key] = time.time()
+            flush = len(self._touched) >= TM_TOUCH_BATCH
+        if flush:
+            self.flush()
+        return tr
+
+    def _take_touched(self) -> list[tuple[float, str]]:
+        with self._lock:
+            rows = [(ts, k) for k, ts in self._touched.items()]
+            self._touched.clear()
+        return rows
+
+    def flush(self):
+        """Bekleyen isabetlerin last_used'ını DB'ye yazar (yeniden başlatmada LRU sırası korunur)."""
+        rows = self._take_touched()
+        if not rows or not self.db_path:
+            return
+        try:
+            con = self._conn()
+            con.executemany("UPDATE tm SET last_used=? WHERE src=?", rows)
+            con.commit(); con.close()
+        except sqlite3.Error:
+            pass
+
+    def put_many(self, pairs: list[tuple[str, str]]):
+        now = time.time()
+        evicted = []
+        with self._lock:
+            for src, tr in pairs:
+                key = _src_key(src)
+                self._mem[key] = tr
+                self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                evicted.append(self._mem.popitem(last=False)[0])
+        if self.db_path:
+            try:
+                con = self._conn()
+                con.executemany("UPDATE tm SET last_used=? WHERE src=?", self._take_touched())
+                con.executemany("INSERT OR REPLACE INTO tm(src, tr, last_used) VALUES(?,?,?)",
+                                [(_src_key(s), t, now + i * 1e-6) for i, (s, t) in enumerate(pairs)])
+                if evicted:
+                    con.executemany("DELETE FROM tm WHERE src=?", [(k,) for k in evicted])
+                con.commit(); con.close()
+            except sqlite3.Error:
+                pass
+
+    def put(self, sentence: str, tr: str):
+        self.put_many([(sentence, tr)])
+
+    def export_jsonl(self, path: str) -> int:
+        with self._lock:
+            items = list(self._mem.items())
+        with open(path, "w", encoding="utf-8") as f:
+            for src, tr in items:
+                f.write(json.dumps({"en": src, "tr": tr}, ensure_ascii=False) + "\n")
+        return len(items)
+
+    def import_jsonl(self, path: str) -> int:
+        pairs = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                if rec.get("en") and rec.get("tr"):
+                    pairs.append((rec["en"], rec["tr"]))
+        self.put_many(pairs)
+        return len(pairs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._mem),
+                "max_items": self.max_items,
+                "sentence_hits": self.hits,
+                "sentence_misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+def translate_with_memory(english_text: str, tm: TranslationMemory) -> str:
+    """
+    Metni cümlelere böl; bellekte olanları oradan al, kalanları tek LLM çağrısında çevir.
+    Toplu çeviri çıktısı ayrıştırılamazsa bütün metin eski yolla çevrilir (belleğe yazılmaz).
+    """
+    sents = split_sentences(english_text)
+    if not sents:
+        return translate_to_tr(english_text)
+
+    found = {s: tm.get(s) for s in dict.fromkeys(sents)}
+    misses = [s for s, tr in found.items() if tr is None]
+    if misses:
+        out = translate_batch_to_tr(misses)
+        if out is None:
+            return translate_to_tr(english_text)
+        tm.put_many([(s, t) for s, t in zip(misses, out) if _usable(t)])
+        found.update(zip(misses, out))
+    return " ".join(found[s] for s in sents)
+
+
+def translate_sentence_with_memory(sentence: str, tm: TranslationMemory) -> str:
+    tr = tm.get(sentence)
+    if tr is None:
+        tr = translate_sentence_to_tr(sentence)
+        if _usable(tr):
+            tm.put(sentence, tr)
+    return tr
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "import"):
+        print("kullanım: python translation_memory.py export|import <dosya.jsonl>")
+        sys.exit(2)
+    tm = TranslationMemory(max_items=TM_MAX_ITEMS, db_path=TM_DB_PATH)
+    if sys.argv[1] == "export":
+        print(f"{tm.export_jsonl(sys.argv[2])} kayıt dışa aktarıldı.")
+    else:
+        print(f"{tm.import_jsonl(sys.argv[2])} kayıt içe aktarıldı.")